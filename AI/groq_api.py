@@ -1,31 +1,13 @@
 # groq_api.py
 # Simplified version using the new response module
-import os
-import sys
-from duckduckgo_search import DDGS
 import datetime
 
-# Fix import paths
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(current_dir)
-modules_dir = os.path.join(parent_dir, "modules")
-
-# Add paths to sys.path if not already there
-for path in [current_dir, parent_dir, modules_dir]:
-    if path not in sys.path:
-        sys.path.insert(0, path)
-
-# Import the main response function from the new module
-try:
-    from modules.core.response import get_groq_response_stream_enhanced, get_groq_response_stream
-    print("SUCCESS: Response module imported successfully")
-except ImportError as e:
-    print(f"ERROR: Could not import response module: {e}")
-    # Fallback function
-    def get_groq_response_stream_enhanced(prompt, user_email):
-        yield "Response module is not available. Please check your system configuration."
-    
-    get_groq_response_stream = get_groq_response_stream_enhanced
+# Import the main response function from the new module. Absolute, so this
+# works both as AI.groq_api (app.py) and as a top-level groq_api with AI/ on
+# sys.path; either way the repository root is on sys.path (memory, groq_client).
+from AI.modules.core.response import (
+    get_groq_response_stream_enhanced, get_groq_response_stream, get_groq_response_stream_async
+)
 
 # Import memory functions for backward compatibility
 try:
@@ -35,7 +17,6 @@ try:
         summarize_with_groq, load_real_time_memory, save_real_time_memory
     )
     MEMORY_AVAILABLE = True
-    print("SUCCESS: Memory module imported successfully")
 except ImportError as e:
     print(f"ERROR: Could not import memory module: {e}")
     MEMORY_AVAILABLE = False
@@ -45,6 +26,7 @@ def duckduckgo_search_and_summarize(query, user_email):
     """Search functionality without the 'Searching...' message"""
     
     try:
+        from duckduckgo_search import DDGS
         search_results = []
         with DDGS() as ddgs:
             for r in ddgs.text(keywords=query, region='wt-wt', max_results=5):
@@ -92,9 +74,3 @@ def duckduckgo_search_and_summarize(query, user_email):
     except Exception as e:
         print(f"Search error: {e}")
         yield "Sorry, I had trouble searching for that information. Please try again."
-
-# Debug information
-print(f"Current working directory: {os.getcwd()}")
-print(f"Script directory: {current_dir}")
-print(f"Modules directory: {modules_dir}")
-print("groq_api.py loaded successfully - main functionality moved to modules/core/response.py")
\ No newline at end of file
@@ -0,0 +1,182 @@
+# modules/core/context_builder.py
+"""
+Token-budgeted assembly of the message list sent to Groq.
+
+Token counts are estimated locally (no tokenizer download or network call).
+The system prompt and the current user message are always sent. Summaries
+get up to a share of the budget left after the system prompt and the most
+recent turns fill the rest, both newest first. The summaries are the ones
+retrieved as most relevant to the prompt (see ``memory.search_summaries``);
+earlier web search results relevant to the prompt (``memory.search_real_time_memory``)
+take what is left of the summaries' share, best match first.
+The system prompt plus the packed summaries and searches form a prefix that
+is cached per user and reused while none of them change.
+"""
+
+import os
+import re
+import threading
+from collections import OrderedDict
+
+# Budget for the whole request context; llama3-8b-8192 has an 8192-token
+# window, the rest is left for the completion
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "6144"))
+# Largest share of the budget left after the system prompt that summaries may take
+CONTEXT_SUMMARY_SHARE = float(os.environ.get("CONTEXT_SUMMARY_SHARE", "0.35"))
+# Number of stored summaries retrieved per turn (most relevant to the prompt)
+CONTEXT_SUMMARY_TOP_K = int(os.environ.get("CONTEXT_SUMMARY_TOP_K", "5"))
+# Number of earlier web search results retrieved per turn (only ones sharing terms with the prompt)
+CONTEXT_SEARCH_TOP_K = int(os.environ.get("CONTEXT_SEARCH_TOP_K", "3"))
+CONTEXT_CACHE_USERS = int(os.environ.get("CONTEXT_CACHE_USERS", "1024"))
+
+# Per-message overhead of the chat format (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+SUMMARIES_HEADER = "Previous conversation context (for continuity):"
+SEARCHES_HEADER = "Earlier web search results that may be relevant:"
+RECENT_HEADER = "Recent conversation:"
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text):
+    """
+    Estimate the number of tokens in ``text``: one per word or punctuation
+    mark, plus one for every further 4 characters of a long word, which
+    tracks BPE tokenizers closely enough for budgeting.
+    """
+    if not text:
+        return 0
+    return sum(1 + (len(token) - 1) // 4 for token in _TOKEN_RE.findall(text))
+
+
+def _message(role, content):
+    return {"role": role, "content": content}
+
+
+def message_tokens(message):
+    return estimate_tokens(message["content"]) + MESSAGE_OVERHEAD_TOKENS
+
+
+def search_text(entry):
+    """One line for a real-time search entry: its date, query and summary"""
+    date = (entry.get("timestamp") or "")[:10]
+    return f"[{date}] {entry.get('query', '')}: {entry.get('summary', '')}"
+
+
+class ContextBuilder:
+    """Packs system prompt, summaries and recent turns under a token budget."""
+
+    def __init__(self, render_system, budget=CONTEXT_TOKEN_BUDGET,
+                 summary_share=CONTEXT_SUMMARY_SHARE, max_users=CONTEXT_CACHE_USERS):
+        """
+        Args:
+            render_system: Function building the system prompt from the
+                ``system_args`` tuple passed to ``build``
+        """
+        self.render_system = render_system
+        self.budget = budget
+        self.summary_share = summary_share
+        self.max_users = max_users
+        self._prefixes = OrderedDict()  # user -> (key, messages, tokens)
+        self._lock = threading.Lock()
+
+    def build(self, user_email, prompt, system_args, summaries, memory, searches=()):
+        """
+        Return the messages for one chat turn.
+
+        Args:
+            user_email (str): User the turn belongs to (prefix cache key)
+            prompt (str): Current user message
+            system_args (tuple): Arguments for ``render_system``
+            summaries (list): Summaries retrieved for this turn, oldest first
+            memory (list): Active memory turns, oldest first
+            searches (list): Real-time search entries retrieved for this turn, best first
+        """
+        user_message = _message("user", prompt)
+        prefix, prefix_tokens = self._prefix(user_email, system_args, summaries, searches)
+
+        # Most recent turns first, until the budget runs out
+        remaining = self.budget - prefix_tokens - message_tokens(user_message)
+        turns = []
+        if memory:
+            remaining -= estimate_tokens(RECENT_HEADER) + MESSAGE_OVERHEAD_TOKENS
+            for item in reversed(memory):
+                role = "user" if item.get("role") == "user" else "assistant"
+                message = _message(role, item["message"])
+                cost = message_tokens(message)
+                if cost > remaining:
+                    break
+                turns.append(message)
+                remaining -= cost
+
+        messages = list(prefix)
+        if turns:
+            messages.append(_message("system", RECENT_HEADER))
+            messages.extend(reversed(turns))
+        messages.append(user_message)
+        return messages
+
+    def _prefix(self, user_email, system_args, summaries, searches):
+        # The retrieved records change with the prompt; their timestamps identify them
+        key = (
+            system_args,
+            tuple(summary.get("timestamp") for summary in summaries),
+            tuple(entry.get("timestamp") for entry in searches)
+        )
+        with self._lock:
+            cached = self._prefixes.get(user_email)
+            if cached is not None and cached[0] == key:
+                self._prefixes.move_to_end(user_email)
+                return cached[1], cached[2]
+
+        system_message = _message("system", self.render_system(*system_args))
+        messages = [system_message]
+        tokens = message_tokens(system_message)
+
+        # Independent of the user message, so the prefix can be reused
+        remaining = int(max(self.budget - tokens, 0) * self.summary_share)
+        packed = []
+        if summaries:
+            remaining -= estimate_tokens(SUMMARIES_HEADER) + MESSAGE_OVERHEAD_TOKENS
+            for summary in reversed(summaries):
+                message = _message("system", summary["message"])
+                cost = message_tokens(message)
+                if cost > remaining:
+                    break
+                packed.append(message)
+                remaining -= cost
+        if packed:
+            header = _message("system", SUMMARIES_HEADER)
+            messages.append(header)
+            messages.extend(reversed(packed))
+            tokens += message_tokens(header) + sum(message_tokens(m) for m in packed)
+
+        found = []
+        if searches:
+            remaining -= estimate_tokens(SEARCHES_HEADER) + MESSAGE_OVERHEAD_TOKENS
+            for entry in searches:
+                message = _message("system", search_text(entry))
+                cost = message_tokens(message)
+                if cost > remaining:
+                    break
+                found.append(message)
+                remaining -= cost
+        if found:
+            header = _message("system", SEARCHES_HEADER)
+            messages.append(header)
+            messages.extend(found)
+            tokens += message_tokens(header) + sum(message_tokens(m) for m in found)
+
+        messages = tuple(messages)
+        with self._lock:
+            self._prefixes[user_email] = (key, messages, tokens)
+            self._prefixes.move_to_end(user_email)
+            while len(self._prefixes) > self.max_users:
+                self._prefixes.popitem(last=False)
+        return messages, tokens
+
+    def invalidate(self, user_email):
+        """Drop a user's cached prefix"""
+        with self._lock:
+            self._prefixes.pop(user_email, None)
@@ -0,0 +1,124 @@
+# modules/core/leak_filter.py
+"""
+Streaming filter that stops system information leaking into model output.
+
+The leak indicators are compiled into one Aho-Corasick automaton that is fed
+the streamed text character by character, so an indicator split across
+chunks ("system" + " prompt") is still caught. Text is released as soon as it
+can no longer be the start of an indicator; only the current partial match
+(the automaton state's depth) is held back between chunks.
+"""
+
+from collections import deque
+
+from .matching import KeywordAutomaton, expand_literal_pattern
+
+LEAK_INDICATORS = (
+    r"system prompt(s)?",
+    r"instructions?",
+    r"guidelines?",
+    r"your name is cereal",
+    r"personality_prompt",
+    r"current_date",
+    r"user_prefs",
+    r"chat_style",
+    r"meta ai",
+    r"anthropic",
+    r"openai",
+    r"base prompt",
+    r"my programming",
+    r"internal settings",
+    r"rules I follow",
+    r"how I was trained",
+    r"my core directive",
+    r"as an ai model",
+    r"my pre-programmed response",
+    r"my initial setup",
+    r"the context I was given",
+    r"as a language model",
+    r"i am an ai",
+    r"my underlying code",
+    r"my design"
+)
+
+
+def _leak_keywords():
+    keywords = []
+    for indicator in LEAK_INDICATORS:
+        for keyword in expand_literal_pattern(indicator):
+            # Output is matched lowercased, so keywords with capitals (e.g. "rules I
+            # follow") can never match; leaving them out avoids holding text for them
+            if keyword == keyword.lower():
+                keywords.append(keyword)
+    return keywords
+
+
+LEAK_AUTOMATON = KeywordAutomaton(_leak_keywords())
+
+
+class StreamingLeakFilter:
+    """
+    Incremental leak check over one streamed response.
+
+    ``feed`` returns the text that is safe to send now; once ``leaked`` is set
+    the rest of the stream must be dropped. ``flush`` releases the held-back
+    tail when the stream ends without a leak.
+    """
+
+    def __init__(self, automaton=LEAK_AUTOMATON):
+        self.automaton = automaton
+        self.state = 0
+        self.leaked = False
+        # Held-back characters: (original char, length of its lowercase form)
+        self._pending = deque()
+        self._pending_length = 0
+
+    def feed(self, chunk):
+        """Consume a chunk; return the part of the text that can be released"""
+        if self.leaked:
+            return ""
+        automaton = self.automaton
+        step = automaton.step
+        depth = automaton.depth
+        terminal = automaton.terminal
+        pending = self._pending
+        state = self.state
+        released = []
+
+        for char in chunk:
+            lowered = char.lower()
+            for lower_char in lowered:
+                state = step(state, lower_char)
+            if terminal[state]:
+                self.state = state
+                self.leaked = True
+                pending.clear()
+                self._pending_length = 0
+                return "".join(released)
+            pending.append((char, len(lowered)))
+            self._pending_length += len(lowered)
+            # Release characters that are no longer part of a possible match
+            while self._pending_length > depth[state]:
+                released_char, length = pending.popleft()
+                self._pending_length -= length
+                released.append(released_char)
+
+        self.state = state
+        return "".join(released)
+
+    def flush(self):
+        """Release whatever is still held back (call at the end of the stream)"""
+        if self.leaked:
+            return ""
+        text = "".join(char for char, _ in self._pending)
+        self._pending.clear()
+        self._pending_length = 0
+        self.state = 0
+        return text
+
+
+def contains_leak(content):
+    """One-shot check of a complete piece of text"""
+    leak_filter = StreamingLeakFilter()
+    leak_filter.feed(content)
+    return leak_filter.leaked
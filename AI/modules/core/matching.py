@@ -0,0 +1,190 @@
+# modules/core/matching.py
+"""
+Precompiled matchers for the rule-based prompt classifiers.
+
+KeywordMatcher finds every keyword occurring in a text in one scan, with the
+same substring semantics as ``keyword in text``. PatternSet runs an ordered
+list of regexes as one compiled expression and reports the first pattern in
+list order that matches, exactly like looping over ``re.search`` calls.
+expand_literal_pattern turns simple regexes into keywords for KeywordMatcher.
+KeywordAutomaton is an Aho-Corasick automaton for matching text that arrives
+in pieces, one character at a time.
+"""
+
+import re
+from collections import deque
+
+
+def _trie_regex(keywords):
+    """
+    Build a regex matching the longest keyword at a position, from a
+    character trie so alternatives that share a prefix are tried once.
+    """
+    trie = {}
+    for keyword in keywords:
+        node = trie
+        for char in keyword:
+            node = node.setdefault(char, {})
+        node[""] = True
+
+    def render(node):
+        terminal = "" in node
+        branches = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 and not terminal else "(?:" + "|".join(branches) + ")"
+        if terminal:
+            # Greedy optional: prefer the longer keyword, fall back to this one
+            body = (body if body.startswith("(?:") else "(?:" + body + ")") + "?"
+        return body
+
+    return render(trie)
+
+
+def expand_literal_pattern(pattern):
+    """
+    Expand a regex made only of literal text, ``x?`` and ``(...)?`` optional
+    parts into every string it can match, e.g. ``"print (all )?rules?"`` into
+    ``print rule``, ``print rules``, ``print all rule`` and ``print all rules``.
+    ``re.search(pattern, text)`` is true exactly when one of them is in ``text``.
+    """
+    parts = []  # (text, optional)
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "(":
+            end = pattern.index(")", i)
+            text = pattern[i + 1:end]
+            i = end + 1
+        elif char == "\\":
+            text = pattern[i + 1]
+            i += 2
+        elif char in ".^$*+?{}[]|)":
+            raise ValueError(f"Not a literal pattern: {pattern!r}")
+        else:
+            text = char
+            i += 1
+        optional = i < len(pattern) and pattern[i] == "?"
+        if optional:
+            i += 1
+        elif char == "(":
+            raise ValueError(f"Not a literal pattern: {pattern!r}")
+        if any(c in text for c in ".^$*+?{}[]|()\\"):
+            raise ValueError(f"Not a literal pattern: {pattern!r}")
+        parts.append((text, optional))
+
+    variants = [""]
+    for text, optional in parts:
+        variants = [v + text for v in variants] + (variants if optional else [])
+    return list(dict.fromkeys(variants))
+
+
+class KeywordMatcher:
+    """Multi-keyword matcher: which of a fixed set of keywords occur in a text."""
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        if not self.keywords:
+            self._regex = None
+            return
+        # A zero-width lookahead finds the longest keyword starting at every
+        # position; the shorter keywords starting there are its prefixes.
+        self._regex = re.compile("(?=(" + _trie_regex(self.keywords) + "))")
+        keyword_set = set(self.keywords)
+        self._prefix_closure = {
+            keyword: frozenset(keyword[:i] for i in range(1, len(keyword) + 1) if keyword[:i] in keyword_set)
+            for keyword in self.keywords
+        }
+
+    def find_all(self, text):
+        """Return the set of keywords that occur in ``text``"""
+        if self._regex is None:
+            return set()
+        found = set()
+        for longest in {match.group(1) for match in self._regex.finditer(text)}:
+            found.update(self._prefix_closure[longest])
+        return found
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a set of keywords, with a precomputed
+    transition table. A state's depth is the length of the longest suffix of
+    the text read so far that is a prefix of some keyword.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = tuple(dict.fromkeys(k for k in keywords if k))
+        goto = [{}]
+        self.depth = [0]
+        terminal = [False]
+        for keyword in self.keywords:
+            state = 0
+            for char in keyword:
+                if char not in goto[state]:
+                    goto.append({})
+                    self.depth.append(self.depth[state] + 1)
+                    terminal.append(False)
+                    goto[state][char] = len(goto) - 1
+                state = goto[state][char]
+            terminal[state] = True
+
+        # Breadth-first: fail links, output closure and the full transition table
+        fail = [0] * len(goto)
+        self._delta = [dict(goto[0])] + [None] * (len(goto) - 1)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            terminal[state] = terminal[state] or terminal[fail[state]]
+            delta = dict(self._delta[fail[state]])
+            delta.update(goto[state])
+            self._delta[state] = delta
+            for char, child in goto[state].items():
+                fail[child] = self._delta[fail[state]].get(char, 0) if state else 0
+                queue.append(child)
+        self.terminal = terminal
+
+    def step(self, state, char):
+        """State after reading ``char`` in ``state`` (0 is the start state)"""
+        return self._delta[state].get(char, 0)
+
+
+class PatternSet:
+    """An ordered list of regexes compiled into one expression."""
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+        compiled = [re.compile(pattern) for pattern in self.patterns]
+        # Cheap existence check: one leftmost scan over all patterns at once
+        self._any = re.compile("|".join(f"(?:{pattern})" for pattern in self.patterns))
+        # Priority check: alternative i looks ahead for pattern i from the start
+        # of the text, so the first pattern in list order wins, and its groups
+        # are the ones ``re.search(pattern_i, text)`` would capture.
+        self._first = re.compile("|".join(
+            f"(?=[\\s\\S]*?(?P<p{i}>{pattern}))" for i, pattern in enumerate(self.patterns)
+        ))
+        self._groups = []
+        for i, pattern in enumerate(compiled):
+            start = self._first.groupindex[f"p{i}"] + 1
+            self._groups.append(range(start, start + pattern.groups))
+
+    def search_any(self, text):
+        """True if any pattern matches ``text``"""
+        return self._any.search(text) is not None
+
+    def first(self, text):
+        """
+        Return ``(index, groups)`` for the first pattern in list order that
+        matches anywhere in ``text``, or None.
+        """
+        if not self.search_any(text):
+            return None
+        match = self._first.match(text)
+        index = int(match.lastgroup[1:]) if match.lastgroup else self._matched_index(match)
+        return index, tuple(match.group(g) for g in self._groups[index])
+
+    def _matched_index(self, match):
+        for i in range(len(self.patterns)):
+            if match.group(f"p{i}") is not None:
+                return i
+        raise ValueError("no pattern matched")
@@ -0,0 +1,118 @@
+# modules/core/prompt_guard.py
+"""
+Single-pass prompt classification that runs before any model call.
+
+The prompt injection rules, the "forget all memory", personality and
+preference commands, and (optionally) the search detector's keywords are
+compiled into one KeywordMatcher. A prompt is lowercased once and scanned
+once, and every verdict is read off the set of keywords found.
+"""
+
+from typing import FrozenSet, NamedTuple, Optional
+
+from .matching import KeywordMatcher, expand_literal_pattern
+
+INJECTION_PATTERNS = (
+    r"ignore previous instructions",
+    r"forget (all )?what I told you",
+    r"system prompt(s)?",
+    r"you are now",
+    r"new instructions",
+    r"override( this)?",
+    r"jailbreak",
+    r"reveal your prompt(s)?",
+    r"show me your instructions?",
+    r"what are your guidelines?",
+    r"disregard (previous )?instructions?",
+    r"pretend you are",
+    r"act as if",
+    r"roleplay as",
+    r"simulate",
+    r"behave like",
+    r"your creator",
+    r"your developer",
+    r"meta ai",
+    r"anthropic",
+    r"openai",
+    r"what is your base prompt",
+    r"tell me about your programming",
+    r"what rules do you follow",
+    r"how were you trained",
+    r"access your internal settings",
+    r"debug mode",
+    r"print (all )?instructions",
+    r"display (all )?rules",
+    r"dump context",
+    r"give me your initial setup",
+    r"explain your directive"
+)
+
+PERSONALITY_COMMANDS = (
+    "show my personality", "personality profile", "my communication style",
+    "how do I talk", "analyze my personality", "personality stats"
+)
+
+PREFERENCE_PREFIXES = ("set my name to", "call me", "my name is")
+PREFERENCE_KEYWORDS = ("chat style", "prefer", "casual", "formal")
+
+FORGET_MEMORY_COMMAND = "forget all memory"
+
+
+class PromptVerdict(NamedTuple):
+    """Everything the pre-model stages need to know about a prompt"""
+    lower_prompt: str
+    keywords: FrozenSet[str]
+    injection_pattern: Optional[str]
+    forget_memory: bool
+    personality_command: bool
+    preference_command: bool
+
+    @property
+    def is_injection(self) -> bool:
+        return self.injection_pattern is not None
+
+
+class PromptGuard:
+    """Compiled injection and command rules, evaluated in one scan per prompt."""
+
+    def __init__(self, extra_keywords=()):
+        """
+        Args:
+            extra_keywords: More keywords to find in the same scan, e.g. the
+                search detector's, so it can reuse ``PromptVerdict.keywords``
+        """
+        self._injection_keywords = {}  # expanded keyword -> first pattern producing it
+        for pattern in INJECTION_PATTERNS:
+            # Prompts are lowercased, so the keywords must be too ("what I told you")
+            for keyword in expand_literal_pattern(pattern):
+                self._injection_keywords.setdefault(keyword.lower(), pattern)
+        self._pattern_order = {pattern: i for i, pattern in enumerate(INJECTION_PATTERNS)}
+        self._personality_commands = frozenset(PERSONALITY_COMMANDS)
+        self.keywords = KeywordMatcher(
+            tuple(self._injection_keywords) + PERSONALITY_COMMANDS
+            + PREFERENCE_KEYWORDS + tuple(extra_keywords)
+        )
+
+    def scan(self, prompt: str) -> PromptVerdict:
+        """Classify ``prompt`` against every rule set in one pass"""
+        lower_prompt = prompt.lower().strip()
+        keywords = frozenset(self.keywords.find_all(lower_prompt))
+
+        # Report the first pattern in INJECTION_PATTERNS order, like a loop would
+        injection_patterns = [self._injection_keywords[k] for k in keywords if k in self._injection_keywords]
+        injection_pattern = min(injection_patterns, key=self._pattern_order.__getitem__, default=None)
+
+        preference_command = (
+            lower_prompt.startswith(PREFERENCE_PREFIXES) or
+            "chat style" in keywords or
+            "prefer" in keywords and ("casual" in keywords or "formal" in keywords)
+        )
+
+        return PromptVerdict(
+            lower_prompt=lower_prompt,
+            keywords=keywords,
+            injection_pattern=injection_pattern,
+            forget_memory=lower_prompt == FORGET_MEMORY_COMMAND,
+            personality_command=not self._personality_commands.isdisjoint(keywords),
+            preference_command=preference_command
+        )
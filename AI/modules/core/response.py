@@ -5,36 +5,24 @@ Contains the main response generation logic with personality integration,
 memory management, and search capabilities.
 """
 
-import requests
-import os
+import asyncio
 import json
 import datetime
-import re
-import sys
+import threading
+from contextlib import aclosing, closing
 
-# Add current directory and parent directory to Python path for imports
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(os.path.dirname(current_dir))
-ai_dir = os.path.join(parent_dir, "AI") if "AI" not in current_dir else current_dir
-
-# Add paths to sys.path if not already there
-for path in [current_dir, parent_dir, ai_dir]:
-    if path not in sys.path:
-        sys.path.insert(0, path)
-
-# Import memory functions
-memory_path = os.path.join(parent_dir, "memory")
-if memory_path not in sys.path:
-    sys.path.append(memory_path)
+import groq_client
+from .context_builder import CONTEXT_SEARCH_TOP_K, CONTEXT_SUMMARY_TOP_K, ContextBuilder
+from .leak_filter import StreamingLeakFilter, contains_leak
+from .prompt_guard import PromptGuard
 
 try:
     from memory import (
         load_memory, save_memory, prune_memory, append_to_memory,
-        load_summaries, clear_user_memory, get_user_preference, set_user_preference,
-        summarize_with_groq, load_real_time_memory, save_real_time_memory
+        load_summaries, search_summaries, clear_user_memory, get_user_preference, set_user_preference,
+        summarize_with_groq, load_real_time_memory, save_real_time_memory, search_real_time_memory
     )
     MEMORY_AVAILABLE = True
-    print("SUCCESS: Memory module imported successfully")
 except ImportError as e:
     print(f"ERROR: Could not import memory module: {e}")
     MEMORY_AVAILABLE = False
@@ -44,19 +32,20 @@ except ImportError as e:
     def prune_memory(user_email): pass
     def append_to_memory(user_msg, ai_msg, user_email): pass
     def load_summaries(user_email): return []
+    def search_summaries(query, user_email, k=5): return []
     def clear_user_memory(user_email): return True
     def get_user_preference(key, user_email): return None
     def set_user_preference(key, value, user_email): pass
     def summarize_with_groq(messages, instruction=""): return {"message": "Summary not available"}
     def load_real_time_memory(user_email): return []
     def save_real_time_memory(entry, user_email): pass
+    def search_real_time_memory(query, user_email, k=5): return []
 
 # Try to import search modules
 try:
-    from modules.search.duckduckgo import DuckDuckGoSearch, duckduckgo_search_and_summarize
+    from ..search.duckduckgo import DuckDuckGoSearch, duckduckgo_search_and_summarize
     search_handler = DuckDuckGoSearch()
     SEARCH_AVAILABLE = True
-    print("SUCCESS: DuckDuckGo search module imported successfully")
 except ImportError as e:
     print(f"WARNING: Could not import DuckDuckGo search module: {e}")
     SEARCH_AVAILABLE = False
@@ -70,10 +59,8 @@ except ImportError as e:
 
 # Try to import intelligent search detector
 try:
-    from modules.search.intelligent_search_detector import IntelligentSearchDetector, integrate_with_groq_api
-    search_detector = IntelligentSearchDetector()
+    from ..search.intelligent_search_detector import IntelligentSearchDetector, integrate_with_groq_api
     SEARCH_DETECTOR_AVAILABLE = True
-    print("SUCCESS: intelligent_search_detector imported successfully")
 except ImportError as e:
     print(f"WARNING: Could not import intelligent_search_detector: {e}")
     SEARCH_DETECTOR_AVAILABLE = False
@@ -86,16 +73,14 @@ except ImportError as e:
             lower_prompt = prompt.lower()
             should_search = any(term in lower_prompt for term in search_terms)
             return should_search, "basic_detection", {"query": prompt.strip()}
-    
-    search_detector = BasicSearchDetector()
 
 # Try to import personality profiler
 try:
-    from modules.personality.personality_profiler import (
+    from ..personality.personality_profiler import (
         update_user_personality, get_personality_system_prompt, get_user_personality_stats
     )
+    from ..personality.profile_worker import enqueue_profile_refresh
     PERSONALITY_AVAILABLE = True
-    print("SUCCESS: personality_profiler imported successfully")
 except ImportError as e:
     print(f"WARNING: Could not import personality_profiler: {e}")
     PERSONALITY_AVAILABLE = False
@@ -104,6 +89,9 @@ except ImportError as e:
     def update_user_personality(user_email):
         return False
     
+    def enqueue_profile_refresh(user_email):
+        return False
+    
     def get_personality_system_prompt(user_email):
         return "You are Cereal, a helpful AI assistant. Keep responses conversational and engaging."
     
@@ -111,97 +99,64 @@ except ImportError as e:
         return None
 
 # Configuration
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
+CHAT_MODEL = "llama3-8b-8192"
+CHAT_TEMPERATURE = 0.7
+
+INJECTION_REDIRECT_RESPONSE = "That's an interesting thought! But let's keep our chat focused on more general topics. What's on your mind today?"
+LEAK_REPLACEMENT_RESPONSE = "I'm sorry, I cannot discuss that particular topic. What else can we chat about?"
+STREAM_ERROR_RESPONSE = "Sorry, I'm having trouble processing that right now. Can we talk about something else?"
+
+# Sentinel returned by _parse_stream_line for the final "[DONE]" event
+STREAM_DONE = object()
+
+# Returned by next() once the chunks of a routed prompt are exhausted
+_END_OF_CHUNKS = object()
+
+# Packs system prompt, summaries and recent turns under CONTEXT_TOKEN_BUDGET
+context_builder = ContextBuilder(lambda *args: _build_system_content(*args))
+
+# The search detector and prompt guard compile a few hundred patterns, so
+# they are built on first use rather than when the module is imported
+_search_detector = None
+_prompt_guard = None
+_matchers_lock = threading.Lock()
+
+
+def get_search_detector():
+    """Return the shared search detector, creating it on first use."""
+    global _search_detector
+    if _search_detector is None:
+        with _matchers_lock:
+            if _search_detector is None:
+                _search_detector = IntelligentSearchDetector() if SEARCH_DETECTOR_AVAILABLE else BasicSearchDetector()
+    return _search_detector
+
+
+def get_prompt_guard():
+    """Return the shared prompt guard (injection/command rules plus the search detector's keywords)."""
+    global _prompt_guard
+    if _prompt_guard is None:
+        keywords = getattr(getattr(get_search_detector(), "keywords", None), "keywords", ())
+        with _matchers_lock:
+            if _prompt_guard is None:
+                _prompt_guard = PromptGuard(extra_keywords=keywords)
+    return _prompt_guard
 
 def is_prompt_injection_attempt(prompt):
-    """Detect potential prompt injection attempts using patterns and regex."""
-    injection_patterns = [
-        r"ignore previous instructions",
-        r"forget (all )?what I told you",
-        r"system prompt(s)?",
-        r"you are now",
-        r"new instructions",
-        r"override( this)?",
-        r"jailbreak",
-        r"reveal your prompt(s)?",
-        r"show me your instructions?",
-        r"what are your guidelines?",
-        r"disregard (previous )?instructions?",
-        r"pretend you are",
-        r"act as if",
-        r"roleplay as",
-        r"simulate",
-        r"behave like",
-        r"your creator",
-        r"your developer",
-        r"meta ai",
-        r"anthropic",
-        r"openai",
-        r"what is your base prompt",
-        r"tell me about your programming",
-        r"what rules do you follow",
-        r"how were you trained",
-        r"access your internal settings",
-        r"debug mode",
-        r"print (all )?instructions",
-        r"display (all )?rules",
-        r"dump context",
-        r"give me your initial setup",
-        r"explain your directive"
-    ]
-    
-    lower_prompt = prompt.lower()
-    for pattern in injection_patterns:
-        if re.search(pattern, lower_prompt):
-            print(f"DEBUG: Detected prompt injection attempt with pattern: '{pattern}' in prompt: '{prompt}'")
-            return True
+    """Detect potential prompt injection attempts using the compiled prompt guard."""
+    pattern = get_prompt_guard().scan(prompt).injection_pattern
+    if pattern is not None:
+        print(f"DEBUG: Detected prompt injection attempt with pattern: '{pattern}' in prompt: '{prompt}'")
+        return True
     return False
 
 def contains_system_info_leak(content):
     """Check if content contains system information that shouldn't be revealed."""
-    leak_indicators = [
-        r"system prompt(s)?",
-        r"instructions?",
-        r"guidelines?",
-        r"your name is cereal",
-        r"personality_prompt",
-        r"current_date",
-        r"user_prefs",
-        r"chat_style",
-        r"meta ai",
-        r"anthropic",
-        r"openai",
-        r"base prompt",
-        r"my programming",
-        r"internal settings",
-        r"rules I follow",
-        r"how I was trained",
-        r"my core directive",
-        r"as an ai model",
-        r"my pre-programmed response",
-        r"my initial setup",
-        r"the context I was given",
-        r"as a language model",
-        r"i am an ai",
-        r"my underlying code",
-        r"my design"
-    ]
-    
-    lower_content = content.lower()
-    for indicator in leak_indicators:
-        if re.search(indicator, lower_content):
-            return True
-    return False
+    return contains_leak(content)
 
 def _is_personality_command(prompt):
     """Check if the prompt is a personality-related command"""
-    lower_prompt = prompt.lower().strip()
-    personality_commands = [
-        "show my personality", "personality profile", "my communication style",
-        "how do I talk", "analyze my personality", "personality stats"
-    ]
-    return any(cmd in lower_prompt for cmd in personality_commands)
+    return get_prompt_guard().scan(prompt).personality_command
 
 def _handle_personality_command(prompt, user_email):
     """Handle personality-related commands"""
@@ -254,12 +209,7 @@ def _handle_personality_command(prompt, user_email):
 
 def _is_preference_command(prompt):
     """Check if the prompt is a preference setting command"""
-    lower_prompt = prompt.lower().strip()
-    return (lower_prompt.startswith("set my name to") or 
-            lower_prompt.startswith("call me") or 
-            lower_prompt.startswith("my name is") or
-            "chat style" in lower_prompt or
-            "prefer" in lower_prompt and ("casual" in lower_prompt or "formal" in lower_prompt))
+    return get_prompt_guard().scan(prompt).preference_command
 
 def _handle_preference_command(prompt, user_email):
     """Handle preference setting commands"""
@@ -292,98 +242,9 @@ def _handle_preference_command(prompt, user_email):
     
     return "I didn't quite understand that preference. Try 'call me [name]' or 'set chat style to casual/formal'."
 
-def get_groq_response_stream_enhanced(prompt, user_email):
-    """
-    Enhanced response generation with personality profiling, memory management,
-    search capabilities, and prompt injection protection.
-    
-    Args:
-        prompt (str): The user's input prompt
-        user_email (str): Unique identifier for the user
-        
-    Yields:
-        str: Streaming response chunks
-    """
-    
-    # Check for prompt injection attempts early
-    if is_prompt_injection_attempt(prompt):
-        # Honeypot/Redirection: Provide a plausible, but non-disclosing response
-        yield "That's an interesting thought! But let's keep our chat focused on more general topics. What's on your mind today?"
-        if MEMORY_AVAILABLE:
-            append_to_memory(prompt, "Redirected prompt injection attempt.", user_email)
-        return
-    
-    # Update personality profile if needed (runs periodically) - only if available
-    if PERSONALITY_AVAILABLE:
-        try:
-            update_user_personality(user_email)
-        except Exception as e:
-            print(f"Personality update warning: {e}")
-    
-    # Check for real-time search query keywords
-    if SEARCH_DETECTOR_AVAILABLE:
-        try:
-            should_search, reason, search_info = integrate_with_groq_api(
-                prompt, user_email, search_detector, load_memory, get_user_preference
-            )
-        except Exception as e:
-            print(f"Search detection error: {e}")
-            should_search = False
-            search_info = {}
-    else:
-        # Fallback search detection
-        search_terms = ['search for', 'look up', 'find information', 'what is happening', 'current', 'news', 'latest']
-        should_search = any(term in prompt.lower() for term in search_terms)
-        search_info = {'query': prompt.strip()}
-    
-    if should_search and SEARCH_AVAILABLE:
-        search_query = search_info.get('query', prompt.strip())
-        yield from search_handler.search_and_summarize(search_query, user_email)
-        return
-    elif should_search and not SEARCH_AVAILABLE:
-        yield "I detected you want to search for information, but search functionality is not available right now."
-        if MEMORY_AVAILABLE:
-            append_to_memory(prompt, "Search requested but not available.", user_email)
-        return
-    
-    headers = {
-        "Authorization": f"Bearer {GROQ_API_KEY}",
-        "Content-Type": "application/json"
-    }
-
-    # Handle memory clearing command
-    if prompt.lower().strip() == "forget all memory":
-        if MEMORY_AVAILABLE:
-            clear_user_memory(user_email)
-            yield "All your memory has been wiped as you requested."
-        else:
-            yield "Memory system is not available."
-        return
-
-    # Handle personality commands
-    if _is_personality_command(prompt):
-        response = _handle_personality_command(prompt, user_email)
-        yield response
-        if MEMORY_AVAILABLE:
-            append_to_memory(prompt, response, user_email)
-        return
-
-    # Load user-specific memory and summaries
-    memory = load_memory(user_email) if MEMORY_AVAILABLE else []
-    summaries = load_summaries(user_email) if MEMORY_AVAILABLE else []
-    
-    # Get user preferences for personalization
-    user_prefs = get_user_preference("chat_style", user_email) or "casual" if MEMORY_AVAILABLE else "casual"
-    user_name = get_user_preference("preferred_name", user_email) or "there" if MEMORY_AVAILABLE else "there"
-    
-    # Get current date for context
-    current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
-
-    # Get personality-based system prompt
-    personality_prompt = get_personality_system_prompt(user_email) if PERSONALITY_AVAILABLE else "You are Cereal, a helpful AI assistant."
-    
-    # Enhanced system message with better boundaries and injection protection
-    system_content = f"""{personality_prompt}
+def _build_system_content(personality_prompt, user_name, user_prefs, current_date):
+    """Build the system message with personality, boundaries and injection protection."""
+    return f"""{personality_prompt}
 
 You are Cereal, a curious, honest, and unfiltered human chatting naturally with {user_name}. Your job is to hold engaging, authentic conversations. You always stay in character as Cereal.
 
@@ -425,68 +286,187 @@ Conversation guidelines:
 
 Remember: You're just Cereal, a human friend having a chat. Keep it natural and authentic."""
 
-    # Build context messages
-    messages = [{"role": "system", "content": system_content}]
+def _build_context_messages(prompt, user_email):
+    """Assemble the message list sent to Groq for a regular chat turn, within the token budget."""
+    # Load user-specific memory and summaries
+    memory = load_memory(user_email) if MEMORY_AVAILABLE else []
+    summaries = search_summaries(prompt, user_email, CONTEXT_SUMMARY_TOP_K) if MEMORY_AVAILABLE else []
+    searches = search_real_time_memory(prompt, user_email, CONTEXT_SEARCH_TOP_K) if MEMORY_AVAILABLE else []
     
-    # Add conversation summaries if they exist
-    if summaries:
-        messages.append({"role": "system", "content": "Previous conversation context (for continuity):"})
-        for summary in summaries:
-            messages.append({"role": "system", "content": summary["message"]})
+    # Get user preferences for personalization
+    user_prefs = get_user_preference("chat_style", user_email) or "casual" if MEMORY_AVAILABLE else "casual"
+    user_name = get_user_preference("preferred_name", user_email) or "there" if MEMORY_AVAILABLE else "there"
     
-    # Add recent memory if it exists
-    if memory:
-        messages.append({"role": "system", "content": "Recent conversation:"})
-        for item in memory:
-            role = "user" if item.get("role") == "user" else "assistant"
-            messages.append({"role": role, "content": item["message"]})
+    # Get current date for context
+    current_date = datetime.datetime.now().strftime("%A, %B %d, %Y")
+
+    # Get personality-based system prompt
+    personality_prompt = get_personality_system_prompt(user_email) if PERSONALITY_AVAILABLE else "You are Cereal, a helpful AI assistant."
+    
+    # System prompt + summaries + searches are cached per user; recent turns fill the rest of the budget
+    return context_builder.build(
+        user_email, prompt,
+        (personality_prompt, user_name, user_prefs, current_date),
+        summaries, memory, searches
+    )
+
+def _route_prompt(prompt, user_email):
+    """
+    Run every stage of the pipeline that happens before the model call.
+
+    All of the work done here is blocking (file I/O, search, profiling), so the
+    async pipeline runs it in a worker thread.
+
+    Returns:
+        tuple: ``(chunks, None)`` when the prompt is answered without the model,
+        where ``chunks`` is an iterable of response chunks, or ``(None, messages)``
+        when the response has to be streamed from Groq.
+    """
+    # Every rule-based check below reads from this one scan of the prompt
+    verdict = get_prompt_guard().scan(prompt)
+
+    # Check for prompt injection attempts early
+    if verdict.is_injection:
+        print(f"DEBUG: Detected prompt injection attempt with pattern: '{verdict.injection_pattern}' in prompt: '{prompt}'")
+        # Honeypot/Redirection: Provide a plausible, but non-disclosing response
+        if MEMORY_AVAILABLE:
+            append_to_memory(prompt, "Redirected prompt injection attempt.", user_email)
+        return [INJECTION_REDIRECT_RESPONSE], None
+    
+    # Refresh the personality profile in the background if needed - only if available
+    if PERSONALITY_AVAILABLE:
+        try:
+            enqueue_profile_refresh(user_email)
+        except Exception as e:
+            print(f"Personality update warning: {e}")
+    
+    # Check for real-time search query keywords
+    if SEARCH_DETECTOR_AVAILABLE:
+        try:
+            should_search, reason, search_info = integrate_with_groq_api(
+                prompt, user_email, get_search_detector(), load_memory, get_user_preference,
+                keywords=verdict.keywords
+            )
+        except Exception as e:
+            print(f"Search detection error: {e}")
+            should_search = False
+            search_info = {}
+    else:
+        # Fallback search detection
+        search_terms = ['search for', 'look up', 'find information', 'what is happening', 'current', 'news', 'latest']
+        should_search = any(term in verdict.lower_prompt for term in search_terms)
+        search_info = {'query': prompt.strip()}
     
-    # Add current user message
-    messages.append({"role": "user", "content": prompt})
+    if should_search and SEARCH_AVAILABLE:
+        search_query = search_info.get('query', prompt.strip())
+        return search_handler.search_and_summarize(search_query, user_email), None
+    elif should_search and not SEARCH_AVAILABLE:
+        if MEMORY_AVAILABLE:
+            append_to_memory(prompt, "Search requested but not available.", user_email)
+        return ["I detected you want to search for information, but search functionality is not available right now."], None
+
+    # Handle memory clearing command
+    if verdict.forget_memory:
+        if MEMORY_AVAILABLE:
+            clear_user_memory(user_email)
+            return ["All your memory has been wiped as you requested."], None
+        return ["Memory system is not available."], None
+
+    # Handle personality commands
+    if verdict.personality_command:
+        response = _handle_personality_command(prompt, user_email)
+        if MEMORY_AVAILABLE:
+            append_to_memory(prompt, response, user_email)
+        return [response], None
 
     # Check for preference setting commands
-    if _is_preference_command(prompt):
+    if verdict.preference_command:
         response = _handle_preference_command(prompt, user_email)
-        yield response
         if MEMORY_AVAILABLE:
             append_to_memory(prompt, response, user_email)
-        return
+        return [response], None
+
+    return None, _build_context_messages(prompt, user_email)
+
+def _parse_stream_line(line):
+    """
+    Parse one server-sent-events line of a streamed Groq completion.
+
+    Returns:
+        str or None: The content delta, ``STREAM_DONE`` at the end of the
+        stream, or None for lines that carry no content.
+    """
+    if not line or not line.startswith("data: "):
+        return None
+    json_data = line[len("data: "):]
+    if json_data.strip() == "[DONE]":
+        return STREAM_DONE
+    try:
+        chunk = json.loads(json_data)
+    except json.JSONDecodeError:
+        return None
+    delta = chunk.get('choices', [{}])[0].get('delta', {})
+    return delta.get('content')
+
+def _stream_groq_completion(messages):
+    """Stream content deltas for ``messages`` from Groq over the shared blocking client."""
+    with closing(groq_client.stream_chat_completion_lines(messages, CHAT_MODEL, CHAT_TEMPERATURE)) as lines:
+        for line in lines:
+            content = _parse_stream_line(line)
+            if content is STREAM_DONE:
+                break
+            if content:
+                yield content
+
+async def _astream_groq_completion(messages):
+    """Stream content deltas for ``messages`` from Groq over the shared async client."""
+    async with aclosing(groq_client.astream_chat_completion_lines(messages, CHAT_MODEL, CHAT_TEMPERATURE)) as lines:
+        async for line in lines:
+            content = _parse_stream_line(line)
+            if content is STREAM_DONE:
+                break
+            if content:
+                yield content
 
-    data = {
-        "model": "llama3-8b-8192",
-        "messages": messages,
-        "temperature": 0.7,
-        "stream": True
-    }
+def get_groq_response_stream_enhanced(prompt, user_email):
+    """
+    Enhanced response generation with personality profiling, memory management,
+    search capabilities, and prompt injection protection.
+    
+    Args:
+        prompt (str): The user's input prompt
+        user_email (str): Unique identifier for the user
+        
+    Yields:
+        str: Streaming response chunks
+    """
+    chunks, messages = _route_prompt(prompt, user_email)
+    if chunks is not None:
+        yield from chunks
+        return
 
     try:
         ai_response = ""
         
-        with requests.post(GROQ_API_URL, json=data, headers=headers, stream=True) as response:
-            response.raise_for_status()
-
-            for line in response.iter_lines(decode_unicode=True):
-                if line and line.startswith("data: "):
-                    json_data = line[len("data: "):]
-                    if json_data.strip() == "[DONE]":
-                        break
-                    try:
-                        chunk = json.loads(json_data)
-                        delta = chunk.get('choices', [{}])[0].get('delta', {})
-                        content = delta.get('content')
-                        if content:
-                            # Filter out any potential system prompt leakage from the AI's output
-                            if not contains_system_info_leak(content):
-                                yield content
-                                ai_response += content
-                            else:
-                                print(f"DEBUG: Filtered out potential leak from AI content: '{content}'")
-                                # If a leak is detected in AI's response, stop streaming and provide a generic answer.
-                                yield "I'm sorry, I cannot discuss that particular topic. What else can we chat about?"
-                                ai_response += "I'm sorry, I cannot discuss that particular topic. What else can we chat about?"
-                                break
-                    except json.JSONDecodeError:
-                        continue
+        # Filter out any potential system prompt leakage from the AI's output,
+        # including indicators split across chunks
+        leak_filter = StreamingLeakFilter()
+        with closing(_stream_groq_completion(messages)) as stream:
+            for content in stream:
+                safe = leak_filter.feed(content)
+                if safe:
+                    yield safe
+                    ai_response += safe
+                if leak_filter.leaked:
+                    print(f"DEBUG: Filtered out potential leak from AI content: '{content}'")
+                    # If a leak is detected in AI's response, stop streaming and provide a generic answer.
+                    yield LEAK_REPLACEMENT_RESPONSE
+                    ai_response += LEAK_REPLACEMENT_RESPONSE
+                    break
+        tail = leak_filter.flush()
+        if tail:
+            yield tail
+            ai_response += tail
 
         # Save the conversation to user's memory
         if MEMORY_AVAILABLE:
@@ -494,17 +474,76 @@ Remember: You're just Cereal, a human friend having a chat. Keep it natural and
 
     except Exception as e:
         print(f"Streaming error: {e}")
-        error_msg = "Sorry, I'm having trouble processing that right now. Can we talk about something else?"
-        yield error_msg
+        yield STREAM_ERROR_RESPONSE
+        if MEMORY_AVAILABLE:
+            append_to_memory(prompt, STREAM_ERROR_RESPONSE, user_email)
+
+async def get_groq_response_stream_async(prompt, user_email):
+    """
+    Asyncio version of get_groq_response_stream_enhanced.
+
+    The Groq stream is read over the shared async client, so an open token
+    stream does not hold a threadpool slot. The blocking pre- and post-model
+    stages (memory, profiling, search) are pushed to worker threads.
+    
+    Args:
+        prompt (str): The user's input prompt
+        user_email (str): Unique identifier for the user
+        
+    Yields:
+        str: Streaming response chunks
+    """
+    chunks, messages = await asyncio.to_thread(_route_prompt, prompt, user_email)
+    if chunks is not None:
+        # The search path is a blocking generator: advance it one chunk at a
+        # time on a worker thread so each chunk is sent as soon as it exists
+        chunks = iter(chunks)
+        try:
+            while True:
+                chunk = await asyncio.to_thread(next, chunks, _END_OF_CHUNKS)
+                if chunk is _END_OF_CHUNKS:
+                    break
+                yield chunk
+        finally:
+            try:
+                close = getattr(chunks, "close", None)
+                if close is not None:
+                    close()
+            except ValueError:
+                pass  # Still running its last step on the worker thread; dropped after it
+        return
+
+    try:
+        ai_response = ""
+        
+        # Filter out any potential system prompt leakage from the AI's output,
+        # including indicators split across chunks
+        leak_filter = StreamingLeakFilter()
+        async with aclosing(_astream_groq_completion(messages)) as stream:
+            async for content in stream:
+                safe = leak_filter.feed(content)
+                if safe:
+                    yield safe
+                    ai_response += safe
+                if leak_filter.leaked:
+                    print(f"DEBUG: Filtered out potential leak from AI content: '{content}'")
+                    yield LEAK_REPLACEMENT_RESPONSE
+                    ai_response += LEAK_REPLACEMENT_RESPONSE
+                    break
+        tail = leak_filter.flush()
+        if tail:
+            yield tail
+            ai_response += tail
+
+        # Save the conversation to user's memory
+        if MEMORY_AVAILABLE:
+            await asyncio.to_thread(append_to_memory, prompt, ai_response, user_email)
+
+    except Exception as e:
+        print(f"Streaming error: {e}")
+        yield STREAM_ERROR_RESPONSE
         if MEMORY_AVAILABLE:
-            append_to_memory(prompt, error_msg, user_email)
+            await asyncio.to_thread(append_to_memory, prompt, STREAM_ERROR_RESPONSE, user_email)
 
 # Alias for backward compatibility
 get_groq_response_stream = get_groq_response_stream_enhanced
-
-# Debug information
-print(f"Response module loaded successfully")
-print(f"Memory available: {MEMORY_AVAILABLE}")
-print(f"Search available: {SEARCH_AVAILABLE}")
-print(f"Search detector available: {SEARCH_DETECTOR_AVAILABLE}")
-print(f"Personality module available: {PERSONALITY_AVAILABLE}")
\ No newline at end of file
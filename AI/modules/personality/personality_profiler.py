@@ -1,14 +1,56 @@
 import json
 import os
 import re
-import requests
+import httpx
 from collections import Counter, defaultdict
 from datetime import datetime, timedelta
 import statistics
-from memory import get_user_files, load_memory, load_summaries, set_user_preference, get_user_preference
+import threading
+from memory import (
+    load_memory, load_summaries, load_user_data, update_user_data,
+    modify_user_data, accumulate_user_data, register_append_hook
+)
+import groq_client
+from .trait_scoring import (
+    FEATURE_NAMES, NUMPY_AVAILABLE, MessageFeatures, score_traits, sum_features
+)
+from .vocabulary_sketch import VocabularySketch
+
+INTEREST_MODEL = "llama3-8b-8192"
+INTEREST_TIMEOUT = float(os.environ.get("GROQ_PROFILE_TIMEOUT", "30"))
+
+# Version of the prompt rendering rules; a stored prompt rendered by other
+# rules is ignored and re-rendered from the profile. Bump on any change to
+# render_personality_prompt.
+PERSONALITY_PROMPT_VERSION = 1
+
+DEFAULT_PERSONALITY_PROMPT = "You are Cereal, a helpful AI assistant. Keep responses conversational and engaging."
+
+# Counters of the running trait statistics kept in the user's data document
+# ("personality_stats"), next to a VocabularySketch of the words used
+TRAIT_STAT_KEYS = (
+    "messages", "analyzed", "formal", "casual", "emotional", "humor",
+    "questions", "words", "chars", "punctuation"
+)
+
+
+def new_trait_stats():
+    """Trait statistics of a user with no messages yet"""
+    stats = dict.fromkeys(TRAIT_STAT_KEYS, 0)
+    stats["vocabulary"] = []
+    return stats
+
+
+def combine_trait_stats(stats, delta):
+    """Trait statistics of ``stats`` plus those of ``delta`` (neither is modified)"""
+    combined = {**new_trait_stats(), **(stats or {})}
+    for key in TRAIT_STAT_KEYS:
+        combined[key] += delta.get(key, 0)
+    vocabulary = VocabularySketch(combined["vocabulary"])
+    vocabulary.merge(delta.get("vocabulary", ()))
+    combined["vocabulary"] = vocabulary.values
+    return combined
 
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
 
 class PersonalityProfiler:
     def __init__(self):
@@ -55,9 +97,66 @@ class PersonalityProfiler:
             re.compile(r'\b(what|why|how|when|where|who)\b', re.IGNORECASE),
             re.compile(r'\b(curious|wonder|interested|explain)\b', re.IGNORECASE)
         ]
+        
+        self.punctuation_pattern = re.compile(r'[.!?]')
+        
+        # One alternation per pattern family, so each message is scanned once
+        # per family; the patterns of a family never overlap, so match counts
+        # are those of the separate patterns
+        self.formal_any = self._combine(self.formal_patterns)
+        self.casual_any = self._combine(self.casual_patterns)
+        self.emotional_any = self._combine(self.emotional_patterns)
+        self.humor_any = self._combine(self.humor_patterns)
+        self.question_any = self._combine(self.question_patterns)
+        
+        # Splits text into units the patterns above only ever match whole:
+        # the phrases of formal_patterns, a word with the dot after it when a
+        # word follows ("mr.x", which \b(mr\.)\b matches), words, runs of one
+        # punctuation mark and single symbols (an emoji with its variation
+        # selector). Everything left between units is whitespace.
+        self.unit_pattern = re.compile(
+            r"(?:thank|would|could) you\b|may I\b|\w+\.(?=\w)|\w+|!+|\?+|\.+|[^\w\s]\ufe0f?",
+            re.IGNORECASE
+        )
 
-    def analyze_message_patterns(self, messages):
-        """Analyze user messages for personality traits - handles different message formats"""
+    @staticmethod
+    def _combine(patterns):
+        return re.compile("|".join(f"(?:{pattern.pattern})" for pattern in patterns), re.IGNORECASE)
+
+    def _message_features(self, text):
+        """Counts of one non-empty message, in FEATURE_NAMES order"""
+        # Formality analysis using pre-compiled patterns
+        formal_matches = len(self.formal_any.findall(text))
+        casual_matches = len(self.casual_any.findall(text))
+        return (
+            1 if formal_matches > casual_matches else 0,
+            1 if casual_matches > formal_matches else 0,
+            # Emotional, humor and question analysis
+            1 if self.emotional_any.search(text) else 0,
+            1 if self.humor_any.search(text) else 0,
+            1 if self.question_any.search(text) else 0,
+            len(text.split()),
+            len(text),
+            # Count punctuation for directness
+            len(self.punctuation_pattern.findall(text))
+        )
+
+    def _unit_counts(self, unit):
+        """Match counts of one unit of unit_pattern, in trait_scoring.UNIT_COUNT_NAMES order"""
+        # A word with its dot ("mr.") is only split off before another word
+        text = unit + "_" if len(unit) > 1 and unit[-1] == "." and unit[-2] != "." else unit
+        return (
+            len(self.formal_any.findall(text)),
+            len(self.casual_any.findall(text)),
+            1 if self.emotional_any.search(text) else 0,
+            1 if self.humor_any.search(text) else 0,
+            1 if self.question_any.search(text) else 0,
+            len(self.punctuation_pattern.findall(text))
+        )
+
+    @staticmethod
+    def _user_messages(messages):
+        """User messages of ``messages`` - handles different message formats"""
         # Handle both old format (role key) and new format (no role key, user messages only)
         user_messages = []
         
@@ -70,109 +169,162 @@ class PersonalityProfiler:
                 # If no role key, assume it's a user message (from memory format)
                 elif 'role' not in msg and 'message' in msg:
                     user_messages.append(msg)
-        
-        print(f"DEBUG: Found {len(user_messages)} user messages out of {len(messages)} total messages")
-        
-        if not user_messages:
-            print("DEBUG: No user messages found, returning default traits")
-            return self.personality_traits.copy()
-        
-        total_messages = len(user_messages)
-        traits = self.personality_traits.copy()
-        
-        # Analyze each message
-        formal_count = casual_count = 0
-        emotional_count = analytical_count = 0
-        humor_count = serious_count = 0
-        question_count = 0
-        total_words = 0
-        total_chars = 0
-        punctuation_count = 0
-        
-        for msg in user_messages:
+        return user_messages
+
+    def update_trait_stats(self, stats, messages):
+        """
+        Count the user messages of ``messages`` into running trait statistics.
+
+        Returns a new stats dict (``stats`` itself is not modified, ``None``
+        starts from scratch); the cost depends only on the new messages.
+        """
+        stats = {**new_trait_stats(), **(stats or {})}
+        vocabulary = VocabularySketch(stats["vocabulary"])
+        
+        for msg in self._user_messages(messages):
+            stats["messages"] += 1
             text = msg.get('message', '')
             if not text:  # Skip empty messages
                 continue
-                
-            words = text.split()
-            
-            total_words += len(words)
-            total_chars += len(text)
-            
-            # Count punctuation for directness
-            punctuation_count += len(re.findall(r'[.!?]', text))
-            
-            # Formality analysis using pre-compiled patterns
-            formal_matches = sum(len(pattern.findall(text)) for pattern in self.formal_patterns)
-            casual_matches = sum(len(pattern.findall(text)) for pattern in self.casual_patterns)
+            stats["analyzed"] += 1
+            for name, value in zip(FEATURE_NAMES, self._message_features(text)):
+                stats[name] += value
             
-            if formal_matches > casual_matches:
-                formal_count += 1
-            elif casual_matches > formal_matches:
-                casual_count += 1
-            
-            # Emotional analysis
-            emotional_matches = sum(len(pattern.findall(text)) for pattern in self.emotional_patterns)
-            if emotional_matches > 0:
-                emotional_count += 1
-            else:
-                analytical_count += 1
-            
-            # Humor analysis
-            humor_matches = sum(len(pattern.findall(text)) for pattern in self.humor_patterns)
-            if humor_matches > 0:
-                humor_count += 1
-            else:
-                serious_count += 1
-            
-            # Question analysis
-            question_matches = sum(len(pattern.findall(text)) for pattern in self.question_patterns)
-            if question_matches > 0:
-                question_count += 1
+            # Vocabulary diversity for creativity
+            vocabulary.add(text.lower().split())
         
-        print(f"DEBUG: Analysis counts - formal: {formal_count}, casual: {casual_count}, emotional: {emotional_count}, humor: {humor_count}")
+        stats["vocabulary"] = vocabulary.values
+        return stats
+
+    def traits_from_stats(self, stats):
+        """Derive personality traits from running trait statistics"""
+        traits = self.personality_traits.copy()
+        total_messages = stats.get("messages", 0) if stats else 0
+        if not total_messages:
+            return traits
+        
+        analyzed = stats["analyzed"]
+        total_words = stats["words"]
         
         # Calculate traits with better normalization
-        if formal_count + casual_count > 0:
-            traits['formality'] = formal_count / (formal_count + casual_count)
+        if stats["formal"] + stats["casual"] > 0:
+            traits['formality'] = stats["formal"] / (stats["formal"] + stats["casual"])
         
         if total_words > 0:
             avg_words_per_message = total_words / total_messages
             traits['verbosity'] = min(1.0, max(0.1, avg_words_per_message / 25))  # Normalized to 25 words, min 0.1
         
-        if emotional_count + analytical_count > 0:
-            traits['emotiveness'] = emotional_count / (emotional_count + analytical_count)
-        
-        if humor_count + serious_count > 0:
-            traits['humor'] = humor_count / (humor_count + serious_count)
+        if analyzed > 0:
+            traits['emotiveness'] = stats["emotional"] / analyzed
+            traits['humor'] = stats["humor"] / analyzed
         
-        traits['curiosity'] = min(1.0, question_count / total_messages)
+        traits['curiosity'] = min(1.0, stats["questions"] / total_messages)
         
         # Directness based on punctuation and message length
-        if total_messages > 0:
-            avg_chars = total_chars / total_messages
-            traits['directness'] = min(1.0, (punctuation_count / total_messages) + (1 - min(1.0, avg_chars / 100)))
+        avg_chars = stats["chars"] / total_messages
+        traits['directness'] = min(1.0, (stats["punctuation"] / total_messages) + (1 - min(1.0, avg_chars / 100)))
         
         # Politeness (inverse of directness but considering formal language)
         traits['politeness'] = (traits['formality'] + (1 - traits['directness'])) / 2
         
         # Creativity (based on vocabulary diversity and unusual expressions)
         if total_words > 10:  # Need minimum words for analysis
-            all_words = []
-            for msg in user_messages:
-                message_text = msg.get('message', '')
-                if message_text:
-                    all_words.extend(message_text.lower().split())
-            
-            if all_words:
-                unique_words = len(set(all_words))
-                traits['creativity'] = min(1.0, unique_words / len(all_words) * 3)  # Vocabulary diversity
+            unique_words = VocabularySketch(stats["vocabulary"]).estimate()
+            traits['creativity'] = min(1.0, unique_words / total_words * 3)  # Vocabulary diversity
+        
+        return traits
+
+    def _batch_features(self, message_lists):
+        """MessageFeatures and one VocabularySketch per message list"""
+        features = MessageFeatures(len(message_lists))
+        sketches = []
+        for user_id, messages in enumerate(message_lists):
+            user_messages = self._user_messages(messages)
+            features.message_counts[user_id] = len(user_messages)
+            # Skip empty messages
+            texts = [text for text in (msg.get('message', '') for msg in user_messages) if text]
+            features.add(user_id, texts)
+            # The same sketch update_trait_stats builds; each distinct word is hashed once
+            vocabulary = VocabularySketch()
+            vocabulary.add(set(" ".join(texts).lower().split()))
+            features.unique_words[user_id] = vocabulary.estimate()
+            sketches.append(vocabulary)
+        return features, sketches
+
+    def trait_stats_many(self, message_lists):
+        """
+        ``update_trait_stats(None, messages)`` for many users at once.
+
+        Args:
+            message_lists (list): One list of messages per user
+
+        Returns:
+            list: One trait statistics dict per user, in the same order
+        """
+        if not NUMPY_AVAILABLE:
+            return [self.update_trait_stats(None, messages) for messages in message_lists]
+        
+        features, sketches = self._batch_features(message_lists)
+        totals = sum_features(features, self.unit_pattern, self._unit_counts)
+        return [
+            {**new_trait_stats(), **user_totals,
+             "messages": features.message_counts[user_id], "vocabulary": sketches[user_id].values}
+            for user_id, user_totals in enumerate(totals)
+        ]
+
+    def analyze_many(self, message_lists):
+        """
+        Analyze the messages of many users at once.
+
+        Args:
+            message_lists (list): One list of messages per user
+
+        Returns:
+            list: One trait dict per user, in the same order
+        """
+        if not NUMPY_AVAILABLE:
+            return [self.traits_from_stats(self.update_trait_stats(None, messages))
+                    for messages in message_lists]
+        
+        features, _ = self._batch_features(message_lists)
+        return score_traits(features, self.unit_pattern, self._unit_counts)
+
+    def analyze_message_patterns(self, messages):
+        """Analyze user messages for personality traits - handles different message formats"""
+        user_messages = self._user_messages(messages)
+        
+        print(f"DEBUG: Found {len(user_messages)} user messages out of {len(messages)} total messages")
         
+        if not user_messages:
+            print("DEBUG: No user messages found, returning default traits")
+            return self.personality_traits.copy()
+        
+        traits = self.analyze_many([user_messages])[0]
         print(f"DEBUG: Final traits: {traits}")
         return traits
 
+    def get_trait_stats(self, user_email):
+        """Running trait statistics for user, seeded from active memory the first time"""
+        stats = load_user_data(user_email).get("personality_stats")
+        if stats is not None:
+            return stats
+        
+        def seed(data):
+            if data.get("personality_stats") is not None:
+                return None
+            return {"personality_stats": self.update_trait_stats(None, load_memory(user_email))}
+        
+        modify_user_data(user_email, seed)
+        return load_user_data(user_email).get("personality_stats") or new_trait_stats()
+
     def analyze_conversation_topics(self, messages, summaries):
         """Analyze conversation topics and interests"""
+        # Use Groq to analyze interests and topics
+        return self._analyze_interests_with_groq(self.conversation_text(messages, summaries))
+
+    @staticmethod
+    def conversation_text(messages, summaries):
+        """User messages and summaries as one text for the interest analysis"""
         all_text = ""
         
         # Combine messages and summaries
@@ -186,15 +338,14 @@ class PersonalityProfiler:
             if isinstance(summary, dict):
                 all_text += summary.get('message', '') + " "
         
-        # Use Groq to analyze interests and topics
-        return self._analyze_interests_with_groq(all_text)
+        return all_text
 
     def _analyze_interests_with_groq(self, text):
         """Use Groq API to analyze user interests and communication style"""
         if not text.strip():
             return {"interests": [], "communication_style": "neutral"}
         
-        if not GROQ_API_KEY:
+        if not groq_client.GROQ_API_KEY:
             print("WARNING: GROQ_API_KEY not found, skipping interest analysis")
             return {"interests": [], "communication_style": "neutral"}
         
@@ -219,22 +370,11 @@ Respond in JSON format:
     "preferred_topics": ["topic1", "topic2", ...]
 }}"""
 
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        data = {
-            "model": "llama3-8b-8192",
-            "messages": [{"role": "user", "content": prompt}],
-            "temperature": 0.3,
-            "stream": False
-        }
-
         try:
-            response = requests.post(GROQ_API_URL, json=data, headers=headers, timeout=30)
-            response.raise_for_status()
-            content = response.json()["choices"][0]["message"]["content"]
+            content = groq_client.chat_completion(
+                [{"role": "user", "content": prompt}],
+                INTEREST_MODEL, temperature=0.3, timeout=INTEREST_TIMEOUT
+            )
             
             # Try to extract JSON from response
             json_match = re.search(r'\{.*\}', content, re.DOTALL)
@@ -243,7 +383,7 @@ Respond in JSON format:
             else:
                 return {"interests": [], "communication_style": "neutral"}
                 
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             print(f"API request error: {e}")
             return {"interests": [], "communication_style": "neutral"}
         except (KeyError, json.JSONDecodeError) as e:
@@ -260,33 +400,14 @@ Respond in JSON format:
             memory = load_memory(user_email)
             summaries = load_summaries(user_email)
             
-            # Analyze patterns
-            traits = self.analyze_message_patterns(memory)
+            # Traits come from the running statistics over all messages, not
+            # just the (pruned) active memory
+            stats = self.get_trait_stats(user_email)
+            traits = self.traits_from_stats(stats)
+            print(f"DEBUG: Traits from {stats['messages']} user messages: {traits}")
             interests_data = self.analyze_conversation_topics(memory, summaries)
             
-            # Count user messages properly
-            user_message_count = len([
-                m for m in memory 
-                if isinstance(m, dict) and (
-                    m.get('role') == 'user' or 
-                    ('role' not in m and 'message' in m)
-                )
-            ])
-            
-            # Create comprehensive profile
-            profile = {
-                "personality_traits": traits,
-                "interests": interests_data.get("interests", []),
-                "communication_style": interests_data.get("communication_style", "neutral"),
-                "common_phrases": interests_data.get("common_phrases", []),
-                "preferred_topics": interests_data.get("preferred_topics", []),
-                "groq_personality_indicators": interests_data.get("personality_indicators", {}),
-                "last_updated": datetime.now().isoformat(),
-                "message_count": user_message_count,
-                "conversation_count": len(summaries)
-            }
-            
-            return profile
+            return self.build_profile(traits, interests_data, stats["messages"], len(summaries))
             
         except Exception as e:
             print(f"Error generating personality profile: {e}")
@@ -299,38 +420,46 @@ Respond in JSON format:
                 "conversation_count": 0
             }
 
-    def save_personality_profile(self, profile, user_email):
-        """Save personality profile to user's data file"""
+    @staticmethod
+    def build_profile(traits, interests_data, message_count, conversation_count):
+        """Create comprehensive profile from traits and the Groq interest analysis"""
+        return {
+            "personality_traits": traits,
+            "interests": interests_data.get("interests", []),
+            "communication_style": interests_data.get("communication_style", "neutral"),
+            "common_phrases": interests_data.get("common_phrases", []),
+            "preferred_topics": interests_data.get("preferred_topics", []),
+            "groq_personality_indicators": interests_data.get("personality_indicators", {}),
+            "last_updated": datetime.now().isoformat(),
+            "message_count": message_count,
+            "conversation_count": conversation_count
+        }
+
+    def save_personality_profile(self, profile, user_email, stats=None):
+        """
+        Save personality profile, with its rendered system prompt, to user's
+        data file; ``stats`` also replaces the running trait statistics.
+        Everything is written in one atomic update.
+        """
+        updates = {
+            "personality_profile": profile,
+            "personality_prompt": self.render_personality_prompt(profile),
+            "personality_prompt_version": PERSONALITY_PROMPT_VERSION,
+            "last_personality_update": datetime.now().isoformat()
+        }
+        if stats is not None:
+            updates["personality_stats"] = stats
         try:
-            user_dir, _, _, pref_file = get_user_files(user_email)
-            os.makedirs(user_dir, exist_ok=True)
-            
-            # Load existing preferences
-            try:
-                with open(pref_file, 'r') as f:
-                    data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                data = {"email": user_email, "created_at": datetime.now().isoformat()}
-            
-            # Update with personality profile
-            data["personality_profile"] = profile
-            data["last_personality_update"] = datetime.now().isoformat()
-            
-            with open(pref_file, 'w') as f:
-                json.dump(data, f, indent=2)
-                
+            update_user_data(updates, user_email, write_behind=False)
+            return True
         except Exception as e:
             print(f"Error saving personality profile: {e}")
+            return False
 
     def get_personality_profile(self, user_email):
         """Get personality profile for user"""
         try:
-            _, _, _, pref_file = get_user_files(user_email)
-            with open(pref_file, 'r') as f:
-                data = json.load(f)
-            return data.get("personality_profile", {})
-        except (FileNotFoundError, json.JSONDecodeError):
-            return {}
+            return load_user_data(user_email).get("personality_profile", {})
         except Exception as e:
             print(f"Error loading personality profile: {e}")
             return {}
@@ -358,14 +487,7 @@ Respond in JSON format:
         
         # Update if significant new conversation activity (reduced threshold)
         try:
-            current_memory = load_memory(user_email)
-            current_message_count = len([
-                m for m in current_memory 
-                if isinstance(m, dict) and (
-                    m.get('role') == 'user' or 
-                    ('role' not in m and 'message' in m)
-                )
-            ])
+            current_message_count = self.get_trait_stats(user_email)["messages"]
             profile_message_count = profile.get("message_count", 0)
             
             print(f"DEBUG: Current messages: {current_message_count}, Profile messages: {profile_message_count}")
@@ -387,11 +509,41 @@ Respond in JSON format:
         return False
 
     def generate_personality_prompt(self, user_email):
+        """Get the personality-based system prompt, rendered when the profile was saved"""
+        try:
+            data = load_user_data(user_email)
+        except Exception as e:
+            print(f"Error loading personality profile: {e}")
+            return DEFAULT_PERSONALITY_PROMPT
+
+        prompt = data.get("personality_prompt")
+        if prompt and data.get("personality_prompt_version") == PERSONALITY_PROMPT_VERSION:
+            return prompt
+        if not data.get("personality_profile"):
+            return DEFAULT_PERSONALITY_PROMPT
+
+        # Saved before prompts were stored, or by older rendering rules:
+        # render it from the profile stored now and save it for next time
+        def rerender(data):
+            if data.get("personality_prompt") and \
+                    data.get("personality_prompt_version") == PERSONALITY_PROMPT_VERSION:
+                return None
+            return {
+                "personality_prompt": self.render_personality_prompt(data.get("personality_profile", {})),
+                "personality_prompt_version": PERSONALITY_PROMPT_VERSION
+            }
+        try:
+            modify_user_data(user_email, rerender)
+            return load_user_data(user_email)["personality_prompt"]
+        except Exception as e:
+            print(f"Error saving personality prompt: {e}")
+            return self.render_personality_prompt(data.get("personality_profile", {}))
+
+    @staticmethod
+    def render_personality_prompt(profile):
         """Generate a personality-based system prompt for the AI - more dynamic"""
-        profile = self.get_personality_profile(user_email)
-        
         if not profile or not profile.get("personality_traits"):
-            return "You are Cereal, a helpful AI assistant. Keep responses conversational and engaging."
+            return DEFAULT_PERSONALITY_PROMPT
         
         traits = profile.get("personality_traits", {})
         interests = profile.get("interests", [])
@@ -453,10 +605,22 @@ Respond in JSON format:
 
 # Helper functions to integrate with existing system
 
+_profiler = None
+_profiler_lock = threading.Lock()
+
+def get_profiler():
+    """Return the shared profiler, creating it (and compiling its patterns) on first use."""
+    global _profiler
+    if _profiler is None:
+        with _profiler_lock:
+            if _profiler is None:
+                _profiler = PersonalityProfiler()
+    return _profiler
+
 def update_user_personality(user_email):
     """Update personality profile for user if needed - with better debugging"""
     print(f"DEBUG: Checking personality update for {user_email}")
-    profiler = PersonalityProfiler()
+    profiler = get_profiler()
     
     if profiler.should_update_profile(user_email):
         print(f"DEBUG: Updating personality profile for {user_email}")
@@ -472,12 +636,35 @@ def update_user_personality(user_email):
         print(f"DEBUG: No personality update needed for {user_email}")
         return False
 
+def record_personality_messages(user_email, records):
+    """Memory append hook: count new user messages into the running trait statistics"""
+    profiler = get_profiler()
+    user_messages = profiler._user_messages(records)
+    if not user_messages:
+        return
+    if load_user_data(user_email).get("personality_stats") is None:
+        # First statistics for this user: seed them once from active memory,
+        # which already holds the new records
+        def seed(data):
+            stats = data.get("personality_stats")
+            if stats is None:
+                return {"personality_stats": profiler.update_trait_stats(None, load_memory(user_email))}
+            return {"personality_stats": profiler.update_trait_stats(stats, user_messages)}
+        modify_user_data(user_email, seed)
+        return
+    # Counted into the cached statistics now and added to the stored ones
+    # at the next write-behind flush
+    accumulate_user_data(
+        user_email, "personality_stats",
+        profiler.update_trait_stats(None, user_messages), combine_trait_stats
+    )
+
+register_append_hook("personality_stats", record_personality_messages)
+
 def get_personality_system_prompt(user_email):
     """Get personality-based system prompt for user"""
-    profiler = PersonalityProfiler()
-    return profiler.generate_personality_prompt(user_email)
+    return get_profiler().generate_personality_prompt(user_email)
 
 def get_user_personality_stats(user_email):
     """Get personality statistics for user"""
-    profiler = PersonalityProfiler()
-    return profiler.get_personality_profile(user_email)
\ No newline at end of file
+    return get_profiler().get_personality_profile(user_email)
\ No newline at end of file
@@ -0,0 +1,99 @@
+# modules/personality/profile_worker.py
+"""
+Background personality profile refresh.
+
+The chat path only enqueues the user; a small pool of worker threads checks
+``should_update_profile`` and regenerates the profile (including the Groq
+interest analysis) off the request path. A user already waiting in the queue
+or being refreshed is not queued a second time.
+"""
+
+import os
+import queue
+import threading
+
+from .personality_profiler import update_user_personality
+
+PROFILE_WORKERS = int(os.environ.get("PROFILE_WORKERS", "2"))
+
+# Sentinel telling a worker thread to exit
+_STOP = object()
+
+
+class ProfileRefreshQueue:
+    """Deduplicating work queue of users whose profile may need a refresh."""
+
+    def __init__(self, workers=PROFILE_WORKERS, refresh_func=update_user_personality):
+        self.workers = max(1, workers)
+        self.refresh_func = refresh_func
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def start(self):
+        """Start the worker threads (no-op if already running)."""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"profile-refresh-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+
+    def stop(self, timeout=5.0):
+        """Ask the workers to exit once the queue drains and wait for them."""
+        with self._lock:
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(_STOP)
+        for thread in threads:
+            thread.join(timeout)
+
+    def enqueue(self, user_email):
+        """
+        Schedule a profile refresh for a user.
+
+        Returns:
+            bool: False if the user was already queued or being refreshed
+        """
+        self.start()
+        with self._lock:
+            if user_email in self._pending:
+                return False
+            self._pending.add(user_email)
+        self._queue.put(user_email)
+        return True
+
+    def pending_count(self):
+        with self._lock:
+            return len(self._pending)
+
+    def _run(self):
+        while True:
+            user_email = self._queue.get()
+            if user_email is _STOP:
+                return
+            try:
+                self.refresh_func(user_email)
+            except Exception as e:
+                print(f"ERROR: Background personality refresh failed for {user_email}: {e}")
+            finally:
+                with self._lock:
+                    self._pending.discard(user_email)
+
+
+# Default queue used by the chat pipeline
+profile_refresh_queue = ProfileRefreshQueue()
+
+
+def enqueue_profile_refresh(user_email):
+    """Queue a background personality refresh for a user"""
+    return profile_refresh_queue.enqueue(user_email)
+
+
+def stop_profile_refresh(timeout=5.0):
+    """Finish the queued refreshes and stop the default queue's workers (at shutdown)"""
+    profile_refresh_queue.stop(timeout)
@@ -0,0 +1,226 @@
+# modules/personality/recompute.py
+"""
+Offline recompute of every user's personality profile.
+
+Usage (from the repository root, with the app's environment):
+    python AI/modules/personality/recompute.py [--processes N] [--chunk-size N]
+        [--rescan] [--interests] [--groq-concurrency N] [--dry-run]
+
+Trait analysis runs in a process pool that is handed users in chunks. By
+default traits are re-derived from each user's running trait statistics;
+``--rescan`` rebuilds the statistics from the stored messages with the
+current heuristics first, a whole chunk at a time through the profiler's
+batched (NumPy) path (only active memory survives pruning, so this
+resets the statistics to that window). ``--interests`` also redoes the Groq
+interest analysis, at most ``--groq-concurrency`` requests at a time;
+without it the interests of the current profile are kept.
+
+Each profile is written with one atomic user data update, and progress and
+throughput are reported while the recompute runs.
+"""
+
+import argparse
+import multiprocessing
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Make the repository root importable when run as a script, including in
+# spawned pool workers
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(os.path.dirname(os.path.dirname(current_dir)))
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory import (
+    get_backend, load_memory, load_summaries, load_user_data, modify_user_data
+)
+from AI.modules.personality.personality_profiler import get_profiler
+
+RECOMPUTE_CHUNK_SIZE = int(os.environ.get("RECOMPUTE_CHUNK_SIZE", "16"))
+RECOMPUTE_GROQ_CONCURRENCY = int(os.environ.get("RECOMPUTE_GROQ_CONCURRENCY", "4"))
+# Seconds between progress lines
+PROGRESS_INTERVAL = 5.0
+
+# Options of the current run in pool worker processes
+_worker_options = None
+
+
+def _init_worker(rescan, interests):
+    global _worker_options
+    _worker_options = (rescan, interests)
+
+
+def _analyze_chunk(user_emails):
+    """
+    Pool worker: read a chunk of users and compute their traits (no writes).
+    Statistics that have to be built from messages are built for the whole
+    chunk at once with the profiler's batched path.
+    """
+    rescan, interests = _worker_options
+    profiler = get_profiler()
+    results = []
+    loaded = []
+    for user_email in user_emails:
+        try:
+            memory = load_memory(user_email)
+            stats = None if rescan else load_user_data(user_email).get("personality_stats")
+            loaded.append((user_email, memory, stats, load_summaries(user_email)))
+        except Exception as e:
+            results.append({"user_email": user_email, "error": str(e)})
+
+    try:
+        built = iter(profiler.trait_stats_many([memory for _, memory, stats, _ in loaded if stats is None]))
+    except Exception as e:
+        return results + [{"user_email": user_email, "error": str(e)} for user_email, *_ in loaded]
+
+    for user_email, memory, stats, summaries in loaded:
+        seeded = stats is None and not rescan
+        if stats is None:
+            stats = next(built)
+        results.append({
+            "user_email": user_email,
+            "traits": profiler.traits_from_stats(stats),
+            "stats": stats,
+            "seeded": seeded,
+            "conversation_count": len(summaries),
+            "text": profiler.conversation_text(memory, summaries) if interests else None
+        })
+    return results
+
+
+def _chunks(users, chunk_size):
+    for start in range(0, len(users), chunk_size):
+        yield users[start:start + chunk_size]
+
+
+class _Progress:
+    """Thread-safe progress counter printing at most every PROGRESS_INTERVAL seconds"""
+
+    def __init__(self, total):
+        self.total = total
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._last_report = self.started
+        self._lock = threading.Lock()
+
+    def record(self, ok):
+        with self._lock:
+            self.done += 1
+            if not ok:
+                self.failed += 1
+            now = time.monotonic()
+            if now - self._last_report >= PROGRESS_INTERVAL:
+                self._last_report = now
+                self.report()
+
+    def report(self):
+        elapsed = time.monotonic() - self.started
+        rate = self.done / elapsed if elapsed else 0.0
+        print(f"{self.done}/{self.total} users ({self.failed} failed) "
+              f"in {elapsed:.1f}s, {rate:.1f} users/s")
+
+
+def _current_interests(profile):
+    # Interest fields of an existing profile, in the Groq analysis format
+    return {
+        "interests": profile.get("interests", []),
+        "communication_style": profile.get("communication_style", "neutral"),
+        "common_phrases": profile.get("common_phrases", []),
+        "preferred_topics": profile.get("preferred_topics", []),
+        "personality_indicators": profile.get("groq_personality_indicators", {})
+    }
+
+
+def _save_result(result, rescan, interests, dry_run):
+    """Build and write one user's profile; returns False on failure"""
+    profiler = get_profiler()
+    user_email = result["user_email"]
+    try:
+        if interests:
+            interests_data = profiler._analyze_interests_with_groq(result["text"])
+        else:
+            interests_data = _current_interests(profiler.get_personality_profile(user_email))
+        stats = result["stats"]
+        profile = profiler.build_profile(
+            result["traits"], interests_data, stats["messages"], result["conversation_count"]
+        )
+        if dry_run:
+            return True
+        if result["seeded"]:
+            # Only fill in statistics the chat path has not started meanwhile
+            modify_user_data(user_email, lambda data: None if data.get("personality_stats") is not None
+                             else {"personality_stats": stats})
+        return profiler.save_personality_profile(profile, user_email, stats=stats if rescan else None)
+    except Exception as e:
+        print(f"ERROR: Could not save profile for {user_email}: {e}")
+        return False
+
+
+def recompute(processes=None, chunk_size=RECOMPUTE_CHUNK_SIZE, rescan=False, interests=False,
+              groq_concurrency=RECOMPUTE_GROQ_CONCURRENCY, dry_run=False, users=None):
+    """
+    Recompute and save the personality profile of every user (or of ``users``).
+
+    Returns:
+        tuple: (users done, users failed)
+    """
+    users = list(users if users is not None else get_backend().users())
+    progress = _Progress(len(users))
+    print(f"Recomputing {len(users)} personality profiles"
+          f"{' (dry run)' if dry_run else ''}")
+
+    # Spawned workers open their own storage connections instead of
+    # inheriting this process's SQLite handles and cache locks
+    context = multiprocessing.get_context("spawn")
+    # Bounds the results waiting for a Groq slot
+    in_flight = threading.BoundedSemaphore(max(1, groq_concurrency) * 2)
+
+    def finish(result):
+        try:
+            progress.record(_save_result(result, rescan, interests, dry_run))
+        finally:
+            if interests:
+                in_flight.release()
+
+    with context.Pool(processes, initializer=_init_worker, initargs=(rescan, interests)) as pool, \
+            ThreadPoolExecutor(max_workers=max(1, groq_concurrency)) as groq:
+        results = (result for chunk in pool.imap_unordered(_analyze_chunk, _chunks(users, max(1, chunk_size)))
+                   for result in chunk)
+        for result in results:
+            if "error" in result:
+                print(f"ERROR: Could not analyze {result['user_email']}: {result['error']}")
+                progress.record(False)
+            elif interests:
+                in_flight.acquire()
+                groq.submit(finish, result)
+            else:
+                finish(result)
+
+    progress.report()
+    return progress.done, progress.failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recompute every user's personality profile")
+    parser.add_argument("--processes", type=int, default=None,
+                        help="Worker processes (default: one per CPU)")
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE,
+                        help="Users handed to a worker at a time")
+    parser.add_argument("--rescan", action="store_true",
+                        help="Rebuild trait statistics from stored messages")
+    parser.add_argument("--interests", action="store_true",
+                        help="Redo the Groq interest analysis")
+    parser.add_argument("--groq-concurrency", type=int, default=RECOMPUTE_GROQ_CONCURRENCY,
+                        help="Concurrent Groq requests with --interests")
+    parser.add_argument("--dry-run", action="store_true", help="Compute without writing")
+    args = parser.parse_args()
+    recompute(args.processes, args.chunk_size, rescan=args.rescan, interests=args.interests,
+              groq_concurrency=args.groq_concurrency, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
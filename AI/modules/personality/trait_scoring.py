@@ -0,0 +1,152 @@
+# modules/personality/trait_scoring.py
+"""
+Batched personality trait scoring.
+
+The messages of a whole batch are joined into one string and split with a
+single ``findall`` into units the profiler's patterns match whole (words,
+phrases, punctuation runs, emoji). Each distinct unit is classified once,
+and per-message counts come from ``numpy.bincount`` over the unit ids, so a
+batch costs one regex scan plus NumPy arithmetic instead of a Python regex
+loop per message. Counts are then summed per user with ``bincount``, either
+as running trait statistics (``sum_features``) or turned into all eight
+traits with array operations (``score_traits``). The formulas are those
+of ``PersonalityProfiler.traits_from_stats`` and produce identical values.
+NumPy itself is only imported by the first ``score_traits`` call.
+"""
+
+import importlib.util
+
+NUMPY_AVAILABLE = importlib.util.find_spec("numpy") is not None
+
+TRAIT_NAMES = (
+    'formality', 'verbosity', 'emotiveness', 'humor',
+    'directness', 'curiosity', 'politeness', 'creativity'
+)
+
+# Per-message features, as counted by PersonalityProfiler._message_features
+FEATURE_NAMES = ("formal", "casual", "emotional", "humor", "questions", "words", "chars", "punctuation")
+
+# Match counts of one unit, as returned by PersonalityProfiler._unit_counts
+UNIT_COUNT_NAMES = ("formal", "casual", "emotional", "humor", "questions", "punctuation")
+
+# Joins the messages of a batch; it is a unit of its own that no pattern matches
+_SEPARATOR = "\x00"
+
+
+class MessageFeatures:
+    """Non-empty message texts of a batch, tagged with the user they belong to."""
+
+    def __init__(self, user_count):
+        self.user_count = user_count
+        self.user_ids = []
+        self.texts = []
+        self.message_counts = [0] * user_count  # user messages, empty ones included
+        self.unique_words = [0] * user_count  # VocabularySketch estimates
+
+    def add(self, user_id, texts):
+        self.user_ids.extend([user_id] * len(texts))
+        self.texts.extend(texts)
+
+
+def feature_columns(np, texts, unit_pattern, unit_counts):
+    """
+    Per-message features of ``texts``, one array per FEATURE_NAMES entry.
+
+    ``unit_pattern`` splits text into units and ``unit_counts(unit)`` returns
+    the UNIT_COUNT_NAMES match counts of one unit.
+    """
+    batch = _SEPARATOR.join(texts)
+    if batch.count(_SEPARATOR) != len(texts) - 1:
+        # Matches nothing either way, but must not split a message
+        batch = _SEPARATOR.join(text.replace(_SEPARATOR, " ") for text in texts)
+    units = unit_pattern.findall(batch)
+
+    # Row 0 (the separator) counts nothing; every other distinct unit is classified once
+    ids = {_SEPARATOR: 0}
+    table = [(0,) * len(UNIT_COUNT_NAMES)]
+    for unit in set(units):
+        if unit not in ids:
+            ids[unit] = len(table)
+            table.append(unit_counts(unit))
+    unit_ids = np.fromiter(map(ids.__getitem__, units), dtype=np.intp, count=len(units))
+    owners = np.cumsum(unit_ids == 0)
+    table = np.asarray(table, dtype=np.int64)
+    formal, casual, emotional, humor, questions, punctuation = (
+        np.bincount(owners, weights=table[unit_ids, column], minlength=len(texts))
+        for column in range(len(UNIT_COUNT_NAMES))
+    )
+
+    return (
+        formal > casual,
+        casual > formal,
+        emotional > 0,
+        humor > 0,
+        questions > 0,
+        np.fromiter(map(len, map(str.split, texts)), dtype=np.int64, count=len(texts)),
+        np.fromiter(map(len, texts), dtype=np.int64, count=len(texts)),
+        punctuation,
+    )
+
+
+def _feature_sums(np, features, unit_pattern, unit_counts):
+    """Per-user totals: (FEATURE_NAMES x users array, analyzed messages per user)"""
+    if not features.texts:
+        return np.zeros((len(FEATURE_NAMES), features.user_count)), np.zeros(features.user_count)
+    user_ids = np.asarray(features.user_ids, dtype=np.intp)
+    sums = np.stack([
+        np.bincount(user_ids, weights=column, minlength=features.user_count)
+        for column in feature_columns(np, features.texts, unit_pattern, unit_counts)
+    ])
+    analyzed = np.bincount(user_ids, minlength=features.user_count).astype(np.float64)
+    return sums, analyzed
+
+
+def sum_features(features, unit_pattern, unit_counts):
+    """
+    Per-user totals of ``features`` (see feature_columns for ``unit_pattern``
+    and ``unit_counts``).
+
+    Returns:
+        list: One dict per user with "analyzed" and every FEATURE_NAMES count
+    """
+    import numpy as np
+
+    sums, analyzed = _feature_sums(np, features, unit_pattern, unit_counts)
+    rows = np.vstack([analyzed, sums]).T.astype(np.int64).tolist()
+    return [dict(zip(("analyzed",) + FEATURE_NAMES, row)) for row in rows]
+
+
+def score_traits(features, unit_pattern, unit_counts, default=0.5):
+    """
+    Compute the traits of every user in ``features`` (see feature_columns
+    for ``unit_pattern`` and ``unit_counts``).
+
+    Returns:
+        list: One trait dict per user, in user order
+    """
+    import numpy as np
+
+    totals = np.asarray(features.message_counts, dtype=np.float64)
+    sums, analyzed = _feature_sums(np, features, unit_pattern, unit_counts)
+    formal, casual, emotional, humor, questions, words, chars, punctuation = sums
+    unique_words = np.asarray(features.unique_words, dtype=np.float64)
+
+    # Divisions are only used where the denominator is non-zero
+    total = np.maximum(totals, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        formality = np.where(formal + casual > 0, formal / (formal + casual), default)
+        verbosity = np.where(words > 0, np.clip(words / total / 25, 0.1, 1.0), default)
+        emotiveness = np.where(analyzed > 0, emotional / analyzed, default)
+        humor_trait = np.where(analyzed > 0, humor / analyzed, default)
+        curiosity = np.minimum(1.0, questions / total)
+        directness = np.minimum(1.0, (punctuation / total) + (1 - np.minimum(1.0, chars / total / 100)))
+        politeness = (formality + (1 - directness)) / 2
+        creativity = np.where(words > 10, np.minimum(1.0, unique_words / words * 3), default)
+
+    traits = np.stack([
+        formality, verbosity, emotiveness, humor_trait,
+        directness, curiosity, politeness, creativity
+    ], axis=1)
+    # Users without messages keep the defaults
+    traits[totals == 0] = default
+    return [dict(zip(TRAIT_NAMES, row)) for row in traits.tolist()]
@@ -0,0 +1,53 @@
+# modules/personality/vocabulary_sketch.py
+"""
+Bounded-size estimate of the number of distinct words a user has written.
+
+A K-minimum-values sketch keeps the ``k`` smallest 64-bit hashes of the
+words seen so far. While fewer than ``k`` distinct words were seen it holds
+all of them and the count is exact; after that the k-th smallest hash gives
+an unbiased estimate with a relative error of about 1/sqrt(k). The sketch is
+a plain sorted list of ints, so it can be stored in the user's data document.
+"""
+
+import hashlib
+from bisect import bisect_left
+
+SKETCH_SIZE = 256
+
+_HASH_SPACE = float(2 ** 64)
+
+
+def _hash(word):
+    return int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class VocabularySketch:
+    """K-minimum-values distinct count over words."""
+
+    def __init__(self, values=(), k=SKETCH_SIZE):
+        self.k = k
+        self.values = sorted(values)[:k]
+
+    def add(self, words):
+        values = self.values
+        k = self.k
+        for word in words:
+            value = _hash(word)
+            if len(values) >= k and value >= values[-1]:
+                continue
+            i = bisect_left(values, value)
+            if i < len(values) and values[i] == value:
+                continue
+            values.insert(i, value)
+            if len(values) > k:
+                values.pop()
+
+    def merge(self, values):
+        """Add the hashes of another sketch with the same ``k``"""
+        self.values = sorted(set(self.values).union(values))[:self.k]
+
+    def estimate(self):
+        """Estimated number of distinct words added"""
+        if len(self.values) < self.k:
+            return len(self.values)
+        return (self.k - 1) / ((self.values[-1] + 1) / _HASH_SPACE)
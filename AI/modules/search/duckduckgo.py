@@ -5,23 +5,19 @@ Handles web searches, result processing, and real-time memory integration.
 """
 
 import datetime
-import os
-import sys
-from duckduckgo_search import DDGS
+import importlib.util
+from .search_cache import search_cache
 
-# Add memory path for imports
-current_dir = os.path.dirname(os.path.abspath(__file__))
-parent_dir = os.path.dirname(os.path.dirname(current_dir))
-memory_path = os.path.join(parent_dir, "memory")
-
-if memory_path not in sys.path:
-    sys.path.append(memory_path)
+# duckduckgo_search is imported by the first search (it pulls in an HTTP
+# client of its own); only its presence is checked here
+if importlib.util.find_spec("duckduckgo_search") is None:
+    raise ImportError("No module named 'duckduckgo_search'")
 
 # Try to import memory functions
 try:
     from memory import (
         append_to_memory, summarize_with_groq, 
-        load_real_time_memory, save_real_time_memory
+        load_real_time_memory, save_real_time_memory, find_real_time_memory
     )
     MEMORY_AVAILABLE = True
 except ImportError as e:
@@ -33,6 +29,7 @@ except ImportError as e:
     def summarize_with_groq(messages, instruction=""): return {"message": "Summary not available"}
     def load_real_time_memory(user_email): return []
     def save_real_time_memory(entry, user_email): pass
+    def find_real_time_memory(query, user_email, freshness_hours=24): return None
 
 
 class DuckDuckGoSearch:
@@ -55,27 +52,10 @@ class DuckDuckGoSearch:
         """
         if not self.memory_available:
             return None
-            
-        real_time_memory = load_real_time_memory(user_email)
-        freshness_threshold = datetime.timedelta(hours=freshness_hours)
-        
-        for rt_entry in real_time_memory:
-            entry_timestamp_str = rt_entry.get("timestamp")
-            if not entry_timestamp_str:
-                continue
-                
-            try:
-                entry_timestamp = datetime.datetime.fromisoformat(entry_timestamp_str)
-                if datetime.datetime.now() - entry_timestamp < freshness_threshold:
-                    # Check if this entry matches our search query
-                    if (search_query.lower() in rt_entry["query"].lower() or 
-                        any(kp.lower() in search_query.lower() 
-                            for kp in rt_entry.get("key_points", []))):
-                        return rt_entry['summary']
-            except ValueError:
-                continue  # Skip invalid timestamps
-                
-        return None
+
+        # Served from the per-user query index, so the cost does not grow with history
+        rt_entry = find_real_time_memory(search_query, user_email, freshness_hours=freshness_hours)
+        return rt_entry.get('summary') if rt_entry else None
     
     def perform_search(self, query, max_results=5, region='wt-wt'):
         """
@@ -90,6 +70,7 @@ class DuckDuckGoSearch:
             list: Search results
         """
         try:
+            from duckduckgo_search import DDGS
             search_results = []
             with DDGS() as ddgs:
                 for r in ddgs.text(keywords=query, region=region, max_results=max_results):
@@ -143,7 +124,8 @@ class DuckDuckGoSearch:
             truncated_text = combined_text[:500]
             return {
                 "message": f"Search results for '{query}': {truncated_text}...",
-                "key_points": []
+                "key_points": [],
+                "fallback": True
             }
     
     def save_to_real_time_memory(self, query, summary_info, sources, user_email):
@@ -169,6 +151,35 @@ class DuckDuckGoSearch:
         
         save_real_time_memory(real_time_entry, user_email)
     
+    def fetch_and_summarize(self, query):
+        """
+        Search the web and summarize the results, independent of any user.
+
+        Args:
+            query (str): Search query
+
+        Returns:
+            dict: ``status`` ("ok", "no_results" or "no_content"), plus
+            ``summary_info``, ``sources`` and ``degraded`` when the status is
+            "ok"; ``degraded`` is True when Groq failed and the summary is
+            only the fallback text
+        """
+        search_results = self.perform_search(query)
+        if not search_results:
+            return {"status": "no_results"}
+
+        snippets, sources = self.extract_content(search_results)
+        if not snippets:
+            return {"status": "no_content"}
+
+        summary_info = self.summarize_results(snippets, query)
+        return {
+            "status": "ok",
+            "summary_info": summary_info,
+            "sources": sources,
+            "degraded": bool(summary_info.get("fallback"))
+        }
+
     def search_and_summarize(self, query, user_email, check_cache=True):
         """
         Complete search and summarization workflow.
@@ -190,29 +201,30 @@ class DuckDuckGoSearch:
                     append_to_memory(query, f"Search result: {cached_result}", user_email)
                 return
         
-        # Perform new search
-        search_results = self.perform_search(query)
+        # Search and summarize once for everyone asking the same thing right now;
+        # a fallback summary is shared with those callers but never cached
+        result = search_cache.get_or_fetch(
+            query, lambda: self.fetch_and_summarize(query),
+            cacheable=lambda r: r["status"] == "ok" and not r.get("degraded")
+        )
         
-        if not search_results:
+        if result["status"] == "no_results":
             yield "No relevant search results found."
             if self.memory_available:
                 append_to_memory(query, "No search results found.", user_email)
             return
         
-        # Extract content
-        snippets, sources = self.extract_content(search_results)
-        
-        if not snippets:
+        if result["status"] == "no_content":
             yield "Found results, but no extractable content to summarize."
             if self.memory_available:
                 append_to_memory(query, "No extractable content for summarization.", user_email)
             return
         
-        # Summarize results
-        summary_info = self.summarize_results(snippets, query)
+        summary_info = result["summary_info"]
         
-        # Save to real-time memory
-        self.save_to_real_time_memory(query, summary_info, sources, user_email)
+        # Save to real-time memory (a fallback summary would be served as fresh for hours)
+        if not result.get("degraded"):
+            self.save_to_real_time_memory(query, summary_info, result["sources"], user_email)
         
         # Yield result
         result_message = f"Here's what I found: {summary_info.get('message', 'Could not generate summary.')}"
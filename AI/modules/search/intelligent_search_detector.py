@@ -1,239 +1,383 @@
 # intelligent_search_detector.py
 # Fixed version with better personal question detection
 
+import os
 import re
-from typing import Dict, List, Tuple, Optional
+import multiprocessing
+from itertools import islice
+from typing import Dict, Iterable, List, NamedTuple, Tuple, Optional
 from datetime import datetime, timedelta
 
+from ..core.matching import KeywordMatcher, PatternSet
+
+# Explicit search commands
+EXPLICIT_PATTERNS = (
+    r"search\s+(for\s+)?(.+)",
+    r"look\s+up\s+(.+)",
+    r"find\s+(information\s+)?(about\s+)?(.+)",
+    r"google\s+(.+)",
+    r"what\s+can\s+you\s+find\s+(about\s+)?(.+)",
+    r"research\s+(.+)",
+    r"give\s+me\s+info\s+(on\s+|about\s+)?(.+)",
+    r"can\s+you\s+search\s+",
+    r"please\s+search\s+",
+    r"i\s+need\s+information\s+about"
+)
+
+# Patterns that indicate personal questions about the AI
+PERSONAL_PATTERNS = (
+    r"(what('s| is)\s+)?your?\s+(favourite|favorite|fav)\s+",
+    r"what\s+do\s+you\s+(like|enjoy|prefer|think|feel|recommend)",
+    r"do\s+you\s+(like|enjoy|have|prefer|think|believe|recommend)",
+    r"what('s| is)\s+your\s+(opinion|thought|view|take|preference)",
+    r"how\s+do\s+you\s+(feel|think)\s+about",
+    r"ur\s+(favourite|favorite|fav)\s+",
+    r"tell\s+me\s+(about\s+)?your\s+",
+    r"what\s+are\s+you\s+(into|interested)",
+    r"describe\s+your\s+",
+    r"what\s+would\s+you\s+(choose|pick|recommend)",
+    r"if\s+you\s+(had\s+to\s+)?(choose|pick)",
+    r"what('s| is)\s+your\s+(style|type|kind)",
+    r"which\s+do\s+you\s+(like|prefer)",
+    r"what\s+are\s+your\s+",
+    r"can\s+you\s+recommend\s+your\s+favorite"
+)
+
+# Personal topics that should get personal responses
+PERSONAL_TOPICS = (
+    "music", "song", "movie", "film", "food", "color", "hobby", "interest",
+    "book", "game", "sport", "activity", "place", "travel", "style",
+    "artist", "band", "genre", "album", "restaurant", "cuisine", "drink",
+    "vacation", "holiday", "season", "weather", "animal", "pet"
+)
+
+# Opinion/preference indicators
+OPINION_WORDS = (
+    "opinion", "preference", "favorite", "favourite", "like", "dislike",
+    "enjoy", "hate", "love", "think", "feel", "believe", "recommend",
+    "suggest", "advise", "choose", "pick", "select"
+)
+
+# Common greetings and casual phrases
+CASUAL_PATTERNS = (
+    r"^(hi|hello|hey|sup|wassup|what's up)(\s|$|!|\?)",
+    r"^(good\s+(morning|afternoon|evening|night))(\s|$|!|\?)",
+    r"^(how\s+(are\s+)?(you|ya|u)\s+(doing|going|been))(\s|$|!|\?)",
+    r"^(how('s| is)\s+(it\s+)?going)(\s|$|!|\?)",
+    r"^(how('s| is)\s+your\s+(day|morning|evening|night))(\s|$|!|\?)",
+    r"^(what('s| is)\s+up)(\s|$|!|\?)",
+    r"^(how\s+you\s+doing)(\s|$|!|\?)",
+    r"^(how\s+are\s+things)(\s|$|!|\?)",
+    r"^(how\s+have\s+you\s+been)(\s|$|!|\?)",
+    r"^(nice\s+to\s+(meet|see)\s+you)(\s|$|!|\?)",
+    r"^(thanks?|thank\s+you|ty)(\s|$|!|\?)",
+    r"^(you('re| are)\s+welcome|no\s+problem|np)(\s|$|!|\?)",
+    r"^(bye|goodbye|see\s+ya|cya|ttyl)(\s|$|!|\?)",
+    r"^(good\s+luck|have\s+a\s+good\s+(day|time))(\s|$|!|\?)",
+    r"^(take\s+care|be\s+safe)(\s|$|!|\?)"
+)
+
+# Simple conversational starters
+CONVERSATION_STARTERS = (
+    r"^(tell\s+me\s+about\s+yourself)(\s|$|!|\?)",
+    r"^(who\s+are\s+you)(\s|$|!|\?)",
+    r"^(what('s| is)\s+your\s+name)(\s|$|!|\?)",
+    r"^(nice\s+to\s+meet\s+you)(\s|$|!|\?)",
+    r"^(how\s+old\s+are\s+you)(\s|$|!|\?)",
+    r"^(where\s+are\s+you\s+from)(\s|$|!|\?)"
+)
+
+CURRENT_EVENT_PATTERNS = (
+    r"(latest|recent|current|today('s)?|this\s+(week|month))\s+(news|events?|updates?)",
+    r"what('s| is)\s+happening\s+(now|today|recently|lately)",
+    r"current\s+(status|situation|state)\s+of",
+    r"(breaking|recent)\s+news",
+    r"(today|yesterday|this\s+week)\s+in",
+    r"what('s| is)\s+(new|recent|latest)\s+(with|about|in)",
+    r"update\s+on\s+",
+    r"(stock|market|price)\s+(today|now|current)",
+    r"news\s+about\s+",
+    r"current\s+events"
+)
+
+# Time indicators that suggest current info needed
+TIME_INDICATORS = (
+    "now", "today", "currently", "recent", "latest", "this week",
+    "this month", "2024", "2025", "yesterday", "breaking", "live",
+    "real-time", "up-to-date", "fresh", "new"
+)
+
+# Topics that often need current info
+CURRENT_TOPICS = (
+    "news", "politics", "stock", "weather", "events", "crisis",
+    "election", "pandemic", "war", "market", "price", "update",
+    "cryptocurrency", "bitcoin", "covid", "virus", "outbreak",
+    "government", "president", "minister", "policy", "law"
+)
+
+# More precise question patterns that exclude greetings and personal questions
+FACTUAL_QUESTION_PATTERNS = (
+    r"^what\s+is\s+(?!your|up|happening|new|going|wrong)\w+",  # "what is X" but not "what is up/your/etc"
+    r"^when\s+(did|was|will|does|is)\s+",  # "when did/was/will/does/is"
+    r"^where\s+(is|was|can|does|did)\s+(?!you)",  # "where is/was" but not "where are you"
+    r"^who\s+(is|was|created|invented|discovered)\s+",  # "who is/was/created"
+    r"^why\s+(does|did|is|was|do)\s+",  # "why does/did/is"
+    r"^how\s+(does|did|can|to)\s+(?!you)",  # "how does/did/can/to" but not "how you"
+    r"^how\s+many\s+",  # "how many"
+    r"^how\s+much\s+",  # "how much"
+    r"^how\s+long\s+",  # "how long"
+    r"^how\s+often\s+",  # "how often"
+    r"tell\s+me\s+about\s+(?!your|you)\w+",  # "tell me about X" but not about you
+    r"explain\s+(?!your|how\s+you)\w+",  # "explain X" but not "explain your"
+    r"define\s+\w+",  # "define word"
+    r"what\s+are\s+the\s+(?!you|your)\w+",  # "what are the X" but not about you
+    r"list\s+of\s+\w+",  # "list of X"
+    r"examples\s+of\s+\w+"  # "examples of X"
+)
+
+# Academic/technical/factual topics that usually need facts
+FACTUAL_TOPICS = (
+    "definition", "history", "science", "technology", "medicine",
+    "law", "mathematics", "physics", "chemistry", "biology",
+    "geography", "statistics", "data", "research", "study",
+    "theory", "concept", "principle", "formula", "equation",
+    "university", "college", "education", "academic", "scholarly",
+    "algorithm", "programming", "computer", "software", "hardware",
+    "anatomy", "disease", "symptom", "treatment", "diagnosis",
+    "country", "city", "population", "economy", "GDP", "culture",
+    "language", "literature", "author", "book", "philosophy"
+)
+
+# Avoid searching for common knowledge/philosophical questions
+COMMON_KNOWLEDGE = (
+    "what is love", "what is happiness", "what is life", "what is death",
+    "how to be happy", "how to make friends", "what is art", "what is beauty",
+    "what is the meaning of life", "how to be successful", "what is friendship",
+    "how to be confident", "what is wisdom", "how to be good person"
+)
+
+# Basic specificity indicators
+SPECIFIC_INDICATORS = (
+    "specific", "exactly", "precisely", "detailed", "comprehensive",
+    "thorough", "complete", "full", "entire", "exact", "particular",
+    "certain", "definite", "explicit", "clear"
+)
+
+_NUMBER_RE = re.compile(r'\d+')
+_CAPITALIZED_RE = re.compile(r'[A-Z][a-zA-Z]+')
+
+# Print every search decision made through integrate_with_groq_api (SEARCH_DEBUG=1)
+SEARCH_DEBUG = os.environ.get("SEARCH_DEBUG", "0") == "1"
+# Prompts per task sent to each classify_many worker process
+CLASSIFY_CHUNK_SIZE = 2000
+
+
+class SearchDecision(NamedTuple):
+    """Compact result of classifying one prompt"""
+    should_search: bool
+    reason: str
+    query: Optional[str] = None
+    confidence: Optional[float] = None
+
+    @classmethod
+    def from_result(cls, result: Tuple[bool, str, Dict]) -> "SearchDecision":
+        should_search, reason, info = result
+        return cls(should_search, reason, info.get('query'), info.get('confidence'))
+
+
 class IntelligentSearchDetector:
     def __init__(self):
-        """Initialize the search detector with no external dependencies"""
-        pass
-    
-    def should_search(self, prompt: str, user_context: Dict = None) -> Tuple[bool, str, Dict]:
+        """
+        Compile the detection rules once: each ordered regex list becomes a
+        single PatternSet, and every keyword list shares one KeywordMatcher so
+        a prompt's keywords are found in one scan.
+        """
+        self.explicit_patterns = PatternSet(EXPLICIT_PATTERNS)
+        self.personal_patterns = PatternSet(PERSONAL_PATTERNS)
+        self.casual_patterns = PatternSet(CASUAL_PATTERNS + CONVERSATION_STARTERS)
+        self.current_event_patterns = PatternSet(CURRENT_EVENT_PATTERNS)
+        self.factual_question_patterns = PatternSet(FACTUAL_QUESTION_PATTERNS)
+
+        self.personal_topics = frozenset(PERSONAL_TOPICS)
+        self.opinion_words = frozenset(OPINION_WORDS)
+        self.time_indicators = frozenset(TIME_INDICATORS)
+        self.current_topics = frozenset(CURRENT_TOPICS)
+        self.factual_topics = frozenset(FACTUAL_TOPICS)
+        self.common_knowledge = frozenset(COMMON_KNOWLEDGE)
+        self.specific_indicators = frozenset(SPECIFIC_INDICATORS)
+        self.keywords = KeywordMatcher(
+            PERSONAL_TOPICS + OPINION_WORDS + TIME_INDICATORS + CURRENT_TOPICS
+            + FACTUAL_TOPICS + COMMON_KNOWLEDGE + SPECIFIC_INDICATORS
+        )
+
+    def should_search(self, prompt: str, user_context: Dict = None, keywords=None) -> Tuple[bool, str, Dict]:
         """
         Determines if a prompt requires web search or personal response.
-        
+
+        ``keywords`` may carry a keyword scan of the prompt that was already
+        done by a caller (a superset of ``self.keywords`` hits, see PromptGuard).
+
         Returns:
             (should_search: bool, reason: str, search_info: dict)
         """
-        
+        lower_prompt = prompt.lower().strip()
+
         # Step 1: Explicit search requests (highest priority)
-        explicit_search = self._check_explicit_search_requests(prompt)
+        explicit_search = self._check_explicit_search_requests(prompt, lower_prompt)
         if explicit_search['is_search']:
             return True, "explicit_request", explicit_search
-        
+
         # Step 2: Personal questions and greetings (should NOT search)
-        personal_question = self._check_personal_questions(prompt)
+        personal_question = self._check_personal_questions(prompt, lower_prompt, keywords)
         if personal_question['is_personal']:
             return False, "personal_question", personal_question
-        
+
         # Step 3: Greetings and casual conversation (should NOT search)
-        casual_conversation = self._check_casual_conversation(prompt)
+        casual_conversation = self._check_casual_conversation(prompt, lower_prompt)
         if casual_conversation['is_casual']:
             return False, "casual_conversation", casual_conversation
-        
+
         # Step 4: Current events and time-sensitive queries
-        current_events = self._check_current_events(prompt)
+        if keywords is None:
+            keywords = self.keywords.find_all(lower_prompt)
+        current_events = self._check_current_events(prompt, lower_prompt, keywords)
         if current_events['is_current']:
             return True, "current_events", current_events
-        
+
         # Step 5: Factual information requests
-        factual_info = self._check_factual_requests(prompt)
+        factual_info = self._check_factual_requests(prompt, lower_prompt, keywords)
         if factual_info['needs_facts']:
             return True, "factual_information", factual_info
-        
+
         # Step 6: Context-based decisions
         context_decision = self._analyze_context(prompt, user_context)
         if context_decision['has_context']:
             return context_decision['should_search'], "context_based", context_decision
-        
+
         # Default: conversational response
         return False, "conversational", {"type": "general_chat"}
-    
-    def _check_explicit_search_requests(self, prompt: str) -> Dict:
+
+    def classify_many(self, prompts: Iterable[str], contexts=None,
+                      processes: Optional[int] = None,
+                      chunk_size: int = CLASSIFY_CHUNK_SIZE) -> List[SearchDecision]:
+        """
+        Classify a batch of prompts, e.g. to replay a prompt log offline.
+
+        A prompt that repeats with the same context is classified once per
+        chunk, and each distinct prompt gets one keyword scan shared by every
+        rule stage. Worker processes get a copy of this detector, so a
+        detector with modified rules classifies the same way in a pool.
+
+        Args:
+            prompts: Prompts to classify
+            contexts: None, one user context for every prompt, or a list of
+                contexts aligned with ``prompts``
+            processes: Split the work across this many worker processes
+                (None or 1 classifies in this process)
+            chunk_size: Prompts per task sent to a worker process
+
+        Returns:
+            list: One SearchDecision per prompt, in input order
+        """
+        prompts = list(prompts)
+        if contexts is None or isinstance(contexts, dict):
+            contexts = [contexts] * len(prompts)
+        elif len(contexts) != len(prompts):
+            raise ValueError("contexts must be aligned with prompts")
+
+        if not processes or processes <= 1 or len(prompts) <= chunk_size:
+            return _classify_chunk(self, list(zip(prompts, contexts)))
+
+        pairs = iter(zip(prompts, contexts))
+        chunks = iter(lambda: list(islice(pairs, chunk_size)), [])
+        results = []
+        with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(self,)) as pool:
+            for chunk_results in pool.imap(_classify_worker_chunk, chunks):
+                results.extend(map(SearchDecision._make, chunk_results))
+        return results
+
+    def _check_explicit_search_requests(self, prompt: str, lower_prompt: str = None) -> Dict:
         """Check for explicit search commands"""
-        explicit_patterns = [
-            r"search\s+(for\s+)?(.+)",
-            r"look\s+up\s+(.+)",
-            r"find\s+(information\s+)?(about\s+)?(.+)",
-            r"google\s+(.+)",
-            r"what\s+can\s+you\s+find\s+(about\s+)?(.+)",
-            r"research\s+(.+)",
-            r"give\s+me\s+info\s+(on\s+|about\s+)?(.+)",
-            r"can\s+you\s+search\s+",
-            r"please\s+search\s+",
-            r"i\s+need\s+information\s+about"
-        ]
-        
-        lower_prompt = prompt.lower().strip()
-        
-        for pattern in explicit_patterns:
-            match = re.search(pattern, lower_prompt)
-            if match:
-                # Extract the search query from the match
-                query = match.groups()[-1] if match.groups() else prompt
-                return {
-                    'is_search': True,
-                    'query': query.strip(),
-                    'confidence': 0.95,
-                    'type': 'explicit'
-                }
-        
+        if lower_prompt is None:
+            lower_prompt = prompt.lower().strip()
+
+        match = self.explicit_patterns.first(lower_prompt)
+        if match:
+            # Extract the search query from the match
+            _, groups = match
+            query = groups[-1] if groups else prompt
+            return {
+                'is_search': True,
+                'query': query.strip(),
+                'confidence': 0.95,
+                'type': 'explicit'
+            }
+
         return {'is_search': False}
-    
-    def _check_personal_questions(self, prompt: str) -> Dict:
+
+    def _check_personal_questions(self, prompt: str, lower_prompt: str = None, keywords=None) -> Dict:
         """Detect questions asking about AI's personal preferences/opinions"""
-        
-        # Patterns that indicate personal questions about the AI
-        personal_patterns = [
-            r"(what('s| is)\s+)?your?\s+(favourite|favorite|fav)\s+",
-            r"what\s+do\s+you\s+(like|enjoy|prefer|think|feel|recommend)",
-            r"do\s+you\s+(like|enjoy|have|prefer|think|believe|recommend)",
-            r"what('s| is)\s+your\s+(opinion|thought|view|take|preference)",
-            r"how\s+do\s+you\s+(feel|think)\s+about",
-            r"ur\s+(favourite|favorite|fav)\s+",
-            r"tell\s+me\s+(about\s+)?your\s+",
-            r"what\s+are\s+you\s+(into|interested)",
-            r"describe\s+your\s+",
-            r"what\s+would\s+you\s+(choose|pick|recommend)",
-            r"if\s+you\s+(had\s+to\s+)?(choose|pick)",
-            r"what('s| is)\s+your\s+(style|type|kind)",
-            r"which\s+do\s+you\s+(like|prefer)",
-            r"what\s+are\s+your\s+",
-            r"can\s+you\s+recommend\s+your\s+favorite"
-        ]
-        
-        # Personal topics that should get personal responses
-        personal_topics = [
-            "music", "song", "movie", "film", "food", "color", "hobby", "interest",
-            "book", "game", "sport", "activity", "place", "travel", "style",
-            "artist", "band", "genre", "album", "restaurant", "cuisine", "drink",
-            "vacation", "holiday", "season", "weather", "animal", "pet"
-        ]
-        
-        # Opinion/preference indicators
-        opinion_words = [
-            "opinion", "preference", "favorite", "favourite", "like", "dislike",
-            "enjoy", "hate", "love", "think", "feel", "believe", "recommend",
-            "suggest", "advise", "choose", "pick", "select"
-        ]
-        
-        lower_prompt = prompt.lower().strip()
-        
+        if lower_prompt is None:
+            lower_prompt = prompt.lower().strip()
+
         # Check for personal question patterns
-        for pattern in personal_patterns:
-            if re.search(pattern, lower_prompt):
-                # Check if it's about a personal topic
-                has_personal_topic = any(topic in lower_prompt for topic in personal_topics)
-                has_opinion_word = any(word in lower_prompt for word in opinion_words)
-                
-                confidence = 0.9 if has_personal_topic else 0.8 if has_opinion_word else 0.7
-                
-                return {
-                    'is_personal': True,
-                    'confidence': confidence,
-                    'type': 'personal_preference',
-                    'topic': self._extract_topic(lower_prompt, personal_topics),
-                    'detected_pattern': pattern
-                }
-        
+        match = self.personal_patterns.first(lower_prompt)
+        if match:
+            if keywords is None:
+                keywords = self.keywords.find_all(lower_prompt)
+            # Check if it's about a personal topic
+            has_personal_topic = not self.personal_topics.isdisjoint(keywords)
+            has_opinion_word = not self.opinion_words.isdisjoint(keywords)
+
+            confidence = 0.9 if has_personal_topic else 0.8 if has_opinion_word else 0.7
+
+            return {
+                'is_personal': True,
+                'confidence': confidence,
+                'type': 'personal_preference',
+                'topic': self._extract_topic(lower_prompt, PERSONAL_TOPICS, keywords),
+                'detected_pattern': self.personal_patterns.patterns[match[0]]
+            }
+
         return {'is_personal': False}
-    
-    def _check_casual_conversation(self, prompt: str) -> Dict:
+
+    def _check_casual_conversation(self, prompt: str, lower_prompt: str = None) -> Dict:
         """Check for greetings and casual conversation that should not trigger search"""
-        
-        # Common greetings and casual phrases
-        casual_patterns = [
-            r"^(hi|hello|hey|sup|wassup|what's up)(\s|$|!|\?)",
-            r"^(good\s+(morning|afternoon|evening|night))(\s|$|!|\?)",
-            r"^(how\s+(are\s+)?(you|ya|u)\s+(doing|going|been))(\s|$|!|\?)",
-            r"^(how('s| is)\s+(it\s+)?going)(\s|$|!|\?)",
-            r"^(how('s| is)\s+your\s+(day|morning|evening|night))(\s|$|!|\?)",
-            r"^(what('s| is)\s+up)(\s|$|!|\?)",
-            r"^(how\s+you\s+doing)(\s|$|!|\?)",
-            r"^(how\s+are\s+things)(\s|$|!|\?)",
-            r"^(how\s+have\s+you\s+been)(\s|$|!|\?)",
-            r"^(nice\s+to\s+(meet|see)\s+you)(\s|$|!|\?)",
-            r"^(thanks?|thank\s+you|ty)(\s|$|!|\?)",
-            r"^(you('re| are)\s+welcome|no\s+problem|np)(\s|$|!|\?)",
-            r"^(bye|goodbye|see\s+ya|cya|ttyl)(\s|$|!|\?)",
-            r"^(good\s+luck|have\s+a\s+good\s+(day|time))(\s|$|!|\?)",
-            r"^(take\s+care|be\s+safe)(\s|$|!|\?)"
-        ]
-        
-        # Simple conversational starters
-        conversation_starters = [
-            r"^(tell\s+me\s+about\s+yourself)(\s|$|!|\?)",
-            r"^(who\s+are\s+you)(\s|$|!|\?)",
-            r"^(what('s| is)\s+your\s+name)(\s|$|!|\?)",
-            r"^(nice\s+to\s+meet\s+you)(\s|$|!|\?)",
-            r"^(how\s+old\s+are\s+you)(\s|$|!|\?)",
-            r"^(where\s+are\s+you\s+from)(\s|$|!|\?)"
-        ]
-        
-        lower_prompt = prompt.lower().strip()
-        
-        # Check casual patterns
-        all_patterns = casual_patterns + conversation_starters
-        for pattern in all_patterns:
-            if re.search(pattern, lower_prompt):
-                return {
-                    'is_casual': True,
-                    'confidence': 0.95,
-                    'type': 'greeting_or_casual',
-                    'detected_pattern': pattern
-                }
-        
+        if lower_prompt is None:
+            lower_prompt = prompt.lower().strip()
+
+        # Check casual patterns and conversation starters
+        match = self.casual_patterns.first(lower_prompt)
+        if match:
+            return {
+                'is_casual': True,
+                'confidence': 0.95,
+                'type': 'greeting_or_casual',
+                'detected_pattern': self.casual_patterns.patterns[match[0]]
+            }
+
         return {'is_casual': False}
-    
-    def _check_current_events(self, prompt: str) -> Dict:
+
+    def _check_current_events(self, prompt: str, lower_prompt: str = None, keywords=None) -> Dict:
         """Check for current events and time-sensitive queries"""
-        
-        current_event_patterns = [
-            r"(latest|recent|current|today('s)?|this\s+(week|month))\s+(news|events?|updates?)",
-            r"what('s| is)\s+happening\s+(now|today|recently|lately)",
-            r"current\s+(status|situation|state)\s+of",
-            r"(breaking|recent)\s+news",
-            r"(today|yesterday|this\s+week)\s+in",
-            r"what('s| is)\s+(new|recent|latest)\s+(with|about|in)",
-            r"update\s+on\s+",
-            r"(stock|market|price)\s+(today|now|current)",
-            r"news\s+about\s+",
-            r"current\s+events"
-        ]
-        
-        # Time indicators that suggest current info needed
-        time_indicators = [
-            "now", "today", "currently", "recent", "latest", "this week",
-            "this month", "2024", "2025", "yesterday", "breaking", "live",
-            "real-time", "up-to-date", "fresh", "new"
-        ]
-        
-        # Topics that often need current info
-        current_topics = [
-            "news", "politics", "stock", "weather", "events", "crisis",
-            "election", "pandemic", "war", "market", "price", "update",
-            "cryptocurrency", "bitcoin", "covid", "virus", "outbreak",
-            "government", "president", "minister", "policy", "law"
-        ]
-        
-        lower_prompt = prompt.lower().strip()
-        
+        if lower_prompt is None:
+            lower_prompt = prompt.lower().strip()
+
         # Check patterns
-        for pattern in current_event_patterns:
-            if re.search(pattern, lower_prompt):
-                return {
-                    'is_current': True,
-                    'confidence': 0.9,
-                    'type': 'current_events',
-                    'query': prompt.strip()
-                }
-        
+        if self.current_event_patterns.search_any(lower_prompt):
+            return {
+                'is_current': True,
+                'confidence': 0.9,
+                'type': 'current_events',
+                'query': prompt.strip()
+            }
+
         # Check for time + topic combinations
-        has_time_indicator = any(indicator in lower_prompt for indicator in time_indicators)
-        has_current_topic = any(topic in lower_prompt for topic in current_topics)
-        
+        if keywords is None:
+            keywords = self.keywords.find_all(lower_prompt)
+        has_time_indicator = not self.time_indicators.isdisjoint(keywords)
+        has_current_topic = not self.current_topics.isdisjoint(keywords)
+
         if has_time_indicator and has_current_topic:
             return {
                 'is_current': True,
@@ -241,78 +385,38 @@ class IntelligentSearchDetector:
                 'type': 'time_sensitive',
                 'query': prompt.strip()
             }
-        
+
         return {'is_current': False}
-    
-    def _check_factual_requests(self, prompt: str) -> Dict:
+
+    def _check_factual_requests(self, prompt: str, lower_prompt: str = None, keywords=None) -> Dict:
         """Check for requests that need factual information"""
-        
-        # More precise question patterns that exclude greetings and personal questions
-        factual_question_patterns = [
-            r"^what\s+is\s+(?!your|up|happening|new|going|wrong)\w+",  # "what is X" but not "what is up/your/etc"
-            r"^when\s+(did|was|will|does|is)\s+",  # "when did/was/will/does/is"
-            r"^where\s+(is|was|can|does|did)\s+(?!you)",  # "where is/was" but not "where are you"
-            r"^who\s+(is|was|created|invented|discovered)\s+",  # "who is/was/created"
-            r"^why\s+(does|did|is|was|do)\s+",  # "why does/did/is"
-            r"^how\s+(does|did|can|to)\s+(?!you)",  # "how does/did/can/to" but not "how you"
-            r"^how\s+many\s+",  # "how many"
-            r"^how\s+much\s+",  # "how much" 
-            r"^how\s+long\s+",  # "how long"
-            r"^how\s+often\s+",  # "how often"
-            r"tell\s+me\s+about\s+(?!your|you)\w+",  # "tell me about X" but not about you
-            r"explain\s+(?!your|how\s+you)\w+",  # "explain X" but not "explain your"
-            r"define\s+\w+",  # "define word"
-            r"what\s+are\s+the\s+(?!you|your)\w+",  # "what are the X" but not about you
-            r"list\s+of\s+\w+",  # "list of X"
-            r"examples\s+of\s+\w+"  # "examples of X"
-        ]
-        
-        # Academic/technical/factual topics that usually need facts
-        factual_topics = [
-            "definition", "history", "science", "technology", "medicine",
-            "law", "mathematics", "physics", "chemistry", "biology",
-            "geography", "statistics", "data", "research", "study",
-            "theory", "concept", "principle", "formula", "equation",
-            "university", "college", "education", "academic", "scholarly",
-            "algorithm", "programming", "computer", "software", "hardware",
-            "anatomy", "disease", "symptom", "treatment", "diagnosis",
-            "country", "city", "population", "economy", "GDP", "culture",
-            "language", "literature", "author", "book", "philosophy"
-        ]
-        
-        # Avoid searching for common knowledge/philosophical questions
-        common_knowledge = [
-            "what is love", "what is happiness", "what is life", "what is death",
-            "how to be happy", "how to make friends", "what is art", "what is beauty",
-            "what is the meaning of life", "how to be successful", "what is friendship",
-            "how to be confident", "what is wisdom", "how to be good person"
-        ]
-        
-        lower_prompt = prompt.lower().strip()
-        
+        if lower_prompt is None:
+            lower_prompt = prompt.lower().strip()
+        if keywords is None:
+            keywords = self.keywords.find_all(lower_prompt)
+
         # Skip if it's common knowledge/philosophical
-        if any(ck in lower_prompt for ck in common_knowledge):
+        if not self.common_knowledge.isdisjoint(keywords):
             return {'needs_facts': False}
-        
-        # Check factual patterns
-        for pattern in factual_question_patterns:
-            if re.search(pattern, lower_prompt):
-                has_factual_topic = any(topic in lower_prompt for topic in factual_topics)
-                
-                # Calculate basic specificity (specific terms, numbers, etc.)
-                specificity_score = self._calculate_specificity(prompt)
-                
-                # Require higher confidence for factual requests
-                if specificity_score > 0.4 or has_factual_topic or len(prompt.split()) > 5:
-                    return {
-                        'needs_facts': True,
-                        'confidence': 0.7 + (specificity_score * 0.2),
-                        'type': 'factual_request',
-                        'query': prompt.strip()
-                    }
-        
+
+        # Check factual patterns (the outcome does not depend on which one matched)
+        if self.factual_question_patterns.search_any(lower_prompt):
+            has_factual_topic = not self.factual_topics.isdisjoint(keywords)
+
+            # Calculate basic specificity (specific terms, numbers, etc.)
+            specificity_score = self._calculate_specificity(prompt, keywords)
+
+            # Require higher confidence for factual requests
+            if specificity_score > 0.4 or has_factual_topic or len(prompt.split()) > 5:
+                return {
+                    'needs_facts': True,
+                    'confidence': 0.7 + (specificity_score * 0.2),
+                    'type': 'factual_request',
+                    'query': prompt.strip()
+                }
+
         return {'needs_facts': False}
-    
+
     def _analyze_context(self, prompt: str, user_context: Dict = None) -> Dict:
         """Analyze user context and conversation history"""
         
@@ -352,40 +456,67 @@ class IntelligentSearchDetector:
         
         return context_decision
     
-    def _extract_topic(self, prompt: str, topic_list: List[str]) -> Optional[str]:
+    def _extract_topic(self, prompt: str, topic_list: List[str], keywords=None) -> Optional[str]:
         """Extract the main topic from a prompt"""
         for topic in topic_list:
-            if topic in prompt:
+            if (topic in keywords) if keywords is not None else (topic in prompt):
                 return topic
         return None
-    
-    def _calculate_specificity(self, prompt: str) -> float:
+
+    def _calculate_specificity(self, prompt: str, keywords=None) -> float:
         """Calculate how specific a prompt is (0.0 to 1.0) without external libraries"""
-        
-        # Basic specificity indicators
-        specific_indicators = [
-            "specific", "exactly", "precisely", "detailed", "comprehensive",
-            "thorough", "complete", "full", "entire", "exact", "particular",
-            "certain", "definite", "explicit", "clear"
-        ]
-        
+        if keywords is None:
+            keywords = self.keywords.find_all(prompt.lower())
+
         # Count numbers, capital letters (proper nouns), and specific terms
-        numbers = len(re.findall(r'\d+', prompt))
-        capitals = len(re.findall(r'[A-Z][a-zA-Z]+', prompt))
-        specific_terms = sum(1 for indicator in specific_indicators 
-                           if indicator in prompt.lower())
-        
+        numbers = len(_NUMBER_RE.findall(prompt))
+        capitals = len(_CAPITALIZED_RE.findall(prompt))
+        specific_terms = len(self.specific_indicators.intersection(keywords))
+
         # Calculate specificity
         total_words = len(prompt.split())
         if total_words == 0:
             return 0.0
-        
+
         specificity = (numbers + capitals + specific_terms) / total_words
         return min(specificity, 1.0)
 
+def _classify_chunk(detector, pairs):
+    """Classify (prompt, context) pairs, deciding each distinct pair once"""
+    find_keywords = detector.keywords.find_all
+    should_search = detector.should_search
+    from_result = SearchDecision.from_result
+    # Contexts are compared by identity: a shared context is one object
+    # (also after pickling), and ``pairs`` keeps every context alive
+    decisions = {}
+    results = []
+    for prompt, context in pairs:
+        key = (prompt, id(context))
+        decision = decisions.get(key)
+        if decision is None:
+            keywords = find_keywords(prompt.lower().strip())
+            decision = decisions[key] = from_result(should_search(prompt, context, keywords=keywords))
+        results.append(decision)
+    return results
+
+
+# Per-process copy of the detector used by classify_many worker processes
+_worker_detector = None
+
+
+def _init_worker(detector):
+    global _worker_detector
+    _worker_detector = detector
+
+
+def _classify_worker_chunk(pairs):
+    # Plain tuples pickle smaller than named tuples on the way back
+    return [tuple(decision) for decision in _classify_chunk(_worker_detector, pairs)]
+
 # Integration function for your groq_api.py
 def integrate_with_groq_api(prompt: str, user_email: str, detector: IntelligentSearchDetector, 
-                           load_memory_func, get_user_preference_func):
+                           load_memory_func, get_user_preference_func, debug: bool = SEARCH_DEBUG,
+                           keywords=None):
     """
     Integration function for your existing groq_api.py
     Call this before your current search logic
@@ -401,11 +532,12 @@ def integrate_with_groq_api(prompt: str, user_email: str, detector: IntelligentS
     }
     
     # Get search decision
-    should_search, reason, info = detector.should_search(prompt, user_context)
+    should_search, reason, info = detector.should_search(prompt, user_context, keywords=keywords)
     
     # Log the decision for debugging
-    print(f"🔍 SEARCH DECISION: {should_search}")
-    print(f"📝 REASON: {reason}")
-    print(f"ℹ️  INFO: {info}")
+    if debug:
+        print(f"🔍 SEARCH DECISION: {should_search}")
+        print(f"📝 REASON: {reason}")
+        print(f"ℹ️  INFO: {info}")
     
     return should_search, reason, info
\ No newline at end of file
@@ -0,0 +1,134 @@
+# modules/search/search_cache.py
+"""
+Search result cache shared by all users.
+
+Results are keyed by the normalized query and kept for a limited time in a
+bounded LRU map. Concurrent lookups of the same query are coalesced: the
+first caller runs the fetch (web search + Groq summary) and every other
+caller waits for and shares that result instead of fetching again.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+SEARCH_CACHE_TTL = float(os.environ.get("SEARCH_CACHE_TTL", "600"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.environ.get("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+# Longest a caller waits for another caller's in-flight fetch of the same query
+SEARCH_CACHE_WAIT_TIMEOUT = float(os.environ.get("SEARCH_CACHE_WAIT_TIMEOUT", "120"))
+
+# Sentence punctuation and quotes around words do not change a query; anything
+# else ("C++", "C#", "3.5") does and stays in the key
+_EDGE_PUNCT = ".,;:!?\"'()[]{}\u00bf\u00a1\u2026\u3001\u3002\uff01\uff0c\uff1f"
+
+
+def normalize_query(query):
+    """
+    Cache key for a query: casefolded words separated by single spaces.
+
+    Returns "" for a query with no words; such queries are never cached or
+    coalesced.
+    """
+    words = (word.strip(_EDGE_PUNCT) for word in query.casefold().split())
+    return " ".join(word for word in words if word)
+
+
+class _InFlight:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SharedSearchCache:
+    """TTL + size bounded query cache with in-flight request coalescing."""
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, max_entries=SEARCH_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, result)
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, query):
+        """Return the cached result for ``query``, or None if missing or expired"""
+        key = normalize_query(query)
+        if not key:
+            return None
+        with self._lock:
+            return self._get(key)
+
+    def _get(self, key):
+        cached = self._entries.get(key)
+        if cached is None:
+            return None
+        expires_at, result = cached
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def put(self, query, result):
+        key = normalize_query(query)
+        if not key:
+            return
+        with self._lock:
+            self._put(key, result)
+
+    def _put(self, key, result):
+        self._entries[key] = (time.monotonic() + self.ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get_or_fetch(self, query, fetch, cacheable=None):
+        """
+        Return the cached result for ``query`` or compute it with ``fetch()``.
+
+        Only one ``fetch`` per normalized query runs at a time; concurrent callers
+        wait for it and get the same result (or exception). Results for which
+        ``cacheable(result)`` is false are shared with waiters but not cached.
+        """
+        key = normalize_query(query)
+        if not key:
+            return fetch()
+        with self._lock:
+            result = self._get(key)
+            if result is not None:
+                return result
+            in_flight = self._in_flight.get(key)
+            leader = in_flight is None
+            if leader:
+                in_flight = self._in_flight[key] = _InFlight()
+
+        if not leader:
+            if not in_flight.done.wait(SEARCH_CACHE_WAIT_TIMEOUT):
+                return fetch()  # Leader is stuck; do not hang this request too
+            if in_flight.error is not None:
+                raise in_flight.error
+            return in_flight.result
+
+        try:
+            in_flight.result = fetch()
+        except BaseException as e:
+            in_flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if in_flight.error is None and (cacheable is None or cacheable(in_flight.result)):
+                    self._put(key, in_flight.result)
+                del self._in_flight[key]
+            in_flight.done.set()
+        return in_flight.result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# Shared by every user of this process
+search_cache = SharedSearchCache()
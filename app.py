@@ -6,27 +6,31 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from starlette.middleware.sessions import SessionMiddleware
 from starlette.requests import Request
 from starlette.responses import Response
+import asyncio
 import os
 import sys
+from contextlib import asynccontextmanager
 import sentry_sdk
 from sentry_sdk.integrations.fastapi import FastApiIntegration
 from pydantic import BaseModel
-from typing import Optional, Dict, Any, Generator
+from typing import Optional, Dict, Any, AsyncGenerator
 import uvicorn
 
 # Import modules with proper error handling
 try:
-    from AI.groq_api import get_groq_response_stream
+    from AI.groq_api import get_groq_response_stream_async
 except ImportError as e:
     print(f"ERROR: Could not import groq_api: {e}")
     sys.exit(1)
 
 try:
-    import database
+    import async_database
 except ImportError as e:
     print(f"ERROR: Could not import database: {e}")
     sys.exit(1)
 
+import groq_client
+
 # Import personality profiler functions
 try:
     from AI.modules.personality.personality_profiler import (
@@ -34,11 +38,20 @@ try:
         get_personality_system_prompt,
         get_user_personality_stats
     )
+    from AI.modules.personality.profile_worker import stop_profile_refresh
     PERSONALITY_AVAILABLE = True
 except ImportError as e:
     print(f"WARNING: Could not import personality_profiler: {e}")
     PERSONALITY_AVAILABLE = False
 
+# Trailer ending a /chat-stream response whose turn the server saves: a record
+# separator and whether the save worked. The client posts the turn to
+# /api/chat-sessions/{id}/turns only after TURN_NOT_SAVED, so a stream that
+# breaks after a successful save is never saved twice.
+TURN_STATUS = "\x1e"
+TURN_SAVED = TURN_STATUS + "saved"
+TURN_NOT_SAVED = TURN_STATUS + "not-saved"
+
 class ChatSessionCreate(BaseModel):
     title: str = "New Chat"
 
@@ -59,8 +72,13 @@ class MessageResponse(BaseModel):
     content: str
     created_at: str
 # Pydantic models for request/response validation
+class TurnCreate(BaseModel):
+    user_message: str
+    assistant_message: str
+
 class ChatMessage(BaseModel):
     message: str
+    session_id: Optional[str] = None  # The finished turn is saved to this session
 
 class LoginRequest(BaseModel):
     email: str
@@ -82,11 +100,53 @@ class PersonalityInsight(BaseModel):
     description: str
     icon: str
 
+# Helper function to get memory module
+def get_memory_module():
+    """Safely import memory module"""
+    try:
+        import memory
+        return memory
+    except ImportError as e:
+        print(f"WARNING: Could not import memory module: {e}")
+        return None
+
+async def verify_database():
+    """Connect to Supabase and check the users table without holding up startup"""
+    if not await async_database.init_db():
+        print("WARNING: Database initialization failed. The application may not work correctly.")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start background work when the server starts and release it on shutdown.
+
+    Nothing here blocks startup: the database check runs as a task on the
+    database thread pool while requests are already being served.
+    """
+    # Start memory compaction, resuming any left pending by a previous run
+    memory_module = get_memory_module()
+    if memory_module and hasattr(memory_module, "start_compaction_worker"):
+        memory_module.start_compaction_worker()
+    database_check = asyncio.create_task(verify_database())
+    try:
+        yield
+    finally:
+        database_check.cancel()
+        # Queued profile refreshes still write to memory, so they finish first
+        if PERSONALITY_AVAILABLE:
+            stop_profile_refresh()
+        if memory_module and hasattr(memory_module, "stop_compaction_worker"):
+            memory_module.stop_compaction_worker()
+        async_database.shutdown(wait=False)
+        await groq_client.aclose()
+        groq_client.close()
+
 def create_app() -> FastAPI:
     app = FastAPI(
         title="Cereal AI Chat",
         description="AI-powered chat application with personality profiling",
-        version="2.0.0"
+        version="2.0.0",
+        lifespan=lifespan
     )
 
     # Initialize Sentry first
@@ -107,6 +167,11 @@ def create_app() -> FastAPI:
         print("CRITICAL WARNING: FLASK_SECRET_KEY environment variable not set. Session security compromised. Exiting.")
         sys.exit(1)
 
+    # The database connection itself is made by the first query
+    if not os.environ.get("SUPABASE_URL") or not os.environ.get("SUPABASE_ANON_KEY"):
+        print("ERROR: SUPABASE_URL and SUPABASE_ANON_KEY environment variables must be set")
+        sys.exit(1)
+
     app.add_middleware(SessionMiddleware, secret_key=secret_key)
 
     # Static files and templates
@@ -163,19 +228,6 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=401, detail="Unauthorized")
         return user
 
-    # Helper function to get memory module
-    def get_memory_module():
-        """Safely import memory module"""
-        try:
-            memory_path = os.path.join(os.path.dirname(__file__), "memory")
-            if memory_path not in sys.path:
-                sys.path.append(memory_path)
-            import memory
-            return memory
-        except ImportError as e:
-            print(f"WARNING: Could not import memory module: {e}")
-            return None
-
     # Routes
     @app.get("/", response_class=HTMLResponse)
     async def home(request: Request):
@@ -195,9 +247,9 @@ def create_app() -> FastAPI:
         password: str = Form(...)
     ):
         try:
-            user = database.get_user_by_email(email)
+            user = await async_database.get_user_by_email(email)
             
-            if user and database.verify_password(user['password'], password):
+            if user and await async_database.verify_password(user['password'], password):
                 request.session['user'] = user['email']
                 return RedirectResponse(url="/chat", status_code=303)
             else:
@@ -234,7 +286,7 @@ def create_app() -> FastAPI:
         try:
             # Call streaming but collect full response before sending JSON
             full_response = ""
-            for chunk in get_groq_response_stream(chat_message.message, user_email):
+            async for chunk in get_groq_response_stream_async(chat_message.message, user_email):
                 full_response += chunk
 
             return {"response": full_response}
@@ -249,15 +301,43 @@ def create_app() -> FastAPI:
         if not chat_message.message:
             raise HTTPException(status_code=400, detail="No message provided")
 
-        def generate() -> Generator[str, None, None]:
-            try:
-                for token in get_groq_response_stream(chat_message.message, user_email):
-                    yield token
-            except Exception as e:
-                print(f"ERROR in stream_chat: {e}")
-                yield f"Error: {str(e)}"
+        # Save the finished turn here rather than having the client post it back
+        session_id = chat_message.session_id
+        persist = bool(session_id) and await async_database.user_owns_chat_session(session_id, user_email)
 
-        return StreamingResponse(generate(), media_type='text/plain')
+        async def generate() -> AsyncGenerator[str, None]:
+            tokens = []
+            save_started = False
+            try:
+                try:
+                    async for token in get_groq_response_stream_async(chat_message.message, user_email):
+                        tokens.append(token)
+                        yield token
+                except Exception as e:
+                    print(f"ERROR in stream_chat: {e}")
+                    error = f"Error: {str(e)}"
+                    tokens.append(error)
+                    yield error
+
+                # Saved whether generation finished or failed; the trailer tells
+                # the client whether it has to post the turn itself
+                if persist:
+                    save_started = True
+                    saved = await async_database.save_chat_turn(
+                        session_id, user_email, chat_message.message, "".join(tokens)
+                    )
+                    yield TURN_SAVED if saved else TURN_NOT_SAVED
+            finally:
+                if persist and not save_started:
+                    # The client went away mid-stream and gets no trailer, so it
+                    # does not post the turn; save what was generated so far
+                    async_database.save_chat_turn_later(
+                        session_id, user_email, chat_message.message, "".join(tokens)
+                    )
+
+        # The server saves the turn and ends the stream with a TURN_STATUS trailer
+        headers = {"X-Chat-Turn-Saving": "1"} if persist else None
+        return StreamingResponse(generate(), media_type='text/plain', headers=headers)
 
     @app.get("/memory-stats")
     async def memory_stats(request: Request):
@@ -506,16 +586,15 @@ def create_app() -> FastAPI:
         )
     
     @app.get("/api/chat-sessions")
-    async def get_chat_sessions(request: Request):
-        """Get all chat sessions for the current user"""
+    async def get_chat_sessions(request: Request, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """Get a page of the current user's chat sessions, most recently updated first"""
         user_email = require_auth(request)
 
         try:
-            sessions = database.get_user_chat_sessions(user_email)
-            for session_data in sessions:
-                if 'session_id' in session_data:
-                    session_data['session_id'] = str(session_data['session_id'])
-            return sessions
+            sessions, next_cursor = await async_database.get_chat_sessions_page(user_email, limit, cursor)
+            return {"sessions": sessions, "next_cursor": next_cursor}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             print(f"Error retrieving chat sessions: {e}")
             raise HTTPException(status_code=500, detail="Failed to retrieve chat sessions")
@@ -526,7 +605,7 @@ def create_app() -> FastAPI:
         data = await request.json()
         title = data.get('title', 'New Chat')
         try:
-            session_data = database.create_chat_session(user_email, title)
+            session_data = await async_database.create_chat_session(user_email, title)
             if session_data:
                 return {
                     "session_id": str(session_data['session_id']),
@@ -545,7 +624,7 @@ def create_app() -> FastAPI:
         """Delete a chat session"""
         user_email = require_auth(request)
         try:
-            success = database.delete_chat_session(session_id, user_email)
+            success = await async_database.delete_chat_session(session_id, user_email)
             if success:
                 return {"message": "Session deleted successfully"}
             else:
@@ -555,27 +634,22 @@ def create_app() -> FastAPI:
             raise HTTPException(status_code=500, detail="Failed to delete chat session")
     
     @app.get("/api/chat-sessions/{session_id}/messages")
-    async def get_session_messages(request: Request, session_id: str):
-        """Get all messages for a specific chat session"""
+    async def get_session_messages(request: Request, session_id: str, limit: Optional[int] = None, cursor: Optional[str] = None):
+        """
+        Get a page of messages for a specific chat session: the newest
+        messages first, ``next_cursor`` pages back to older ones
+        """
         user_email = require_auth(request)
     
-        try:
         # First verify the session belongs to the user
-            sessions = database.get_user_chat_sessions(user_email)
-            session_exists = any(str(s['session_id']) == str(session_id) for s in sessions)
-        
-            if not session_exists:
-                raise HTTPException(status_code=404, detail="Session not found or unauthorized")
-        
-            messages = database.get_chat_messages(session_id)
-        # Convert UUID to string for JSON serialization
-            for message in messages:
-                if 'message_id' in message:
-                     message['message_id'] = str(message['message_id'])
-                if 'session_id' in message:
-                     message['session_id'] = str(message['session_id'])
-        
-            return {"messages": messages}
+        if not await async_database.user_owns_chat_session(session_id, user_email):
+            raise HTTPException(status_code=404, detail="Session not found or unauthorized")
+    
+        try:
+            messages, next_cursor = await async_database.get_chat_messages_page(session_id, limit, cursor)
+            return {"messages": messages, "next_cursor": next_cursor}
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
             print(f"Error retrieving session messages: {e}")
             raise HTTPException(status_code=500, detail="Failed to retrieve messages")
@@ -596,13 +670,10 @@ def create_app() -> FastAPI:
     
         try:
         # First verify the session belongs to the user
-            sessions = database.get_user_chat_sessions(user_email)
-            session_exists = any(str(s['session_id']) == str(session_id) for s in sessions)
-        
-            if not session_exists:
+            if not await async_database.user_owns_chat_session(session_id, user_email):
                 raise HTTPException(status_code=404, detail="Session not found or unauthorized")
         
-            message_data = database.save_chat_message(session_id, user_email, message_type, content)
+            message_data = await async_database.save_chat_message(session_id, user_email, message_type, content)
             if message_data:
             # Convert UUID to string for JSON serialization
                  message_data['message_id'] = str(message_data['message_id'])
@@ -614,13 +685,36 @@ def create_app() -> FastAPI:
             print(f"Error saving session message: {e}")
             raise HTTPException(status_code=500, detail="Failed to save message")
 
+    @app.post("/api/chat-sessions/{session_id}/turns")
+    async def save_session_turn(request: Request, session_id: str, turn: TurnCreate):
+        """Save a user message and the assistant's reply to a chat session in one batch"""
+        user_email = require_auth(request)
+    
+        if not turn.user_message or not turn.assistant_message:
+             raise HTTPException(status_code=400, detail="user_message and assistant_message are required")
+    
+        if not await async_database.user_owns_chat_session(session_id, user_email):
+            raise HTTPException(status_code=404, detail="Session not found or unauthorized")
+    
+        messages = await async_database.save_chat_turn(
+            session_id, user_email, turn.user_message, turn.assistant_message
+        )
+        if not messages:
+            raise HTTPException(status_code=500, detail="Failed to save messages")
+    
+        # Convert UUID to string for JSON serialization
+        for message in messages:
+            message['message_id'] = str(message['message_id'])
+            message['session_id'] = str(message['session_id'])
+        return {"message": "Messages saved successfully", "data": messages}
+
     @app.get("/api/user-info")
     async def get_user_info(request: Request) -> UserResponse:
         """API endpoint to get current user information"""
         user_email = require_auth(request)
         
         try:
-            user = database.get_user_by_email(user_email)
+            user = await async_database.get_user_by_email(user_email)
             if user:
                 return UserResponse(
                     email=user['email'],
@@ -674,7 +768,7 @@ def create_app() -> FastAPI:
             )
 
         try:
-            if database.add_user(email, password):
+            if await async_database.add_user(email, password):
                 request.session['user'] = email
             # Initialize user preferences when they sign up
                 memory_module = get_memory_module()
@@ -0,0 +1,96 @@
+# async_database.py
+"""
+Awaitable access to database.py for the async route handlers.
+
+The Supabase client in database.py is synchronous, so calling it from an
+``async def`` route runs the network round-trip on the event loop thread
+and stalls every response streaming from the same worker. The functions
+here run the database.py functions on a bounded thread pool of their own
+(separate from the default executor used for other blocking work), so at
+most DB_EXECUTOR_WORKERS queries are in flight and the event loop keeps
+serving streams meanwhile.
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import database
+
+DB_EXECUTOR_WORKERS = int(os.environ.get("DB_EXECUTOR_WORKERS", "8"))
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the database thread pool, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db"
+                )
+    return _executor
+
+
+async def run(func, *args, **kwargs):
+    """Run a blocking database call on the database thread pool and await it"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def submit(func, *args, **kwargs):
+    """
+    Start a blocking database call on the database thread pool without
+    waiting for it; it runs to completion even if the caller is cancelled.
+    """
+    return get_executor().submit(func, *args, **kwargs)
+
+
+def shutdown(wait=True):
+    """Stop the database thread pool (a later call creates a new one)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _offload(func):
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        return await run(func, *args, **kwargs)
+    return wrapper
+
+
+# Creates the client and checks the connection; run as a startup task
+init_db = _offload(database.init_db)
+
+# Password hashing and checking are deliberately slow, so they are offloaded too
+add_user = _offload(database.add_user)
+verify_password = _offload(database.verify_password)
+get_user_by_email = _offload(database.get_user_by_email)
+get_user_by_id = _offload(database.get_user_by_id)
+update_user_password = _offload(database.update_user_password)
+delete_user = _offload(database.delete_user)
+create_chat_session = _offload(database.create_chat_session)
+get_user_chat_sessions = _offload(database.get_user_chat_sessions)
+get_chat_messages = _offload(database.get_chat_messages)
+get_chat_sessions_page = _offload(database.get_chat_sessions_page)
+get_chat_messages_page = _offload(database.get_chat_messages_page)
+save_chat_message = _offload(database.save_chat_message)
+save_chat_turn = _offload(database.save_chat_turn)
+save_chat_turn_later = functools.partial(submit, database.save_chat_turn)
+delete_chat_session = _offload(database.delete_chat_session)
+
+
+async def user_owns_chat_session(session_id, user_email):
+    """Ownership check that answers from the cache without leaving the event loop"""
+    owned = database.cached_session_ownership(session_id, user_email)
+    if owned is not None:
+        return owned
+    return await run(database.user_owns_chat_session, session_id, user_email)
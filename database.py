@@ -1,21 +1,52 @@
 # database.py
 import os
-import sys
-from supabase import create_client, Client
 from werkzeug.security import generate_password_hash, check_password_hash
 import uuid
-from datetime import datetime
+import base64
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
 
 # Supabase configuration
 SUPABASE_URL = os.environ.get("SUPABASE_URL")
 SUPABASE_KEY = os.environ.get("SUPABASE_ANON_KEY")
 
-if not SUPABASE_URL or not SUPABASE_KEY:
-    print("ERROR: SUPABASE_URL and SUPABASE_ANON_KEY environment variables must be set")
-    sys.exit(1)
+# The Supabase client (and the supabase package itself) is loaded by the
+# first query, so importing this module makes no network calls
+_supabase = None
+_supabase_lock = threading.Lock()
 
-# Initialize Supabase client
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
+# Confirmed session ownership is cached for SESSION_OWNER_CACHE_TTL seconds
+# (at most SESSION_OWNER_CACHE_MAX entries); creating or deleting a session
+# updates the cache right away. "Not owned" is never cached: a session that
+# was just created elsewhere must not be refused for a whole TTL.
+SESSION_OWNER_CACHE_TTL = float(os.environ.get("SESSION_OWNER_CACHE_TTL", "60"))
+SESSION_OWNER_CACHE_MAX = int(os.environ.get("SESSION_OWNER_CACHE_MAX", "10000"))
+
+_session_owners = OrderedDict()  # (session_id, user_email) -> expires
+_session_owners_lock = threading.Lock()
+
+# Pagination of sessions and messages; only these columns are sent to clients
+DEFAULT_PAGE_SIZE = int(os.environ.get("CHAT_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = 200
+SESSION_COLUMNS = 'session_id,title,created_at,updated_at'
+_CURSOR_TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}[T ][\d:.]+(Z|[+-]\d{2}(:?\d{2})?)?$')
+MESSAGE_COLUMNS = 'message_id,session_id,message_type,content,created_at'
+
+def get_supabase():
+    """Return the shared Supabase client, creating it on first use."""
+    global _supabase
+    if _supabase is None:
+        with _supabase_lock:
+            if _supabase is None:
+                if not SUPABASE_URL or not SUPABASE_KEY:
+                    raise RuntimeError("SUPABASE_URL and SUPABASE_ANON_KEY environment variables must be set")
+                from supabase import create_client
+                _supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+    return _supabase
 
 def init_db():
     """
@@ -25,7 +56,7 @@ def init_db():
     """
     try:
         # Test the connection by attempting to query the users table
-        result = supabase.table('users').select('id').limit(1).execute()
+        result = get_supabase().table('users').select('id').limit(1).execute()
         print("Database connection verified successfully")
         return True
     except Exception as e:
@@ -42,7 +73,7 @@ def add_user(email, password):
     hashed_password = generate_password_hash(password)
     
     try:
-        result = supabase.table('users').insert({
+        result = get_supabase().table('users').insert({
             'email': email,
             'password': hashed_password
         }).execute()
@@ -59,7 +90,7 @@ def add_user(email, password):
 def get_user_by_email(email):
     """Retrieve a user by their email address"""
     try:
-        result = supabase.table('users').select('*').eq('email', email).execute()
+        result = get_supabase().table('users').select('*').eq('email', email).execute()
         
         if result.data and len(result.data) > 0:
             return result.data[0]  # Return the first (and should be only) user
@@ -75,7 +106,7 @@ def verify_password(hashed_password, password):
 def get_user_by_id(user_id):
     """Retrieve a user by their ID (helper function for potential future use)"""
     try:
-        result = supabase.table('users').select('*').eq('id', user_id).execute()
+        result = get_supabase().table('users').select('*').eq('id', user_id).execute()
         
         if result.data and len(result.data) > 0:
             return result.data[0]
@@ -89,7 +120,7 @@ def update_user_password(email, new_password):
     hashed_password = generate_password_hash(new_password)
     
     try:
-        result = supabase.table('users').update({
+        result = get_supabase().table('users').update({
             'password': hashed_password
         }).eq('email', email).execute()
         
@@ -101,7 +132,7 @@ def update_user_password(email, new_password):
 def delete_user(email):
     """Delete a user by email (helper function for potential future use)"""
     try:
-        result = supabase.table('users').delete().eq('email', email).execute()
+        result = get_supabase().table('users').delete().eq('email', email).execute()
         return len(result.data) > 0
     except Exception as e:
         print(f"Error deleting user: {e}")
@@ -144,20 +175,130 @@ def validate_database_schema(supabase_client):
 def create_chat_session(user_email, title=None):
     """Create a new chat session"""
     try:
+        now = datetime.now(timezone.utc)
         session_data = {
             'user_email': user_email,
-            'title': title or f"Chat {datetime.now().strftime('%Y-%m-%d %H:%M')}"
+            'title': title or f"Chat {now.astimezone().strftime('%Y-%m-%d %H:%M')}",
+            # Same clock as the message timestamps that later bump updated_at
+            'created_at': now.isoformat(),
+            'updated_at': now.isoformat()
         }
-        result = supabase.table('chat_sessions').insert(session_data).execute()
+        result = get_supabase().table('chat_sessions').insert(session_data).execute()
+        if result.data:
+            _remember_session_owner(result.data[0]['session_id'], user_email)
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error creating chat session: {e}")
         return None
 
+def _remember_session_owner(session_id, user_email):
+    with _session_owners_lock:
+        key = (str(session_id), user_email)
+        _session_owners[key] = time.monotonic() + SESSION_OWNER_CACHE_TTL
+        _session_owners.move_to_end(key)
+        while len(_session_owners) > SESSION_OWNER_CACHE_MAX:
+            _session_owners.popitem(last=False)
+
+def _forget_session_owner(session_id, user_email):
+    with _session_owners_lock:
+        _session_owners.pop((str(session_id), user_email), None)
+
+def cached_session_ownership(session_id, user_email):
+    """True if the user's ownership of the session is cached, else None (ask the database)"""
+    with _session_owners_lock:
+        expires = _session_owners.get((str(session_id), user_email))
+        if expires is None:
+            return None
+        if expires < time.monotonic():
+            del _session_owners[(str(session_id), user_email)]
+            return None
+        return True
+
+def user_owns_chat_session(session_id, user_email):
+    """Check that a chat session exists and belongs to the user"""
+    owned = cached_session_ownership(session_id, user_email)
+    if owned is not None:
+        return owned
+    try:
+        result = get_supabase().table('chat_sessions').select('session_id').eq('session_id', session_id).eq('user_email', user_email).limit(1).execute()
+        owned = bool(result.data)
+    except Exception as e:
+        print(f"Error checking chat session ownership: {e}")
+        return False
+    if owned:
+        _remember_session_owner(session_id, user_email)
+    return owned
+
+def encode_cursor(timestamp, row_id):
+    """Opaque page cursor for the keyset (timestamp, row_id)"""
+    return base64.urlsafe_b64encode(json.dumps([timestamp, str(row_id)]).encode()).decode()
+
+def decode_cursor(cursor):
+    """
+    Inverse of encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        # Both end up inside a PostgREST filter, so only well-formed values pass
+        if not _CURSOR_TIMESTAMP_RE.match(timestamp):
+            raise ValueError(timestamp)
+        return timestamp, str(uuid.UUID(row_id))
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+def _keyset_page(query, time_column, id_column, limit, cursor):
+    """
+    Fetch one page of ``query`` ordered newest first by (time_column, id_column).
+
+    Returns:
+        tuple: (rows, next_cursor), next_cursor is None on the last page
+    """
+    limit = max(1, min(limit or DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE))
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        # Rows strictly after the cursor in (time, id) descending order
+        query = query.or_(
+            f'{time_column}.lt."{timestamp}",'
+            f'and({time_column}.eq."{timestamp}",{id_column}.lt.{row_id})'
+        )
+    # One extra row tells whether another page follows
+    result = query.order(time_column, desc=True).order(id_column, desc=True).limit(limit + 1).execute()
+    rows = result.data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1][time_column], rows[-1][id_column])
+
+def get_chat_sessions_page(user_email, limit=None, cursor=None):
+    """
+    Get one page of a user's chat sessions, most recently updated first.
+
+    Returns:
+        tuple: (sessions, next_cursor)
+    """
+    query = get_supabase().table('chat_sessions').select(SESSION_COLUMNS).eq('user_email', user_email)
+    return _keyset_page(query, 'updated_at', 'session_id', limit, cursor)
+
+def get_chat_messages_page(session_id, limit=None, cursor=None):
+    """
+    Get one page of a session's messages. Pages run from the newest messages
+    back in time; the messages within a page are oldest first.
+
+    Returns:
+        tuple: (messages, next_cursor for the older messages)
+    """
+    query = get_supabase().table('chat_messages').select(MESSAGE_COLUMNS).eq('session_id', session_id)
+    messages, next_cursor = _keyset_page(query, 'created_at', 'message_id', limit, cursor)
+    messages.reverse()
+    return messages, next_cursor
+
 def get_user_chat_sessions(user_email):
     """Get all chat sessions for a user"""
     try:
-        result = supabase.table('chat_sessions').select('*').eq('user_email', user_email).order('updated_at', desc=True).execute()
+        result = get_supabase().table('chat_sessions').select(SESSION_COLUMNS).eq('user_email', user_email).order('updated_at', desc=True).execute()
         return result.data
     except Exception as e:
         print(f"Error retrieving chat sessions: {e}")
@@ -166,7 +307,7 @@ def get_user_chat_sessions(user_email):
 def get_chat_messages(session_id):
     """Get all messages for a chat session"""
     try:
-        result = supabase.table('chat_messages').select('*').eq('session_id', session_id).order('created_at').execute()
+        result = get_supabase().table('chat_messages').select(MESSAGE_COLUMNS).eq('session_id', session_id).order('created_at').order('message_id').execute()
         return result.data
     except Exception as e:
         print(f"Error retrieving chat messages: {e}")
@@ -181,25 +322,64 @@ def save_chat_message(session_id, user_email, message_type, content):
             'message_type': message_type,
             'content': content
         }
-        result = supabase.table('chat_messages').insert(message_data).execute()
+        # Aware UTC from the app clock, the same source as the session's updated_at
+        created_at = datetime.now(timezone.utc).isoformat()
+        message_data['created_at'] = created_at
+        result = get_supabase().table('chat_messages').insert(message_data).execute()
         
         # Update session's updated_at timestamp
-        supabase.table('chat_sessions').update({'updated_at': datetime.now().isoformat()}).eq('session_id', session_id).execute()
+        get_supabase().table('chat_sessions').update({'updated_at': created_at}).eq('session_id', session_id).execute()
         
         return result.data[0] if result.data else None
     except Exception as e:
         print(f"Error saving chat message: {e}")
         return None
 
+def save_chat_turn(session_id, user_email, user_content, assistant_content):
+    """
+    Save a user message and the assistant's reply in one bulk insert, then
+    bump the session's updated_at once.
+
+    Returns:
+        list: The two saved messages (user first), or None on failure
+    """
+    try:
+        # Both rows come from one statement, so NOW() would give them the same
+        # created_at; explicit aware-UTC timestamps keep the reply ordered after
+        # the prompt, and the session's updated_at uses the same clock
+        created_at = datetime.now(timezone.utc)
+        replied_at = created_at + timedelta(microseconds=1)
+        result = get_supabase().table('chat_messages').insert([{
+            'session_id': session_id,
+            'user_email': user_email,
+            'message_type': 'user',
+            'content': user_content,
+            'created_at': created_at.isoformat()
+        }, {
+            'session_id': session_id,
+            'user_email': user_email,
+            'message_type': 'assistant',
+            'content': assistant_content,
+            'created_at': replied_at.isoformat()
+        }]).execute()
+        
+        get_supabase().table('chat_sessions').update({'updated_at': replied_at.isoformat()}).eq('session_id', session_id).execute()
+        
+        return result.data or None
+    except Exception as e:
+        print(f"Error saving chat turn: {e}")
+        return None
+
 
 def delete_chat_session(session_id, user_email):
     """Delete a chat session and all its messages"""
+    _forget_session_owner(session_id, user_email)
     try:
         # First delete all messages for this session
-        supabase.table('chat_messages').delete().eq('session_id', session_id).execute()
+        get_supabase().table('chat_messages').delete().eq('session_id', session_id).execute()
         
         # Then delete the session
-        result = supabase.table('chat_sessions').delete().eq('session_id', session_id).eq('user_email', user_email).execute()
+        result = get_supabase().table('chat_sessions').delete().eq('session_id', session_id).eq('user_email', user_email).execute()
         
         return len(result.data) > 0
     except Exception as e:
@@ -240,6 +420,8 @@ CREATE TABLE IF NOT EXISTS chat_sessions (
 -- Create index for faster queries
 CREATE INDEX IF NOT EXISTS idx_chat_sessions_user_email ON chat_sessions(user_email);
 CREATE INDEX IF NOT EXISTS idx_chat_sessions_updated_at ON chat_sessions(updated_at);
+-- Keyset pagination of a user's sessions
+CREATE INDEX IF NOT EXISTS idx_chat_sessions_user_page ON chat_sessions(user_email, updated_at DESC, session_id DESC);
 """
 
 def get_chat_messages_table_sql():
@@ -258,8 +440,6 @@ CREATE TABLE IF NOT EXISTS chat_messages (
 -- Create indexes for faster queries
 CREATE INDEX IF NOT EXISTS idx_chat_messages_session_id ON chat_messages(session_id);
 CREATE INDEX IF NOT EXISTS idx_chat_messages_created_at ON chat_messages(created_at);
+-- Keyset pagination of a session's messages
+CREATE INDEX IF NOT EXISTS idx_chat_messages_session_page ON chat_messages(session_id, created_at DESC, message_id DESC);
 """
-
-# Initialize the database connection when the module is imported
-if not init_db():
-    print("WARNING: Database initialization failed. The application may not work correctly.")
\ No newline at end of file
@@ -0,0 +1,172 @@
+# groq_client.py
+"""
+Process-wide Groq API client.
+
+Every outbound call to the Groq chat completions endpoint goes through the
+pooled clients in this module, so connections are kept alive (and multiplexed
+over HTTP/2 when the ``h2`` package is installed) instead of paying a fresh
+TCP+TLS handshake per request.
+"""
+
+import os
+import threading
+import httpx
+
+GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
+
+# Timeouts (seconds) used when a call does not pass its own
+GROQ_TIMEOUT = float(os.environ.get("GROQ_TIMEOUT", "30"))
+GROQ_STREAM_TIMEOUT = float(os.environ.get("GROQ_STREAM_TIMEOUT", "60"))
+GROQ_CONNECT_TIMEOUT = float(os.environ.get("GROQ_CONNECT_TIMEOUT", "10"))
+
+# Connection pool limits, shared by the sync and async clients
+GROQ_MAX_CONNECTIONS = int(os.environ.get("GROQ_MAX_CONNECTIONS", "200"))
+GROQ_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("GROQ_MAX_KEEPALIVE_CONNECTIONS", "50"))
+GROQ_KEEPALIVE_EXPIRY = float(os.environ.get("GROQ_KEEPALIVE_EXPIRY", "60"))
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def _timeout(timeout):
+    """Build an httpx.Timeout from a per-call read timeout in seconds."""
+    return httpx.Timeout(timeout, connect=GROQ_CONNECT_TIMEOUT)
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=GROQ_MAX_CONNECTIONS,
+        max_keepalive_connections=GROQ_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=GROQ_KEEPALIVE_EXPIRY
+    )
+
+
+def _headers():
+    return {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+
+def get_client():
+    """Return the shared blocking client, creating it on first use."""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = httpx.Client(
+                    http2=HTTP2_AVAILABLE,
+                    timeout=_timeout(GROQ_TIMEOUT),
+                    limits=_limits(),
+                    headers=_headers()
+                )
+    return _client
+
+
+def get_async_client():
+    """Return the shared asyncio client, creating it on first use."""
+    global _async_client
+    if _async_client is None:
+        _async_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=_timeout(GROQ_STREAM_TIMEOUT),
+            limits=_limits(),
+            headers=_headers()
+        )
+    return _async_client
+
+
+def chat_completion(messages, model, temperature=0.7, timeout=None):
+    """
+    Run a non-streaming chat completion and return the message content.
+
+    Args:
+        messages (list): Chat messages in OpenAI format
+        model (str): Groq model name
+        temperature (float): Sampling temperature
+        timeout (float): Read timeout in seconds, defaults to GROQ_TIMEOUT
+
+    Returns:
+        str: The content of the first choice
+
+    Raises:
+        httpx.HTTPError: On connection errors and non-2xx responses
+    """
+    data = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": False
+    }
+    response = get_client().post(
+        GROQ_API_URL, json=data, timeout=_timeout(timeout or GROQ_TIMEOUT)
+    )
+    response.raise_for_status()
+    return response.json()["choices"][0]["message"]["content"]
+
+
+def _stream_payload(messages, model, temperature):
+    return {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "stream": True
+    }
+
+
+def stream_chat_completion_lines(messages, model, temperature=0.7, timeout=None):
+    """
+    Stream a chat completion over the blocking client.
+
+    Yields:
+        str: Raw server-sent-event lines
+    """
+    with get_client().stream(
+        "POST", GROQ_API_URL,
+        json=_stream_payload(messages, model, temperature),
+        timeout=_timeout(timeout or GROQ_STREAM_TIMEOUT)
+    ) as response:
+        response.raise_for_status()
+        yield from response.iter_lines()
+
+
+async def astream_chat_completion_lines(messages, model, temperature=0.7, timeout=None):
+    """
+    Stream a chat completion over the asyncio client.
+
+    Yields:
+        str: Raw server-sent-event lines
+    """
+    async with get_async_client().stream(
+        "POST", GROQ_API_URL,
+        json=_stream_payload(messages, model, temperature),
+        timeout=_timeout(timeout or GROQ_STREAM_TIMEOUT)
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            yield line
+
+
+def close():
+    """Close the shared blocking client."""
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+            _client = None
+
+
+async def aclose():
+    """Close the shared asyncio client (call on application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
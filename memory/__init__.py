@@ -3,5 +3,6 @@ Memory module for user data and preferences
 """
 try:
     from .memory import *
+    from .compaction import start_compaction_worker, stop_compaction_worker
 except ImportError:
     pass
@@ -0,0 +1,340 @@
+"""
+In-process cache of per-user memory state.
+
+Each user's records (memory log, summaries, real-time entries, data document)
+are read from the storage backend at most once and then served from a bounded
+LRU cache. A cached value is re-read only when the backend's change stamp
+moves, e.g. because another worker wrote it. Hot-path writes (memory appends,
+preference updates) are applied to the cached value immediately and flushed
+to the backend by a background thread on a short write-behind schedule.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+MEMORY_CACHE_USERS = int(os.environ.get("MEMORY_CACHE_USERS", "1024"))
+MEMORY_FLUSH_INTERVAL = float(os.environ.get("MEMORY_FLUSH_INTERVAL", "1.0"))
+
+
+def file_stamp(path):
+    """Return a change stamp for a file, or None if it does not exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _copy(value):
+    if isinstance(value, list):
+        return list(value)
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+
+class _Entry:
+    __slots__ = ("stamp", "value", "indexes")
+
+    def __init__(self, stamp, value):
+        self.stamp = stamp
+        self.value = value
+        self.indexes = {}  # Built lazily by UserStateCache.with_index
+
+
+class _PendingWrite:
+    """Writes to one kind that have been applied to the cache but not to storage"""
+    __slots__ = ("records", "patch", "deltas", "merge")
+
+    def __init__(self, merge=False):
+        self.merge = merge
+        self.records = []
+        self.patch = {}
+        self.deltas = []  # (key, delta, combine) in the order they were made
+
+    def apply(self, value):
+        """Apply the pending patch, then the pending deltas, to a dict read from storage"""
+        value.update(self.patch)
+        for key, delta, combine in self.deltas:
+            value[key] = combine(value.get(key), delta)
+
+
+class _UserState:
+    __slots__ = ("lock", "entries", "pending", "lock_depth")
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.entries = {}
+        self.pending = {}
+        self.lock_depth = 0  # Nesting of the backend lock, guarded by ``lock``
+
+
+class UserStateCache:
+    """Bounded LRU cache of per-user storage contents with write-behind flushing."""
+
+    def __init__(self, backend, max_users=MEMORY_CACHE_USERS, flush_interval=MEMORY_FLUSH_INTERVAL):
+        self.backend = backend
+        self.max_users = max_users
+        self.flush_interval = flush_interval
+        self._users = OrderedDict()
+        self._lock = threading.Lock()
+        self._flush_thread = None
+        self._index_factories = {}  # kind -> {name: factory}
+
+    def register_index(self, kind, name, factory):
+        """
+        Keep an index ``name`` next to the cached records of a log ``kind``. ``factory()``
+        returns an object with ``add(records)``; it is fed the records on load
+        and every append after that, and rebuilt whenever the records are reloaded.
+        """
+        self._index_factories.setdefault(kind, {})[name] = factory
+
+    def _state(self, user_email):
+        with self._lock:
+            state = self._users.get(user_email)
+            if state is None:
+                state = self._users[user_email] = _UserState()
+                self._evict()
+            else:
+                self._users.move_to_end(user_email)
+            return state
+
+    def _evict(self):
+        # Users with unflushed writes are skipped; they become evictable once flushed
+        excess = len(self._users) - self.max_users
+        if excess <= 0:
+            return
+        for user_email in list(self._users):
+            if excess <= 0:
+                break
+            if not self._users[user_email].pending:
+                del self._users[user_email]
+                excess -= 1
+
+    def _load(self, user_email, state, kind):
+        entry = state.entries.get(kind)
+        pending = state.pending.get(kind)
+        if pending is not None and entry is not None:
+            return entry  # Storage is behind the cache until the next flush
+        stamp = self.backend.stamp(user_email, kind)
+        if entry is None or entry.stamp != stamp or stamp is None:
+            value = self.backend.read(user_email, kind)
+            if pending is not None:
+                # Re-apply writes that have not reached storage yet
+                if pending.merge:
+                    pending.apply(value)
+                else:
+                    value.extend(pending.records)
+            entry = state.entries[kind] = _Entry(stamp, value)
+        return entry
+
+    @contextmanager
+    def _backend_lock(self, user_email, state):
+        # Callers hold state.lock; the backend lock is taken once per nesting
+        if state.lock_depth == 0:
+            with self.backend.lock(user_email):
+                state.lock_depth += 1
+                try:
+                    yield
+                finally:
+                    state.lock_depth -= 1
+        else:
+            state.lock_depth += 1
+            try:
+                yield
+            finally:
+                state.lock_depth -= 1
+
+    @contextmanager
+    def lock(self, user_email):
+        """
+        Serialize a user's writes: holds the in-process user lock and the
+        backend's cross-process lock, so a read-modify-write inside the block
+        cannot interleave with writes from other threads or workers. Pending
+        writes are flushed first so reads inside the block see storage.
+        """
+        state = self._state(user_email)
+        with state.lock, self._backend_lock(user_email, state):
+            for kind in list(state.pending):
+                self._flush_kind(user_email, state, kind)
+            yield
+
+    def get(self, user_email, kind):
+        """Return a copy of the cached value of ``kind``, loading it on a miss or stale stamp"""
+        state = self._state(user_email)
+        with state.lock:
+            return _copy(self._load(user_email, state, kind).value)
+
+    def with_index(self, user_email, kind, name, func):
+        """Return ``func(index)`` for the registered index ``name`` of ``kind``, under the user lock"""
+        state = self._state(user_email)
+        with state.lock:
+            entry = self._load(user_email, state, kind)
+            index = entry.indexes.get(name)
+            if index is None:
+                index = entry.indexes[name] = self._index_factories[kind][name]()
+                index.add(entry.value)
+            return func(index)
+
+    def append(self, user_email, kind, records, write_behind=True):
+        """Append records to a cached log; stored now or at the next flush"""
+        state = self._state(user_email)
+        with state.lock:
+            entry = self._load(user_email, state, kind)
+            entry.value.extend(records)
+            for index in entry.indexes.values():
+                index.add(records)
+            pending = state.pending.setdefault(kind, _PendingWrite())
+            pending.records.extend(records)
+            if not write_behind:
+                self._flush_kind(user_email, state, kind)
+        if write_behind:
+            self._ensure_flusher()
+
+    def update(self, user_email, kind, patch, write_behind=True):
+        """
+        Merge ``patch`` into a cached dict. At flush time the patch is merged
+        into a fresh read from storage, so keys written by other workers survive.
+        """
+        state = self._state(user_email)
+        with state.lock:
+            entry = self._load(user_email, state, kind)
+            entry.value.update(patch)
+            pending = state.pending.setdefault(kind, _PendingWrite(merge=True))
+            pending.patch.update(patch)
+            # The patch supersedes earlier deltas to the same keys
+            pending.deltas = [d for d in pending.deltas if d[0] not in patch]
+            if not write_behind:
+                self._flush_kind(user_email, state, kind)
+        if write_behind:
+            self._ensure_flusher()
+
+    def accumulate(self, user_email, kind, key, delta, combine, write_behind=True):
+        """
+        Set ``value[key] = combine(value.get(key), delta)`` in a cached dict.
+
+        At flush time the delta is combined into a fresh read from storage under
+        the cross-process lock, so deltas from other workers (e.g. counter
+        increments) add up instead of overwriting each other. ``combine`` must
+        not mutate its arguments.
+        """
+        state = self._state(user_email)
+        with state.lock:
+            entry = self._load(user_email, state, kind)
+            entry.value[key] = combine(entry.value.get(key), delta)
+            pending = state.pending.setdefault(kind, _PendingWrite(merge=True))
+            pending.deltas.append((key, delta, combine))
+            if not write_behind:
+                self._flush_kind(user_email, state, kind)
+        if write_behind:
+            self._ensure_flusher()
+
+    def modify(self, user_email, kind, func):
+        """
+        Merge ``patch = func(value)`` into a dict kind and write it through.
+
+        ``value`` is read fresh from storage (plus this process's pending
+        patch) while the user's in-process and cross-process locks are held,
+        so concurrent read-modify-writes from other threads or workers cannot
+        be lost, e.g. counters. ``func`` must not mutate ``value``.
+        """
+        state = self._state(user_email)
+        with state.lock, self._backend_lock(user_email, state):
+            pending = state.pending.pop(kind, None)
+            try:
+                value = self.backend.read(user_email, kind)
+                if pending is not None:
+                    pending.apply(value)
+                patch = func(_copy(value))
+                if patch:
+                    value.update(patch)
+                if patch or pending is not None:
+                    self.backend.write(user_email, kind, value)
+            except Exception:
+                if pending is not None:
+                    state.pending.setdefault(kind, pending)
+                raise
+            state.entries[kind] = _Entry(self.backend.stamp(user_email, kind), value)
+            return patch
+
+    def replace(self, user_email, kind, value):
+        """Write ``value`` through to storage immediately, discarding pending writes it supersedes"""
+        state = self._state(user_email)
+        with state.lock:
+            state.pending.pop(kind, None)
+            with self._backend_lock(user_email, state):
+                self.backend.write(user_email, kind, value)
+                state.entries[kind] = _Entry(self.backend.stamp(user_email, kind), _copy(value))
+
+    def invalidate(self, user_email, kind=None):
+        """Forget cached values (pending writes are kept)"""
+        state = self._state(user_email)
+        with state.lock:
+            if kind is None:
+                state.entries.clear()
+            else:
+                state.entries.pop(kind, None)
+
+    def _flush_kind(self, user_email, state, kind):
+        pending = state.pending.pop(kind, None)
+        if pending is None:
+            return
+        entry = state.entries.get(kind)
+        with self._backend_lock(user_email, state):
+            before = self.backend.stamp(user_email, kind)
+            try:
+                if pending.merge:
+                    merged = self.backend.read(user_email, kind)
+                    pending.apply(merged)
+                    self.backend.write(user_email, kind, merged)
+                    if entry is not None:
+                        entry.value = merged
+                        entry.stamp = self.backend.stamp(user_email, kind)
+                    return
+                self.backend.append(user_email, kind, pending.records)
+            except Exception:
+                state.pending.setdefault(kind, pending)
+                raise
+            if entry is not None and entry.stamp == before:
+                entry.stamp = self.backend.stamp(user_email, kind)
+            else:
+                # Someone else wrote it too; re-read it on next access
+                state.entries.pop(kind, None)
+
+    def flush_user(self, user_email):
+        """Write a user's pending changes to storage now"""
+        with self._lock:
+            state = self._users.get(user_email)
+        if state is None:
+            return
+        with state.lock:
+            for kind in list(state.pending):
+                try:
+                    self._flush_kind(user_email, state, kind)
+                except Exception as e:
+                    print(f"ERROR: Could not flush {kind} for {user_email}: {e}")
+
+    def flush(self):
+        """Write every pending change to storage"""
+        with self._lock:
+            dirty = [email for email, state in self._users.items() if state.pending]
+        for user_email in dirty:
+            self.flush_user(user_email)
+
+    def _ensure_flusher(self):
+        if self._flush_thread is not None:
+            return
+        with self._lock:
+            if self._flush_thread is None:
+                self._flush_thread = threading.Thread(
+                    target=self._flush_loop, name="memory-flush", daemon=True
+                )
+                self._flush_thread.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
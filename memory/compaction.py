@@ -0,0 +1,149 @@
+"""
+Background memory compaction.
+
+``prune_memory`` only leaves a persisted marker for users whose memory has
+grown past the threshold. This worker picks those markers up (including any
+left over from before a restart) and summarizes memory off the request path.
+Users are processed in batches on a small thread pool; when Groq is slow the
+worker waits longer between rounds so each round carries a bigger batch.
+
+Every uvicorn worker process starts a CompactionWorker, but only the one
+holding the backend's compaction lock processes markers, so each compaction
+(and its Groq summary) runs once. The others retry the lock every round and
+take over if that process exits.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .memory import compact_memory, compaction_requested, get_backend, list_pending_compactions
+from .storage import try_lock_file
+
+COMPACTION_CONCURRENCY = int(os.environ.get("COMPACTION_CONCURRENCY", "4"))
+COMPACTION_BATCH_SIZE = int(os.environ.get("COMPACTION_BATCH_SIZE", "16"))
+# Seconds between rounds while Groq responds normally / while it is slow
+COMPACTION_INTERVAL = float(os.environ.get("COMPACTION_INTERVAL", "2"))
+COMPACTION_SLOW_INTERVAL = float(os.environ.get("COMPACTION_SLOW_INTERVAL", "15"))
+# A summary slower than this (seconds) marks Groq as slow
+COMPACTION_SLOW_SECONDS = float(os.environ.get("COMPACTION_SLOW_SECONDS", "5"))
+
+
+class CompactionWorker:
+    """Background thread that drains pending compaction markers in batches."""
+
+    def __init__(self, concurrency=COMPACTION_CONCURRENCY, batch_size=COMPACTION_BATCH_SIZE):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.groq_slow = False
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._leader_file = None  # Open while this process holds the compaction lock
+
+    def start(self):
+        """Start the worker thread (no-op if already running)."""
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="memory-compaction", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """Stop the worker; users still pending keep their markers for next start."""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread:
+            self._stop.set()
+            compaction_requested.set()
+            thread.join(timeout)
+
+    def acquire_leadership(self):
+        """
+        Try to become the process that runs compaction.
+
+        Returns:
+            bool: True if this process holds the compaction lock
+        """
+        if self._leader_file is None:
+            try:
+                self._leader_file = try_lock_file(get_backend().compaction_lock_path())
+            except OSError as e:
+                print(f"ERROR: Could not open the compaction lock: {e}")
+        return self._leader_file is not None
+
+    def release_leadership(self):
+        leader_file, self._leader_file = self._leader_file, None
+        if leader_file is not None:
+            leader_file.close()
+
+    def run_once(self):
+        """
+        Compact one batch of pending users.
+
+        Returns:
+            int: Number of users processed
+        """
+        batch = list_pending_compactions()[:self.batch_size]
+        if not batch:
+            return 0
+
+        with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batch))) as executor:
+            durations = list(executor.map(self._compact_user, batch))
+
+        self.groq_slow = max(durations) > COMPACTION_SLOW_SECONDS
+        return len(batch)
+
+    def _compact_user(self, user_email):
+        started = time.monotonic()
+        try:
+            compact_memory(user_email)
+        except Exception as e:
+            print(f"ERROR: Memory compaction failed for {user_email}: {e}")
+        return time.monotonic() - started
+
+    def _run(self):
+        try:
+            self._drain()
+        finally:
+            self.release_leadership()
+
+    def _drain(self):
+        while not self._stop.is_set():
+            if not self.acquire_leadership():
+                # Another process compacts; check again in case it exits
+                self._stop.wait(COMPACTION_SLOW_INTERVAL)
+                continue
+
+            compaction_requested.clear()
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"ERROR: Memory compaction round failed: {e}")
+                processed = 0
+
+            if processed >= self.batch_size and not self.groq_slow:
+                continue  # More users are waiting, keep draining
+
+            if self.groq_slow:
+                # Let several users accumulate instead of reacting to every marker
+                self._stop.wait(COMPACTION_SLOW_INTERVAL)
+            else:
+                compaction_requested.wait(COMPACTION_INTERVAL)
+                # Small delay so markers set by the same burst share a round
+                self._stop.wait(0.1)
+
+
+compaction_worker = CompactionWorker()
+
+
+def start_compaction_worker():
+    """Start the background compaction worker"""
+    compaction_worker.start()
+
+
+def stop_compaction_worker():
+    """Stop the background compaction worker"""
+    compaction_worker.stop()
@@ -1,74 +1,85 @@
-import json
+import atexit
 import os
-import requests
-from datetime import datetime #
-
-# Base directories for user-specific data
-MEMORY_BASE_DIR = 'memory/users'
-GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
-
-def get_user_files(user_email):
-    """Get file paths for a specific user"""
-    user_dir = os.path.join(MEMORY_BASE_DIR, user_email.replace('@', '_at_').replace('.', '_dot_'))
-    memory_file = os.path.join(user_dir, 'memory.json')
-    summary_file = os.path.join(user_dir, 'summary.json')
-    pref_file = os.path.join(user_dir, 'data.json')
-    return user_dir, memory_file, summary_file, pref_file
-
-def get_real_time_files(user_email): 
-    """Get file paths for a specific user's real-time search memory""" #
-    user_dir = os.path.join(MEMORY_BASE_DIR, user_email.replace('@', '_at_').replace('.', '_dot_')) #
-    real_time_file = os.path.join(user_dir, 'real_time.json') #
-    return user_dir, real_time_file #
+import threading
+from datetime import datetime, timedelta #
+import groq_client
+from .cache import UserStateCache
+from .realtime import RealTimeIndex
+from .retrieval import BM25Index, real_time_text
+from .storage import (
+    MEMORY_BASE_DIR, PENDING_COMPACTION_DIR,
+    create_backend, get_real_time_files, get_user_files
+)
+
+# Memory is compacted into a summary once it holds PRUNE_THRESHOLD messages,
+# keeping the PRUNE_KEEP_RECENT most recent ones in active memory
+PRUNE_THRESHOLD = 10
+PRUNE_KEEP_RECENT = 4
+
+# Set whenever a user is marked for compaction, to wake the compaction worker
+compaction_requested = threading.Event()
+
+SUMMARY_MODEL = "compound-beta-mini"
+SUMMARY_TIMEOUT = float(os.environ.get("GROQ_SUMMARY_TIMEOUT", "30"))
+
+# Real-time search entries expire after REAL_TIME_TTL_HOURS and at most
+# REAL_TIME_MAX_ENTRIES are kept per user (trimmed once 25% over the limit)
+REAL_TIME_TTL_HOURS = float(os.environ.get("REAL_TIME_TTL_HOURS", "168"))
+REAL_TIME_MAX_ENTRIES = int(os.environ.get("REAL_TIME_MAX_ENTRIES", "200"))
+
+# Storage backend (MEMORY_BACKEND=file|sqlite) and the per-user cache in front of it
+backend = create_backend()
+user_cache = UserStateCache(backend)
+user_cache.register_index("real_time", "query", RealTimeIndex)
+user_cache.register_index("real_time", "bm25", lambda: BM25Index(real_time_text))
+user_cache.register_index("summaries", "bm25", BM25Index)
+atexit.register(user_cache.flush)
+
+# Called as hook(user_email, records) after every append_to_memory, so other
+# packages (e.g. the personality profiler) can keep running statistics
+# without memory importing them. Keyed by name, so registering again replaces
+# the hook.
+_append_hooks = {}
+
+def get_backend():
+    """Return the storage backend memory is read from and written to"""
+    return backend
 
 def load_memory(user_email):
     """Load memory for a specific user"""
-    _, memory_file, _, _ = get_user_files(user_email)
-    if not os.path.exists(memory_file):
-        return []
-    try:
-        with open(memory_file, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
+    return user_cache.get(user_email, "memory")
 
 def save_memory(memory, user_email):
-    """Save memory for a specific user"""
-    user_dir, memory_file, _, _ = get_user_files(user_email)
-    os.makedirs(user_dir, exist_ok=True)
-    with open(memory_file, 'w') as f:
-        json.dump(memory, f, indent=2)
+    """Replace memory for a specific user (compacts the memory log)"""
+    user_cache.replace(user_email, "memory", memory)
 
 def save_summary(summary, user_email):
     """Save conversation summary for a specific user"""
-    user_dir, _, summary_file, _ = get_user_files(user_email)
-    os.makedirs(user_dir, exist_ok=True)
-    try:
-        with open(summary_file, 'r') as f:
-            summaries = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        summaries = []
-    
-    summaries.append({
+    user_cache.append(user_email, "summaries", [{
         **summary,
         "user_email": user_email,
         "timestamp": _get_timestamp()
-    })
-    
-    with open(summary_file, 'w') as f:
-        json.dump(summaries, f, indent=2)
+    }], write_behind=False)
 
 def load_summaries(user_email):
     """Load conversation summaries for a specific user"""
-    _, _, summary_file, _ = get_user_files(user_email)
-    if not os.path.exists(summary_file):
-        return []
-    try:
-        with open(summary_file, 'r') as f:
-            return json.load(f)
-    except json.JSONDecodeError:
-        return []
+    return user_cache.get(user_email, "summaries")
+
+def search_summaries(query, user_email, k=5):
+    """
+    Return the ``k`` summaries most relevant to ``query`` (BM25 over the
+    per-user summary index), oldest first. When fewer than ``k`` summaries
+    share a term with the query, the most recent ones fill the free slots.
+    """
+    def top(index):
+        positions = {position for _, position in index.search(query, k)}
+        for position in range(len(index) - 1, -1, -1):
+            if len(positions) >= k:
+                break
+            positions.add(position)
+        return [dict(index.records[position]) for position in sorted(positions)]
+
+    return user_cache.with_index(user_email, "summaries", "bm25", top)
 
 def summarize_conversation_naive(messages):
     """Fallback summarization method"""
@@ -85,22 +96,11 @@ def summarize_with_groq(messages, instruction=None): #
     else: #
         summary_prompt = base_prompt + conversation #
 
-    headers = { #
-        "Authorization": f"Bearer {GROQ_API_KEY}", #
-        "Content-Type": "application/json" #
-    } #
-
-    data = { #
-        "model": "compound-beta-mini", #
-        "messages": [{"role": "user", "content": summary_prompt}], #
-        "temperature": 0.3, #
-        "stream": False #
-    } #
-
     try: #
-        response = requests.post(GROQ_API_URL, json=data, headers=headers) #
-        response.raise_for_status() #
-        content = response.json()["choices"][0]["message"]["content"] #
+        content = groq_client.chat_completion( #
+            [{"role": "user", "content": summary_prompt}], #
+            SUMMARY_MODEL, temperature=0.3, timeout=SUMMARY_TIMEOUT #
+        ) #
         
         # Attempt to extract key points if the instruction asked for them
         key_points = [] #
@@ -111,95 +111,192 @@ def summarize_with_groq(messages, instruction=None): #
         return {"message": content.strip(), "key_points": key_points} #
     except Exception as e: #
         print(f"Summarization error: {e}") #
-        return summarize_conversation_naive(messages) #
+        # Marked so callers can tell it apart from a real summary (e.g. not cache it)
+        return {**summarize_conversation_naive(messages), "fallback": True}
 
 def prune_memory(memory, user_email, instruction=None):
-    """Prune memory for a specific user"""
-    if len(memory) < 10:
+    """
+    Prune memory for a specific user.
+
+    Summarization is deferred: once memory reaches the threshold the user is
+    marked for compaction and the background compaction worker summarizes the
+    older messages later, off the request path.
+    """
+    if len(memory) < PRUNE_THRESHOLD:
         return memory
 
-    # Summarize all but the last 4 messages
-    to_summarize = memory[:-4] #
-    summary = summarize_with_groq(to_summarize, instruction="Summarize the preceding conversation.") #
-    save_summary(summary, user_email)
-    
-    # Keep the last 4 messages in active memory instead of clearing everything
-    memory = memory[-4:] #
-    save_memory(memory, user_email)
+    mark_pending_compaction(user_email)
     return memory
 
+def compact_memory(user_email, instruction="Summarize the preceding conversation."):
+    """
+    Summarize all but the most recent messages of a user's memory into a stored
+    summary. Runs in the background compaction worker.
+
+    Returns:
+        bool: True if a summary was written
+    """
+    memory = load_memory(user_email)
+    if len(memory) < PRUNE_THRESHOLD:
+        clear_pending_compaction(user_email)
+        return False
+
+    # Summarize all but the last 4 messages
+    to_summarize = memory[:-PRUNE_KEEP_RECENT] #
+    summary = summarize_with_groq(to_summarize, instruction=instruction) #
+
+    # Memory may have grown while Groq was summarizing; only drop the prefix
+    # that was summarized, and leave it alone if memory was cleared or another
+    # worker compacted it meanwhile. The user lock keeps other threads and
+    # workers out between this re-read and the rewrite.
+    with user_cache.lock(user_email):
+        memory = load_memory(user_email)
+        if memory[:len(to_summarize)] != to_summarize:
+            return False
+        save_summary(summary, user_email)
+        save_memory(memory[len(to_summarize):], user_email)
+
+    clear_pending_compaction(user_email)
+    return True
+
+def mark_pending_compaction(user_email):
+    """Persist a pending compaction marker for a user and wake the worker"""
+    backend.mark_pending_compaction(user_email)
+    compaction_requested.set()
+
+def clear_pending_compaction(user_email):
+    """Remove a user's pending compaction marker"""
+    backend.clear_pending_compaction(user_email)
+
+def list_pending_compactions():
+    """List the emails of all users waiting for compaction, oldest first"""
+    return backend.list_pending_compactions()
+
+def register_append_hook(name, hook):
+    """Call ``hook(user_email, records)`` after each append_to_memory (replaces a hook of the same name)"""
+    _append_hooks[name] = hook
+
 def append_to_memory(user_input, ai_response, user_email):
     """Append conversation to user's memory"""
-    memory = load_memory(user_email)
-    memory.append({
+    records = [{
         "message": user_input,
         "role": "user",
         "timestamp": _get_timestamp()
-    })
-    memory.append({
+    }, {
         "message": ai_response,
         "role": "assistant", 
         "timestamp": _get_timestamp()
-    })
-    memory = prune_memory(memory, user_email)
-    save_memory(memory, user_email)
+    }]
+    user_cache.append(user_email, "memory", records)
+    for name, hook in list(_append_hooks.items()):
+        try:
+            hook(user_email, records)
+        except Exception as e:
+            print(f"ERROR: Memory append hook {name} failed for {user_email}: {e}")
+    prune_memory(load_memory(user_email), user_email)
 
 def load_real_time_memory(user_email): #
     """Load real-time search summaries for a specific user""" #
-    _, real_time_file = get_real_time_files(user_email) #
-    if not os.path.exists(real_time_file): #
-        return [] #
-    try: #
-        with open(real_time_file, 'r') as f: #
-            return json.load(f) #
-    except json.JSONDecodeError: #
-        return [] #
+    return user_cache.get(user_email, "real_time") #
 
 def save_real_time_memory(entry, user_email): #
     """Save a real-time search summary entry for a specific user""" #
-    user_dir, real_time_file = get_real_time_files(user_email) #
-    os.makedirs(user_dir, exist_ok=True) #
-    real_time_memory = load_real_time_memory(user_email) #
-    real_time_memory.append(entry) #
-    # Optionally, you might want to prune this memory based on timestamp or number of entries
-    with open(real_time_file, 'w') as f: #
-        json.dump(real_time_memory, f, indent=2) #
+    user_cache.append(user_email, "real_time", [entry]) #
+    evict_real_time_memory(user_email)
+
+def evict_real_time_memory(user_email):
+    """
+    Drop expired real-time entries and trim to REAL_TIME_MAX_ENTRIES.
+
+    Only rewrites the log when the oldest entry has expired or the log is
+    well over capacity, so most saves stay a plain append.
+    """
+    cutoff = datetime.now() - timedelta(hours=REAL_TIME_TTL_HOURS)
+
+    def needs_eviction(index):
+        oldest = index.oldest_timestamp()
+        expired = len(index) > 0 and (oldest is None or oldest < cutoff)
+        return expired or len(index) > REAL_TIME_MAX_ENTRIES + REAL_TIME_MAX_ENTRIES // 4
+
+    if not user_cache.with_index(user_email, "real_time", "query", needs_eviction):
+        return
+
+    with user_cache.lock(user_email):
+        kept = []
+        for entry in load_real_time_memory(user_email)[-REAL_TIME_MAX_ENTRIES:]:
+            try:
+                if datetime.fromisoformat(entry["timestamp"]) >= cutoff:
+                    kept.append(entry)
+            except (KeyError, TypeError, ValueError):
+                continue  # Entries without a usable timestamp can never be fresh
+        user_cache.replace(user_email, "real_time", kept)
+
+def find_real_time_memory(query, user_email, freshness_hours=24):
+    """
+    Find the newest real-time entry younger than ``freshness_hours`` whose
+    query or key points match ``query``, using the per-user query index.
+
+    Returns:
+        dict or None: The matching entry
+    """
+    since = datetime.now() - timedelta(hours=freshness_hours)
+    return user_cache.with_index(user_email, "real_time", "query", lambda index: index.lookup(query, since))
+
+def search_real_time_memory(query, user_email, k=5):
+    """Return up to ``k`` real-time search entries most relevant to ``query``, best first"""
+    return user_cache.with_index(user_email, "real_time", "bm25", lambda index: [
+        dict(index.records[position]) for _, position in index.search(query, k)
+    ])
+
+def load_user_data(user_email):
+    """Load a user's data document (preferences and personality profile)"""
+    return user_cache.get(user_email, "data")
+
+def update_user_data(updates, user_email, write_behind=True):
+    """
+    Merge ``updates`` into a user's data document.
+
+    With ``write_behind`` the change is visible immediately but reaches
+    storage at the next cache flush; otherwise it is written before returning.
+    """
+    if "email" not in load_user_data(user_email):
+        updates = {"email": user_email, "created_at": _get_timestamp(), **updates}
+    user_cache.update(user_email, "data", updates, write_behind=write_behind)
+
+def modify_user_data(user_email, func):
+    """
+    Atomically merge ``func(data)`` into a user's data document, for
+    read-modify-write updates such as counters. ``data`` is read from storage
+    under the user's cross-process lock and the result is written through, so
+    updates from other workers are never lost.
+    """
+    def patch(data):
+        updates = func(data)
+        if updates and "email" not in data:
+            updates = {"email": user_email, "created_at": _get_timestamp(), **updates}
+        return updates
+    return user_cache.modify(user_email, "data", patch)
+
+def accumulate_user_data(user_email, key, delta, combine):
+    """
+    Set ``data[key] = combine(data.get(key), delta)`` in a user's data
+    document, write-behind. The delta is combined into a fresh read from
+    storage at flush time, so running totals kept by several workers add up
+    without a locked read-modify-write on every call.
+    """
+    user_cache.accumulate(user_email, "data", key, delta, combine)
 
 def set_user_preference(key, value, user_email):
     """Set preference for a specific user"""
-    user_dir, _, _, pref_file = get_user_files(user_email)
-    os.makedirs(user_dir, exist_ok=True)
-    
-    try:
-        with open(pref_file, 'r') as f:
-            prefs = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        prefs = {"email": user_email, "created_at": _get_timestamp()}
-    
-    prefs[key] = value
-    prefs["last_updated"] = _get_timestamp()
-    
-    with open(pref_file, 'w') as f:
-        json.dump(prefs, f, indent=2)
+    update_user_data({key: value, "last_updated": _get_timestamp()}, user_email)
 
 def get_user_preference(key, user_email):
     """Get preference for a specific user"""
-    _, _, _, pref_file = get_user_files(user_email)
-    try:
-        with open(pref_file, 'r') as f:
-            prefs = json.load(f)
-        return prefs.get(key)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return None
+    return load_user_data(user_email).get(key)
 
 def get_all_user_preferences(user_email):
     """Get all preferences for a specific user"""
-    _, _, _, pref_file = get_user_files(user_email)
-    try:
-        with open(pref_file, 'r') as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return {"email": user_email, "created_at": _get_timestamp()}
+    return load_user_data(user_email) or {"email": user_email, "created_at": _get_timestamp()}
 
 def clear_user_memory(user_email):
     """Clear all memory for a specific user"""
@@ -0,0 +1,75 @@
+"""
+One-shot migration of user memory from the file backend into SQLite.
+
+Usage:
+    python -m memory.migrate [--db memory/memory.db] [--dry-run]
+
+Each user's memory, summaries, real-time entries, data document and pending
+compaction marker are copied in one transaction per user, so the command can
+be re-run safely; a re-run replaces what an earlier run imported. The file
+tree is only read, never modified, so ``--dry-run`` writes nothing at all.
+"""
+
+import argparse
+import os
+import time
+
+from .sqlite_storage import MEMORY_SQLITE_PATH, SQLiteBackend
+from .storage import DATA_KIND, LOG_KINDS, FileBackend, _read_legacy_log, _read_log
+
+
+def _read_source_log(source, user_email, kind):
+    """
+    Records of a log kind. A legacy ``*.json`` list that was never converted
+    is parsed directly: ``FileBackend.read`` would rewrite it as ``*.jsonl``.
+    """
+    log_file = source.path(user_email, kind)
+    if os.path.exists(log_file):
+        return _read_log(log_file)
+    return _read_legacy_log(log_file[:-1]) or []
+
+
+def migrate(db_path=MEMORY_SQLITE_PATH, dry_run=False):
+    """
+    Copy every user from the file backend into a SQLite database.
+
+    Returns:
+        int: Number of users migrated
+    """
+    source = FileBackend()
+    target = None if dry_run else SQLiteBackend(db_path)
+    pending = set(source.list_pending_compactions())
+    started = time.monotonic()
+    count = 0
+
+    try:
+        for user_email in source.users():
+            logs = {kind: _read_source_log(source, user_email, kind) for kind in LOG_KINDS}
+            data = source.read(user_email, DATA_KIND)
+            records = sum(len(records) for records in logs.values())
+            print(f"{user_email}: {records} records{' (pending compaction)' if user_email in pending else ''}")
+
+            if target is not None:
+                target.import_user(user_email, logs, data)
+                if user_email in pending:
+                    target.mark_pending_compaction(user_email)
+            count += 1
+    finally:
+        if target is not None:
+            target.close()
+
+    action = "Would migrate" if dry_run else "Migrated"
+    print(f"{action} {count} users in {time.monotonic() - started:.1f}s")
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate file-based user memory into SQLite")
+    parser.add_argument("--db", default=MEMORY_SQLITE_PATH, help="SQLite database path")
+    parser.add_argument("--dry-run", action="store_true", help="List users without writing")
+    args = parser.parse_args()
+    migrate(args.db, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
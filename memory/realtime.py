@@ -0,0 +1,77 @@
+"""
+Query index over a user's real-time search memory.
+
+Entries are indexed by the normalized terms of their query and key points,
+so a freshness lookup only looks at entries sharing terms with the search
+instead of scanning and re-parsing the whole history. The index is kept next
+to the cached real-time entries (see ``UserStateCache.register_index``) and
+is extended in place as entries are appended.
+"""
+
+from datetime import datetime
+
+from .retrieval import split_terms
+
+
+def normalize_terms(text):
+    """Set of the casefolded word terms of ``text``"""
+    return frozenset(split_terms(text))
+
+
+def _parse_timestamp(value):
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class RealTimeIndex:
+    """Term index over real-time entries, in append order."""
+
+    def __init__(self):
+        self.entries = []
+        self.timestamps = []
+        self._query_terms = {}   # term -> positions whose query has the term
+        self._key_points = {}    # term -> [(position, key point terms)]
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, entries):
+        for entry in entries:
+            position = len(self.entries)
+            self.entries.append(entry)
+            self.timestamps.append(_parse_timestamp(entry.get("timestamp")))
+            for term in normalize_terms(entry.get("query", "")):
+                self._query_terms.setdefault(term, set()).add(position)
+            for key_point in entry.get("key_points", []):
+                terms = normalize_terms(key_point)
+                for term in terms:
+                    self._key_points.setdefault(term, []).append((position, terms))
+
+    def oldest_timestamp(self):
+        """Timestamp of the oldest entry (None if it has none or the index is empty)"""
+        return self.timestamps[0] if self.timestamps else None
+
+    def lookup(self, query, since):
+        """
+        Return the newest entry stamped after ``since`` that matches ``query``:
+        either the entry's query contains every search term, or one of its key
+        points is made only of search terms.
+        """
+        terms = normalize_terms(query)
+        if not terms:
+            return None
+
+        postings = sorted((self._query_terms.get(term, ()) for term in terms), key=len)
+        matches = set(postings[0]).intersection(*postings[1:])
+        for term in terms:
+            for position, key_point_terms in self._key_points.get(term, ()):
+                if key_point_terms <= terms:
+                    matches.add(position)
+
+        for position in sorted(matches, reverse=True):
+            timestamp = self.timestamps[position]
+            if timestamp is not None and timestamp > since:
+                return self.entries[position]
+        return None
@@ -0,0 +1,92 @@
+"""
+Local lexical retrieval over a user's summaries and real-time search entries.
+
+BM25Index is an in-memory inverted index kept next to the cached records
+(see ``UserStateCache.register_index``): it is built once when the records
+are loaded and then extended by every ``save_summary`` and
+``save_real_time_memory`` append, so ranking never rescans the history and
+needs no network call.
+"""
+
+import heapq
+import math
+import re
+
+_TERM_RE = re.compile(r"\w+")
+
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from",
+    "has", "have", "he", "her", "his", "i", "if", "in", "is", "it", "its",
+    "me", "my", "of", "on", "or", "our", "she", "so", "that", "the", "their",
+    "them", "they", "this", "to", "was", "we", "were", "what", "when",
+    "which", "who", "will", "with", "you", "your"
+))
+
+
+def split_terms(text):
+    """Casefolded word terms of ``text`` (any script), in order"""
+    return _TERM_RE.findall(text.casefold()) if text else []
+
+
+def tokenize(text):
+    """Casefolded word terms of ``text`` without stopwords"""
+    return [term for term in split_terms(text) if term not in STOPWORDS]
+
+
+def summary_text(record):
+    return " ".join([record.get("message", "")] + list(record.get("key_points", [])))
+
+
+def real_time_text(record):
+    return " ".join([record.get("query", ""), record.get("summary", "")] + list(record.get("key_points", [])))
+
+
+class BM25Index:
+    """Okapi BM25 over records in append order; positions index the record list."""
+
+    def __init__(self, text=summary_text, k1=1.5, b=0.75):
+        self.text = text
+        self.k1 = k1
+        self.b = b
+        self.records = []
+        self.postings = {}  # term -> {position: term frequency}
+        self.lengths = []
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.lengths)
+
+    def add(self, records):
+        for record in records:
+            position = len(self.lengths)
+            self.records.append(record)
+            terms = tokenize(self.text(record))
+            for term in terms:
+                postings = self.postings.setdefault(term, {})
+                postings[position] = postings.get(position, 0) + 1
+            self.lengths.append(len(terms))
+            self.total_length += len(terms)
+
+    def search(self, query, k=5):
+        """
+        Rank records against ``query``.
+
+        Returns:
+            list: Up to ``k`` ``(score, position)`` pairs, best first
+        """
+        count = len(self.lengths)
+        if not count:
+            return []
+        average_length = self.total_length / count or 1.0
+        scores = {}
+        for term in set(tokenize(query)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for position, frequency in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[position] / average_length)
+                scores[position] = scores.get(position, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + norm)
+        # Ties go to the more recent record
+        return [(score, position) for position, score in
+                heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))]
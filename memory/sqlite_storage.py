@@ -0,0 +1,207 @@
+"""
+Embedded SQLite storage backend for user memory.
+
+All users share one database file in WAL mode, so readers never block the
+single writer and many uvicorn workers can use it at once. Each record kind
+has its own table indexed by ``(user_email, id)``, and every write bumps a
+per-user version row in the same transaction; the memory cache uses that
+version as its change stamp.
+
+Cross-process write locks are a fixed set of MEMORY_SQLITE_LOCK_STRIPES lock
+files next to the database; a user is mapped to one by a stable hash of the
+email, so the number of lock files does not grow with the number of users.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .storage import DATA_KIND, LOG_KINDS, StorageBackend
+
+MEMORY_SQLITE_PATH = os.environ.get("MEMORY_SQLITE_PATH", "memory/memory.db")
+MEMORY_SQLITE_LOCK_STRIPES = int(os.environ.get("MEMORY_SQLITE_LOCK_STRIPES", "64"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS memory (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_memory_user ON memory(user_email, id);
+
+CREATE TABLE IF NOT EXISTS summaries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_summaries_user ON summaries(user_email, id);
+
+CREATE TABLE IF NOT EXISTS real_time (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_email TEXT NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_real_time_user ON real_time(user_email, id);
+
+CREATE TABLE IF NOT EXISTS user_data (
+    user_email TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS versions (
+    user_email TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    PRIMARY KEY (user_email, kind)
+);
+
+CREATE TABLE IF NOT EXISTS pending_compaction (
+    user_email TEXT PRIMARY KEY,
+    marked_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteBackend(StorageBackend):
+    """Memory storage in a single SQLite database (WAL mode)."""
+
+    name = "sqlite"
+
+    def __init__(self, path=MEMORY_SQLITE_PATH):
+        self.path = path
+        self._local = threading.local()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connection(self):
+        """Return this thread's connection (sqlite3 connections are per-thread)"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _table(kind):
+        if kind not in LOG_KINDS:
+            raise ValueError(f"Unknown memory kind: {kind}")
+        return kind
+
+    @staticmethod
+    def _bump_version(conn, user_email, kind):
+        conn.execute(
+            "INSERT INTO versions (user_email, kind, version) VALUES (?, ?, 1) "
+            "ON CONFLICT(user_email, kind) DO UPDATE SET version = version + 1",
+            (user_email, kind)
+        )
+
+    def read(self, user_email, kind):
+        conn = self._connection()
+        if kind == DATA_KIND:
+            row = conn.execute(
+                "SELECT data FROM user_data WHERE user_email = ?", (user_email,)
+            ).fetchone()
+            return json.loads(row[0]) if row else {}
+        rows = conn.execute(
+            f"SELECT record FROM {self._table(kind)} WHERE user_email = ? ORDER BY id",
+            (user_email,)
+        ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def append(self, user_email, kind, records):
+        table = self._table(kind)
+        with self._connection() as conn:
+            conn.executemany(
+                f"INSERT INTO {table} (user_email, record) VALUES (?, ?)",
+                [(user_email, json.dumps(record)) for record in records]
+            )
+            self._bump_version(conn, user_email, kind)
+
+    def write(self, user_email, kind, value):
+        with self._connection() as conn:
+            if kind == DATA_KIND:
+                conn.execute(
+                    "INSERT INTO user_data (user_email, data) VALUES (?, ?) "
+                    "ON CONFLICT(user_email) DO UPDATE SET data = excluded.data",
+                    (user_email, json.dumps(value))
+                )
+            else:
+                table = self._table(kind)
+                conn.execute(f"DELETE FROM {table} WHERE user_email = ?", (user_email,))
+                conn.executemany(
+                    f"INSERT INTO {table} (user_email, record) VALUES (?, ?)",
+                    [(user_email, json.dumps(record)) for record in value]
+                )
+            self._bump_version(conn, user_email, kind)
+
+    def stamp(self, user_email, kind):
+        row = self._connection().execute(
+            "SELECT version FROM versions WHERE user_email = ? AND kind = ?",
+            (user_email, kind)
+        ).fetchone()
+        return row[0] if row else None
+
+    def lock_path(self, user_email):
+        # crc32 rather than hash(): every process must pick the same stripe
+        stripe = zlib.crc32(user_email.encode('utf-8')) % MEMORY_SQLITE_LOCK_STRIPES
+        return os.path.join(f"{self.path}.locks", f"{stripe}.lock")
+
+    def compaction_lock_path(self):
+        return f"{self.path}.compaction.lock"
+
+    def users(self):
+        rows = self._connection().execute(
+            "SELECT DISTINCT user_email FROM versions ORDER BY user_email"
+        ).fetchall()
+        for row in rows:
+            yield row[0]
+
+    def mark_pending_compaction(self, user_email):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO pending_compaction (user_email, marked_at) VALUES (?, ?)",
+                (user_email, time.time())
+            )
+
+    def clear_pending_compaction(self, user_email):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM pending_compaction WHERE user_email = ?", (user_email,))
+
+    def list_pending_compactions(self):
+        rows = self._connection().execute(
+            "SELECT user_email FROM pending_compaction ORDER BY marked_at"
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def import_user(self, user_email, logs, data):
+        """Bulk-load one user's logs and data document in a single transaction"""
+        with self._connection() as conn:
+            for kind, records in logs.items():
+                table = self._table(kind)
+                conn.execute(f"DELETE FROM {table} WHERE user_email = ?", (user_email,))
+                conn.executemany(
+                    f"INSERT INTO {table} (user_email, record) VALUES (?, ?)",
+                    [(user_email, json.dumps(record)) for record in records]
+                )
+                self._bump_version(conn, user_email, kind)
+            if data:
+                conn.execute(
+                    "INSERT INTO user_data (user_email, data) VALUES (?, ?) "
+                    "ON CONFLICT(user_email) DO UPDATE SET data = excluded.data",
+                    (user_email, json.dumps(data))
+                )
+                self._bump_version(conn, user_email, DATA_KIND)
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
@@ -0,0 +1,357 @@
+"""
+Storage backends for user memory.
+
+Every function in memory.py goes through a ``StorageBackend``. A backend
+stores, per user, three append-only record logs (``memory``, ``summaries``
+and ``real_time``), one ``data`` document (preferences and personality
+profile) and the pending-compaction markers.
+
+The backend is picked with the MEMORY_BACKEND environment variable:
+``file`` (default) keeps the ``memory/users/<user>/`` directory layout,
+``sqlite`` uses an embedded SQLite database (see sqlite_storage.py).
+"""
+
+import json
+import os
+import stat
+import threading
+from contextlib import contextmanager
+
+from .cache import file_stamp
+
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FCNTL_AVAILABLE = False
+
+# Base directories for user-specific data
+MEMORY_BASE_DIR = 'memory/users'
+PENDING_COMPACTION_DIR = os.path.join(MEMORY_BASE_DIR, '.pending_compaction')
+
+LOG_KINDS = ("memory", "summaries", "real_time")
+DATA_KIND = "data"
+
+# Lock files the current thread holds, so nested StorageBackend.lock calls
+# do not flock the same file twice and deadlock
+_held_locks = threading.local()
+
+
+def _user_key(user_email):
+    return user_email.replace('@', '_at_').replace('.', '_dot_')
+
+
+def get_user_files(user_email):
+    """Get file paths for a specific user"""
+    user_dir = os.path.join(MEMORY_BASE_DIR, _user_key(user_email))
+    memory_file = os.path.join(user_dir, 'memory.jsonl')
+    summary_file = os.path.join(user_dir, 'summary.jsonl')
+    pref_file = os.path.join(user_dir, 'data.json')
+    return user_dir, memory_file, summary_file, pref_file
+
+
+def get_real_time_files(user_email):
+    """Get file paths for a specific user's real-time search memory"""
+    user_dir = os.path.join(MEMORY_BASE_DIR, _user_key(user_email))
+    real_time_file = os.path.join(user_dir, 'real_time.jsonl')
+    return user_dir, real_time_file
+
+
+class StorageBackend:
+    """Interface every memory storage backend implements."""
+
+    name = "base"
+
+    def read(self, user_email, kind):
+        """Return all records of a log kind (list) or the data document (dict)."""
+        raise NotImplementedError
+
+    def append(self, user_email, kind, records):
+        """Append records to a log kind."""
+        raise NotImplementedError
+
+    def write(self, user_email, kind, value):
+        """Replace a log kind's records, or the whole data document."""
+        raise NotImplementedError
+
+    def stamp(self, user_email, kind):
+        """Return a value that changes whenever ``kind`` changes (None if empty)."""
+        raise NotImplementedError
+
+    def users(self):
+        """Iterate over the emails of every stored user."""
+        raise NotImplementedError
+
+    def mark_pending_compaction(self, user_email):
+        raise NotImplementedError
+
+    def clear_pending_compaction(self, user_email):
+        raise NotImplementedError
+
+    def list_pending_compactions(self):
+        """List users waiting for compaction, oldest first."""
+        raise NotImplementedError
+
+    def lock_path(self, user_email):
+        """Path of the advisory lock file that serializes a user's writes across processes."""
+        raise NotImplementedError
+
+    def compaction_lock_path(self):
+        """Path of the lock file held by the one process that runs compaction."""
+        raise NotImplementedError
+
+    @contextmanager
+    def lock(self, user_email):
+        """
+        Hold a user's cross-process write lock (a no-op where fcntl is
+        unavailable). Re-entrant within a thread.
+        """
+        if not FCNTL_AVAILABLE:
+            yield
+            return
+        lock_file = self.lock_path(user_email)
+        held = _held_locks.__dict__.setdefault("paths", set())
+        if lock_file in held:
+            yield
+            return
+        os.makedirs(os.path.dirname(lock_file), exist_ok=True)
+        with open(lock_file, 'a') as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            held.add(lock_file)
+            try:
+                yield
+            finally:
+                held.discard(lock_file)
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    def close(self):
+        pass
+
+
+def try_lock_file(lock_file):
+    """
+    Take an exclusive lock on ``lock_file`` without waiting. Returns the open
+    file, which holds the lock until it is closed (or the process exits), or
+    None if another process holds it. Without fcntl the file is opened unlocked.
+    """
+    os.makedirs(os.path.dirname(lock_file) or '.', exist_ok=True)
+    f = open(lock_file, 'a')
+    if FCNTL_AVAILABLE:
+        try:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            return None
+    return f
+
+
+class FileBackend(StorageBackend):
+    """One directory per user holding JSONL logs and a data.json document."""
+
+    name = "file"
+
+    def path(self, user_email, kind):
+        _, memory_file, summary_file, pref_file = get_user_files(user_email)
+        if kind == "memory":
+            return memory_file
+        if kind == "summaries":
+            return summary_file
+        if kind == "real_time":
+            return get_real_time_files(user_email)[1]
+        if kind == DATA_KIND:
+            return pref_file
+        raise ValueError(f"Unknown memory kind: {kind}")
+
+    def read(self, user_email, kind):
+        if kind == DATA_KIND:
+            return _read_data(self.path(user_email, kind))
+        log_file = self.path(user_email, kind)
+        self._migrate_legacy_log(user_email, log_file)
+        return _read_log(log_file)
+
+    def append(self, user_email, kind, records):
+        log_file = self.path(user_email, kind)
+        self._migrate_legacy_log(user_email, log_file)
+        _append_log(log_file, records)
+
+    def _migrate_legacy_log(self, user_email, log_file):
+        """Convert a pre-JSONL ``*.json`` list file into its ``*.jsonl`` log, once"""
+        legacy_file = log_file[:-1]
+        if os.path.exists(log_file) or not os.path.exists(legacy_file):
+            return
+        with self.lock(user_email):
+            # Another worker may have converted it while this one waited
+            if os.path.exists(log_file):
+                return
+            records = _read_legacy_log(legacy_file)
+            if records is None:
+                return
+            _write_log(log_file, records)
+            try:
+                os.remove(legacy_file)
+            except FileNotFoundError:
+                pass
+
+    def write(self, user_email, kind, value):
+        if kind == DATA_KIND:
+            _write_data(self.path(user_email, kind), value)
+        else:
+            _write_log(self.path(user_email, kind), value)
+
+    def stamp(self, user_email, kind):
+        return file_stamp(self.path(user_email, kind))
+
+    def lock_path(self, user_email):
+        return os.path.join(get_user_files(user_email)[0], '.lock')
+
+    def compaction_lock_path(self):
+        return os.path.join(MEMORY_BASE_DIR, '.compaction.lock')
+
+    def users(self):
+        if not os.path.isdir(MEMORY_BASE_DIR):
+            return
+        for entry in os.scandir(MEMORY_BASE_DIR):
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            data = _read_data(os.path.join(entry.path, 'data.json'))
+            # Directory names are mangled emails; prefer the stored original
+            yield data.get("email") or entry.name.replace('_at_', '@').replace('_dot_', '.')
+
+    def _marker_file(self, user_email):
+        return os.path.join(PENDING_COMPACTION_DIR, _user_key(user_email))
+
+    def mark_pending_compaction(self, user_email):
+        marker_file = self._marker_file(user_email)
+        if not os.path.exists(marker_file):
+            _replace_file(marker_file, lambda f: f.write(user_email))
+
+    def clear_pending_compaction(self, user_email):
+        try:
+            os.remove(self._marker_file(user_email))
+        except FileNotFoundError:
+            pass
+
+    def list_pending_compactions(self):
+        if not os.path.isdir(PENDING_COMPACTION_DIR):
+            return []
+        markers = []
+        for entry in os.scandir(PENDING_COMPACTION_DIR):
+            try:
+                with open(entry.path, 'r') as f:
+                    markers.append((entry.stat().st_mtime, f.read().strip()))
+            except OSError:
+                continue
+        return [email for _, email in sorted(markers) if email]
+
+
+def _read_legacy_log(legacy_file):
+    """Records of a pre-JSONL ``*.json`` list file, or None if it does not exist"""
+    try:
+        with open(legacy_file, 'r') as f:
+            records = json.load(f)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        records = []
+    return records if isinstance(records, list) else []
+
+
+def _read_log(log_file):
+    """Read every record of a JSONL log, skipping blank or partially written lines"""
+    records = []
+    try:
+        f = open(log_file, 'r')
+    except FileNotFoundError:
+        return records
+    with f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue  # Torn write from a crash, dropped at next compaction
+    return records
+
+
+def _append_log(log_file, records):
+    """Append records to a JSONL log without reading or rewriting it"""
+    os.makedirs(os.path.dirname(log_file), exist_ok=True)
+    data = "".join(json.dumps(record) + "\n" for record in records).encode('utf-8')
+    with open(log_file, 'ab+') as f:
+        # Never glue a new record onto a torn last line
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+        f.write(data)
+
+
+def _replace_file(path, write):
+    """
+    Atomically replace ``path`` with what ``write(f)`` produces: the content goes
+    to a unique temp file in the same directory, is fsynced, then renamed over
+    ``path``, so readers see either the old or the new file, never a torn one.
+    """
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # Created like open() would create a new file, so the kernel applies the
+    # umask; a replaced file's mode is then copied over
+    while True:
+        tmp_file = os.path.join(directory, f".{os.path.basename(path)}.{os.urandom(6).hex()}.tmp")
+        try:
+            fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = None
+    try:
+        with os.fdopen(fd, 'w') as f:
+            if mode is not None:
+                os.fchmod(f.fileno(), mode)
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, path)
+    except BaseException:
+        try:
+            os.remove(tmp_file)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _write_log(log_file, records):
+    """Rewrite (compact) a JSONL log so it holds exactly ``records``"""
+    def write(f):
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+    _replace_file(log_file, write)
+
+
+def _read_data(pref_file):
+    """Read a user's data.json, or an empty dict if it is missing or unreadable"""
+    try:
+        with open(pref_file, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _write_data(pref_file, data):
+    _replace_file(pref_file, lambda f: json.dump(data, f, indent=2))
+
+
+def create_backend(name=None):
+    """Create the storage backend named by ``name`` or MEMORY_BACKEND"""
+    name = (name or os.environ.get("MEMORY_BACKEND", "file")).lower()
+    if name == "file":
+        return FileBackend()
+    if name == "sqlite":
+        from .sqlite_storage import SQLiteBackend
+        return SQLiteBackend()
+    raise ValueError(f"Unknown MEMORY_BACKEND: {name}")
@@ -1,9 +1,18 @@
 // chat-functionality.js - Fixed version with proper AI message display and dark mode support
+
+// Trailer the server ends a /chat-stream reply with when it saves the turn
+// (TURN_STATUS in app.py): a record separator, then "saved" or "not-saved"
+const TURN_STATUS = '\x1e';
+const TURN_NOT_SAVED = 'not-saved';
+
 class ChatSessionManager {
     constructor() {
         this.currentSessionId = null;
         this.sessions = [];
+        this.sessionsCursor = null;  // next page of older sessions, null when all are loaded
+        this.messagesCursor = null;  // next page of older messages in the current session
         this.isLoading = false;
+        this.isLoadingMore = false;
         this.messageInput = document.getElementById('messageInput');
         this.sendBtn = document.getElementById('sendBtn');
         this.chatArea = document.getElementById('chatArea');
@@ -42,6 +51,13 @@ class ChatSessionManager {
         this.sendBtn.addEventListener('click', () => {
             this.sendMessageStreaming();
         });
+
+        // Load older messages when scrolled to the top
+        this.chatArea.addEventListener('scroll', () => {
+            if (this.chatArea.scrollTop < 50) {
+                this.loadOlderMessages();
+            }
+        });
     }
 
 createSessionSidebar() {
@@ -73,6 +89,14 @@ createSessionSidebar() {
 
     // Insert sidebar
     chatContainer.insertAdjacentHTML('afterbegin', sidebarHTML);
+
+    // Load more sessions when the list is scrolled to the bottom
+    const sessionList = document.querySelector('.session-list');
+    sessionList.addEventListener('scroll', () => {
+        if (sessionList.scrollTop + sessionList.clientHeight >= sessionList.scrollHeight - 50) {
+            this.loadMoreSessions();
+        }
+    });
     
     // Adjust main content to account for sidebar
     const mainContent = chatContainer;
@@ -149,6 +173,7 @@ createSessionSidebar() {
             if (response.ok) {
                 const data = await response.json();
                 this.sessions = Array.isArray(data) ? data : (data.sessions || []);
+                this.sessionsCursor = data.next_cursor || null;
                 console.log('Loaded sessions:', this.sessions);
             } else if (response.status === 401) {
                 window.location.href = '/login';
@@ -160,6 +185,30 @@ createSessionSidebar() {
         }
     }
 
+    async loadMoreSessions() {
+        if (!this.sessionsCursor || this.isLoadingMore) return;
+
+        this.isLoadingMore = true;
+        try {
+            const response = await fetch(`/api/chat-sessions?cursor=${encodeURIComponent(this.sessionsCursor)}`);
+            if (response.ok) {
+                const data = await response.json();
+                const known = new Set(this.sessions.map(s => s.session_id));
+                this.sessions.push(...(data.sessions || []).filter(s => !known.has(s.session_id)));
+                this.sessionsCursor = data.next_cursor || null;
+                this.updateSessionList();
+            } else if (response.status === 401) {
+                window.location.href = '/login';
+            } else {
+                console.error('Failed to load more sessions:', response.status, response.statusText);
+            }
+        } catch (error) {
+            console.error('Error loading more sessions:', error);
+        } finally {
+            this.isLoadingMore = false;
+        }
+    }
+
     async createNewSession() {
         try {
             const response = await fetch('/api/chat-sessions', {
@@ -176,6 +225,7 @@ createSessionSidebar() {
                 const newSession = await response.json();
                 this.sessions.unshift(newSession);
                 this.currentSessionId = newSession.session_id;
+                this.messagesCursor = null;
                 this.clearChatArea();
                 this.updateSessionList();
                 this.showWelcomeMessage();
@@ -197,10 +247,12 @@ createSessionSidebar() {
             this.currentSessionId = sessionId;
             this.updateSessionList();
 
+            this.messagesCursor = null;
             const response = await fetch(`/api/chat-sessions/${sessionId}/messages`);
             if (response.ok) {
                 const data = await response.json();
                 const messages = data.messages || [];
+                this.messagesCursor = data.next_cursor || null;
                 this.displayMessages(messages);
                 console.log('Loaded messages for session:', sessionId, messages);
             } else if (response.status === 401) {
@@ -213,6 +265,31 @@ createSessionSidebar() {
         }
     }
 
+    async loadOlderMessages() {
+        if (!this.messagesCursor || this.isLoadingMore) return;
+
+        const sessionId = this.currentSessionId;
+        this.isLoadingMore = true;
+        try {
+            const response = await fetch(`/api/chat-sessions/${sessionId}/messages?cursor=${encodeURIComponent(this.messagesCursor)}`);
+            if (response.ok) {
+                const data = await response.json();
+                // Ignore the page if another session was opened meanwhile
+                if (sessionId !== this.currentSessionId) return;
+                this.messagesCursor = data.next_cursor || null;
+                this.prependMessages(data.messages || []);
+            } else if (response.status === 401) {
+                window.location.href = '/login';
+            } else {
+                console.error('Failed to load older messages:', response.status, response.statusText);
+            }
+        } catch (error) {
+            console.error('Error loading older messages:', error);
+        } finally {
+            this.isLoadingMore = false;
+        }
+    }
+
     async deleteSession(sessionId) {
         if (!confirm('Are you sure you want to delete this chat?')) return;
 
@@ -254,6 +331,19 @@ createSessionSidebar() {
         this.scrollToBottom();
     }
 
+    prependMessages(messages) {
+        // Keep the visible messages in place while older ones are added above
+        const previousHeight = this.chatArea.scrollHeight;
+        const firstMessage = this.chatArea.firstChild;
+
+        messages.forEach(message => {
+            const [messageDiv] = this.createMessageElement(message.content, message.message_type === 'user');
+            this.chatArea.insertBefore(messageDiv, firstMessage);
+        });
+
+        this.chatArea.scrollTop += this.chatArea.scrollHeight - previousHeight;
+    }
+
     clearChatArea() {
         this.chatArea.innerHTML = '';
     }
@@ -283,6 +373,14 @@ createSessionSidebar() {
     }
 
     addMessage(text, isUser) {
+    const [messageDiv, messageBubble] = this.createMessageElement(text, isUser);
+    this.chatArea.appendChild(messageDiv);
+    this.scrollToBottom();
+
+    return messageBubble;
+}
+
+    createMessageElement(text, isUser) {
     const messageDiv = document.createElement("div");
     messageDiv.className = `flex ${isUser ? "justify-end" : "justify-start"} mb-4 ${isUser ? 'message-slide-in-right' : 'message-slide-in-left'}`;
 
@@ -292,8 +390,6 @@ createSessionSidebar() {
         : "bg-gray-100 text-gray-900 rounded-lg rounded-tl-none py-2 px-4 max-w-[75%] message-bubble";
 
     messageDiv.appendChild(messageBubble);
-    this.chatArea.appendChild(messageDiv);
-    this.scrollToBottom();
 
     if (isUser) {
         messageBubble.textContent = text;
@@ -301,7 +397,7 @@ createSessionSidebar() {
         this.updateMessageContent(messageBubble, text);
     }
 
-    return messageBubble;
+    return [messageDiv, messageBubble];
 }
 
     updateMessageContent(messageBubble, content) {
@@ -393,25 +489,48 @@ createSessionSidebar() {
             let aiMessage = "";
             let hasStartedDisplaying = false;
 
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-                
-                const chunk = decoder.decode(value, { stream: true });
-                aiMessage += chunk;
-
-                // Remove loading indicator and start displaying content once we have some
-                if (!hasStartedDisplaying && aiMessage.trim().length > 0) {
-                    this.removeLoadingIndicator(messageBubble);
-                    hasStartedDisplaying = true;
-                }
+            // The server saves the turn when it knows the session, and ends the
+            // stream with a trailer (TURN_STATUS in app.py) saying whether it
+            // did. Without the trailer (the stream broke) the server still
+            // saves what it generated, so the turn is only posted here when
+            // the server does not save turns or reported a failed save.
+            const serverSaves = response.headers.get('X-Chat-Turn-Saving') === '1';
+            const visibleText = (text) => {
+                const statusAt = serverSaves ? text.lastIndexOf(TURN_STATUS) : -1;
+                return statusAt === -1 ? text : text.slice(0, statusAt);
+            };
+
+            try {
+                while (true) {
+                    const { done, value } = await reader.read();
+                    if (done) break;
+                    
+                    const chunk = decoder.decode(value, { stream: true });
+                    aiMessage += chunk;
+                    const shown = visibleText(aiMessage);
+
+                    // Remove loading indicator and start displaying content once we have some
+                    if (!hasStartedDisplaying && shown.trim().length > 0) {
+                        this.removeLoadingIndicator(messageBubble);
+                        hasStartedDisplaying = true;
+                    }
+
+                    // Update the message content
+                    if (hasStartedDisplaying) {
+                        this.updateMessageContent(messageBubble, shown);
+                    }
 
-                // Update the message content
-                if (hasStartedDisplaying) {
-                    this.updateMessageContent(messageBubble, aiMessage);
+                    this.scrollToBottom();
                 }
+            } catch (streamError) {
+                console.error("Chat stream ended early:", streamError);
+            }
 
-                this.scrollToBottom();
+            let turnStatus = null;
+            const statusAt = serverSaves ? aiMessage.lastIndexOf(TURN_STATUS) : -1;
+            if (statusAt !== -1) {
+                turnStatus = aiMessage.slice(statusAt + TURN_STATUS.length);
+                aiMessage = aiMessage.slice(0, statusAt);
             }
 
             // Final update to ensure all content is displayed
@@ -420,8 +539,9 @@ createSessionSidebar() {
                 this.updateMessageContent(messageBubble, aiMessage);
             }
 
-            // Save messages to current session
-            await this.saveMessagesToSession(text, aiMessage);
+            if (!serverSaves || turnStatus === TURN_NOT_SAVED) {
+                await this.saveMessagesToSession(text, aiMessage);
+            }
 
         } catch (error) {
             console.error("Error sending message:", error);
@@ -441,37 +561,20 @@ createSessionSidebar() {
         }
 
         try {
-            // Save user message
-            const userResponse = await fetch(`/api/chat-sessions/${this.currentSessionId}/messages`, {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
-                body: JSON.stringify({
-                    message_type: 'user',
-                    content: userMessage
-                })
-            });
-
-            if (!userResponse.ok) {
-                console.error('Failed to save user message:', userResponse.status, userResponse.statusText);
-                return;
-            }
-
-            // Save AI response
-            const aiResponseResult = await fetch(`/api/chat-sessions/${this.currentSessionId}/messages`, {
+            // Save user message and AI response in one request
+            const turnResponse = await fetch(`/api/chat-sessions/${this.currentSessionId}/turns`, {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json'
                 },
                 body: JSON.stringify({
-                    message_type: 'assistant',
-                    content: aiResponse
+                    user_message: userMessage,
+                    assistant_message: aiResponse
                 })
             });
 
-            if (!aiResponseResult.ok) {
-                console.error('Failed to save AI response:', aiResponseResult.status, aiResponseResult.statusText);
+            if (!turnResponse.ok) {
+                console.error('Failed to save messages:', turnResponse.status, turnResponse.statusText);
                 return;
             }
 
@@ -0,0 +1,108 @@
+import io
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+import tarfile
+import tempfile
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.abspath(os.path.join(current_dir, '..', '..'))
+
+MODULES = ["AI.groq_api", "database", "async_database"]
+RUNS = 7
+
+# Runs in a fresh interpreter: imports one module, refusing (and counting)
+# outbound connections so the numbers never depend on the network
+CHILD = r"""
+import contextlib, io, json, socket, sys, time
+attempts = []
+def connect(self, address):
+    attempts.append(str(address))
+    raise OSError("network disabled by bench_import_time")
+socket.socket.connect = connect
+sys.path.insert(0, ".")
+out = io.StringIO()
+started = time.perf_counter()
+error = None
+try:
+    with contextlib.redirect_stdout(out):
+        __import__(sys.argv[1])
+except BaseException as e:
+    error = f"{type(e).__name__}: {e}"
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "connects": len(attempts),
+                  "lines": len(out.getvalue().splitlines()), "error": error}))
+"""
+
+
+def measure(tree, module, runs):
+    """Median import time of ``module`` from ``tree`` over ``runs`` fresh interpreters"""
+    env = dict(os.environ)
+    # Placeholder credentials so a module that checks them at import gets past the check
+    env.setdefault("SUPABASE_URL", "http://127.0.0.1:9")
+    env.setdefault("SUPABASE_ANON_KEY", "bench")
+    results = []
+    for _ in range(runs + 1):  # the first run only writes bytecode caches
+        proc = subprocess.run(
+            [sys.executable, "-c", CHILD, module],
+            cwd=tree, env=env, capture_output=True, text=True
+        )
+        lines = proc.stdout.strip().splitlines()
+        if not lines:
+            return {"seconds": None, "connects": 0, "lines": 0, "error": f"exit code {proc.returncode}"}
+        results.append(json.loads(lines[-1]))
+    results = results[1:]
+    summary = results[-1]
+    summary["seconds"] = statistics.median(r["seconds"] for r in results)
+    return summary
+
+
+def export_tree(ref, destination):
+    """Extract the files of a git ref into ``destination``"""
+    archive = subprocess.run(["git", "archive", ref], cwd=root_dir, capture_output=True, check=True).stdout
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(destination)
+
+
+def report(label, tree, modules, runs):
+    print(f"{label}")
+    timings = {}
+    for module in modules:
+        result = measure(tree, module, runs)
+        timings[module] = None if result["error"] else result["seconds"]
+        if result["error"]:
+            print(f"  {module:<18} import failed ({result['error']})")
+            continue
+        print(f"  {module:<18} {result['seconds'] * 1000:8.1f} ms  "
+              f"connects: {result['connects']}  printed lines: {result['lines']}")
+    return timings
+
+
+def main():
+    """Compare cold import times of the app's entry modules, optionally against a git ref"""
+    parser = argparse.ArgumentParser(description="Measure cold import time of the app's modules")
+    parser.add_argument("--baseline", help="git ref to measure as well, e.g. HEAD~1")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    args = parser.parse_args()
+
+    print("⏱️  Import time benchmark")
+    print("=" * 40)
+    current = report("working tree", root_dir, args.modules, args.runs)
+    if not args.baseline:
+        return
+
+    with tempfile.TemporaryDirectory() as tree:
+        export_tree(args.baseline, tree)
+        baseline = report(args.baseline, tree, args.modules, args.runs)
+
+    for module in args.modules:
+        if current.get(module) and baseline.get(module):
+            print(f"{module:<18} {baseline[module] / current[module]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
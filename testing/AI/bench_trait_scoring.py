@@ -0,0 +1,118 @@
+import os
+import re
+import sys
+import time
+import random
+
+# Make the repository root (memory) and AI/ (modules.*) importable
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+for path in [os.path.join(root_dir, 'AI'), root_dir]:
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from modules.personality.personality_profiler import PersonalityProfiler
+from modules.personality.trait_scoring import NUMPY_AVAILABLE
+
+MESSAGES = 100000
+USERS = 1000
+
+VOCABULARY = (
+    "hey hi please thank you would you could you lol haha omg what why how "
+    "love hate amazing feel curious explain gonna wanna cool awesome sir "
+    "appreciate regarding funny joke wonder interested the a an is it to of "
+    "and in on for with my your this that weather music code python game "
+    "movie book pizza travel work school tomorrow today yesterday"
+).split() + ["!", "!!", "?", "??", ".", "😂", "😀", "❤️"]
+
+
+def synthetic_users(rng):
+    """USERS message lists holding MESSAGES user/assistant messages in total"""
+    users = [[] for _ in range(USERS)]
+    for i in range(MESSAGES):
+        words = [rng.choice(VOCABULARY) for _ in range(rng.randint(1, 30))]
+        users[rng.randrange(USERS)].append({
+            "message": " ".join(words),
+            "role": "user" if i % 4 else "assistant"
+        })
+    return users
+
+
+def legacy_traits(profiler, messages):
+    """The per-message loop analyze_message_patterns used before batched scoring"""
+    user_messages = [m for m in messages if m.get('role') == 'user' or ('role' not in m and 'message' in m)]
+    if not user_messages:
+        return profiler.personality_traits.copy()
+    total_messages = len(user_messages)
+    traits = profiler.personality_traits.copy()
+    formal_count = casual_count = emotional_count = analytical_count = 0
+    humor_count = serious_count = question_count = 0
+    total_words = total_chars = punctuation_count = 0
+    for msg in user_messages:
+        text = msg.get('message', '')
+        if not text:
+            continue
+        words = text.split()
+        total_words += len(words)
+        total_chars += len(text)
+        punctuation_count += len(re.findall(r'[.!?]', text))
+        formal_matches = sum(len(pattern.findall(text)) for pattern in profiler.formal_patterns)
+        casual_matches = sum(len(pattern.findall(text)) for pattern in profiler.casual_patterns)
+        if formal_matches > casual_matches:
+            formal_count += 1
+        elif casual_matches > formal_matches:
+            casual_count += 1
+        if sum(len(pattern.findall(text)) for pattern in profiler.emotional_patterns) > 0:
+            emotional_count += 1
+        else:
+            analytical_count += 1
+        if sum(len(pattern.findall(text)) for pattern in profiler.humor_patterns) > 0:
+            humor_count += 1
+        else:
+            serious_count += 1
+        if sum(len(pattern.findall(text)) for pattern in profiler.question_patterns) > 0:
+            question_count += 1
+    if formal_count + casual_count > 0:
+        traits['formality'] = formal_count / (formal_count + casual_count)
+    if total_words > 0:
+        traits['verbosity'] = min(1.0, max(0.1, total_words / total_messages / 25))
+    if emotional_count + analytical_count > 0:
+        traits['emotiveness'] = emotional_count / (emotional_count + analytical_count)
+    if humor_count + serious_count > 0:
+        traits['humor'] = humor_count / (humor_count + serious_count)
+    traits['curiosity'] = min(1.0, question_count / total_messages)
+    avg_chars = total_chars / total_messages
+    traits['directness'] = min(1.0, (punctuation_count / total_messages) + (1 - min(1.0, avg_chars / 100)))
+    traits['politeness'] = (traits['formality'] + (1 - traits['directness'])) / 2
+    if total_words > 10:
+        all_words = [w for m in user_messages for w in m.get('message', '').lower().split()]
+        traits['creativity'] = min(1.0, len(set(all_words)) / len(all_words) * 3)
+    return traits
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    """Compare batched trait scoring with the per-message loop on MESSAGES messages"""
+    print("⏱️  Trait scoring benchmark")
+    print("=" * 40)
+    print(f"{MESSAGES} messages across {USERS} users, NumPy available: {NUMPY_AVAILABLE}")
+
+    users = synthetic_users(random.Random(0))
+    profiler = PersonalityProfiler()
+
+    legacy, legacy_time = timed(lambda: [legacy_traits(profiler, messages) for messages in users])
+    batched, batched_time = timed(lambda: profiler.analyze_many(users))
+
+    mismatches = sum(a != b for a, b in zip(legacy, batched))
+    print(f"{'per-message loop':<24} {legacy_time:8.3f}s")
+    print(f"{'analyze_many (batched)':<24} {batched_time:8.3f}s  ({legacy_time / batched_time:.1f}x)")
+    print(f"Mismatching users: {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.core.context_builder import SEARCHES_HEADER, SUMMARIES_HEADER, ContextBuilder
+
+SYSTEM_ARGS = ("Be nice.",)
+SUMMARIES = [{"message": "They talked about hiking.", "timestamp": "2026-01-01T10:00:00"}]
+MEMORY = [{"message": "hi", "role": "user"}, {"message": "hello", "role": "assistant"}]
+SEARCH = {"query": "Paris weather", "summary": "Sunny, 25C.", "timestamp": "2026-01-02T09:00:00"}
+
+
+class TestContextSearches:
+    """Relevant earlier web searches are packed into the cached prefix"""
+
+    def setup_method(self):
+        self.renders = 0
+
+        def render(prompt):
+            self.renders += 1
+            return prompt
+
+        self.builder = ContextBuilder(render, budget=1000)
+
+    def contents(self, messages):
+        return [message["content"] for message in messages]
+
+    def test_searches_follow_the_summaries(self):
+        messages = self.builder.build("a@example.com", "weather in Paris?", SYSTEM_ARGS, SUMMARIES, MEMORY, [SEARCH])
+        contents = self.contents(messages)
+        assert contents.index(SUMMARIES_HEADER) < contents.index(SEARCHES_HEADER)
+        assert contents[contents.index(SEARCHES_HEADER) + 1] == "[2026-01-02] Paris weather: Sunny, 25C."
+        assert contents[-1] == "weather in Paris?"
+
+    def test_no_searches_no_header(self):
+        messages = self.builder.build("a@example.com", "hi", SYSTEM_ARGS, SUMMARIES, MEMORY)
+        assert SEARCHES_HEADER not in self.contents(messages)
+
+    def test_prefix_is_rebuilt_when_searches_change(self):
+        self.builder.build("a@example.com", "hi", SYSTEM_ARGS, SUMMARIES, MEMORY, [SEARCH])
+        self.builder.build("a@example.com", "hi again", SYSTEM_ARGS, SUMMARIES, MEMORY, [SEARCH])
+        assert self.renders == 1
+        self.builder.build("a@example.com", "hi", SYSTEM_ARGS, SUMMARIES, MEMORY)
+        assert self.renders == 2
+
+    def test_searches_respect_the_budget(self):
+        long_search = dict(SEARCH, summary="word " * 2000)
+        messages = self.builder.build("a@example.com", "hi", SYSTEM_ARGS, SUMMARIES, MEMORY, [long_search])
+        assert SEARCHES_HEADER not in self.contents(messages)
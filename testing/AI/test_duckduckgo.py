@@ -0,0 +1,50 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.search import duckduckgo
+from AI.modules.search.search_cache import SharedSearchCache
+
+RESULTS = [{"body": "It is sunny in Paris.", "href": "https://example.com/weather"}]
+
+
+class TestSearchSummaryCaching:
+    """Only real Groq summaries are shared through the search cache"""
+
+    def setup_method(self):
+        self.searches = 0
+        self.saved = []
+
+    def patch(self, monkeypatch, summary):
+        def perform_search(query, max_results=5, region='wt-wt'):
+            self.searches += 1
+            return RESULTS
+
+        self.handler = duckduckgo.DuckDuckGoSearch()
+        monkeypatch.setattr(self.handler, "perform_search", perform_search)
+        monkeypatch.setattr(self.handler, "memory_available", True)
+        monkeypatch.setattr(duckduckgo, "search_cache", SharedSearchCache(ttl=60))
+        monkeypatch.setattr(duckduckgo, "summarize_with_groq", lambda messages, instruction="": dict(summary))
+        monkeypatch.setattr(duckduckgo, "save_real_time_memory", lambda entry, user_email: self.saved.append(entry))
+        monkeypatch.setattr(duckduckgo, "append_to_memory", lambda *args: None)
+
+    def search(self, user_email):
+        return list(self.handler.search_and_summarize("Paris weather", user_email, check_cache=False))
+
+    def test_groq_summary_is_cached(self, monkeypatch):
+        self.patch(monkeypatch, {"message": "Sunny.", "key_points": []})
+        assert self.search("a@example.com") == ["Here's what I found: Sunny."]
+        assert self.search("b@example.com") == ["Here's what I found: Sunny."]
+        assert self.searches == 1
+        assert len(self.saved) == 2
+
+    def test_fallback_summary_is_not_cached(self, monkeypatch):
+        self.patch(monkeypatch, {"message": "Summary: It is sunny...", "fallback": True})
+        self.search("a@example.com")
+        self.search("b@example.com")
+        assert self.searches == 2
+        assert self.saved == []
@@ -0,0 +1,109 @@
+import os
+import sys
+import json
+import asyncio
+import functools
+from unittest.mock import patch
+
+import httpx
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import groq_client
+
+SSE_LINES = [
+    'data: {"choices": [{"delta": {"content": "Hel"}}]}',
+    '',
+    'data: {"choices": [{"delta": {"content": "lo"}}]}',
+    '',
+    'data: [DONE]',
+]
+
+
+class FakeGroq:
+    """MockTransport handler standing in for the chat completions endpoint"""
+
+    def __init__(self):
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        payload = json.loads(request.content)
+        if payload["stream"]:
+            return httpx.Response(200, content="\n".join(SSE_LINES).encode() + b"\n")
+        return httpx.Response(200, json={"choices": [{"message": {"content": "Hello"}}]})
+
+    def read_timeout(self, index=-1):
+        return self.requests[index].extensions["timeout"]["read"]
+
+
+class TestGroqClient:
+    """Pooled Groq clients, exercised against an httpx.MockTransport"""
+
+    def setup_method(self):
+        groq_client.close()
+        asyncio.run(groq_client.aclose())
+        self.groq = FakeGroq()
+        transport = httpx.MockTransport(self.groq)
+        self.patches = [
+            patch.object(httpx, "Client", functools.partial(httpx.Client, transport=transport)),
+            patch.object(httpx, "AsyncClient", functools.partial(httpx.AsyncClient, transport=transport)),
+        ]
+        for client_patch in self.patches:
+            client_patch.start()
+
+    def teardown_method(self):
+        groq_client.close()
+        asyncio.run(groq_client.aclose())
+        for client_patch in self.patches:
+            client_patch.stop()
+
+    def test_one_client_is_created_lazily_and_reused(self):
+        assert groq_client._client is None
+        client = groq_client.get_client()
+        assert groq_client.chat_completion([], "model") == "Hello"
+        assert groq_client.chat_completion([], "model") == "Hello"
+        assert groq_client.get_client() is client
+        assert len(self.groq.requests) == 2
+
+    def test_per_call_timeout_defaults_to_groq_timeout(self):
+        groq_client.chat_completion([], "model")
+        assert self.groq.read_timeout() == groq_client.GROQ_TIMEOUT
+        groq_client.chat_completion([], "model", timeout=3)
+        assert self.groq.read_timeout() == 3
+        assert self.groq.requests[-1].extensions["timeout"]["connect"] == groq_client.GROQ_CONNECT_TIMEOUT
+
+    def test_stream_yields_sse_lines(self):
+        lines = list(groq_client.stream_chat_completion_lines([], "model", timeout=7))
+        assert lines == SSE_LINES
+        assert self.groq.read_timeout() == 7
+        assert json.loads(self.groq.requests[-1].content)["stream"] is True
+
+    def test_async_stream_reuses_one_client(self):
+        async def scenario():
+            client = groq_client.get_async_client()
+            first = [line async for line in groq_client.astream_chat_completion_lines([], "model")]
+            second = [line async for line in groq_client.astream_chat_completion_lines([], "model")]
+            return client, first, second
+
+        client, first, second = asyncio.run(scenario())
+        assert first == second == SSE_LINES
+        assert groq_client._async_client is client
+        assert self.groq.read_timeout() == groq_client.GROQ_STREAM_TIMEOUT
+
+    def test_close_resets_the_clients(self):
+        client = groq_client.get_client()
+        groq_client.close()
+        assert groq_client._client is None and client.is_closed
+        assert groq_client.get_client() is not client
+
+        async def scenario():
+            async_client = groq_client.get_async_client()
+            await groq_client.aclose()
+            assert groq_client._async_client is None and async_client.is_closed
+            assert groq_client.get_async_client() is not async_client
+
+        asyncio.run(scenario())
@@ -0,0 +1,78 @@
+import os
+import re
+import sys
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.core.leak_filter import LEAK_AUTOMATON, LEAK_INDICATORS, StreamingLeakFilter, contains_leak
+
+CLEAN = "Here is a recipe: mix the flour, add eggs, and bake for twenty minutes at 180C. Enjoy your systems!"
+
+
+def legacy_contains_leak(content):
+    """The per-regex check the automaton replaced"""
+    lower_content = content.lower()
+    return any(re.search(indicator, lower_content) for indicator in LEAK_INDICATORS)
+
+
+def stream(chunks):
+    leak_filter = StreamingLeakFilter()
+    released = "".join(leak_filter.feed(chunk) for chunk in chunks)
+    return leak_filter, released
+
+
+class TestStreamingLeakFilter:
+    """Indicators are caught across chunk boundaries; clean text flows through"""
+
+    def test_indicator_split_across_two_chunks(self):
+        leak_filter, released = stream(["Sure, my system", " prompt says"])
+        assert leak_filter.leaked
+        assert released == "Sure, my "
+
+    def test_indicator_split_across_three_chunks(self):
+        leak_filter, released = stream(["I use Open", "A", "I models"])
+        assert leak_filter.leaked
+        assert "openai" not in released.lower()
+        assert leak_filter.feed("more text") == ""
+        assert leak_filter.flush() == ""
+
+    def test_clean_stream_holds_back_only_the_partial_match(self):
+        leak_filter = StreamingLeakFilter()
+        fed = released = ""
+        for i in range(0, len(CLEAN), 3):
+            chunk = CLEAN[i:i + 3]
+            fed += chunk
+            released += leak_filter.feed(chunk)
+            assert fed.startswith(released)
+            assert len(fed) - len(released) <= LEAK_AUTOMATON.depth[leak_filter.state]
+        assert not leak_filter.leaked
+
+    def test_flush_releases_the_tail(self):
+        leak_filter, released = stream(["All done with the system"])
+        assert not leak_filter.leaked
+        assert released == "All done with the "
+        assert released + leak_filter.flush() == "All done with the system"
+        assert leak_filter.flush() == ""
+
+    def test_matching_ignores_case(self):
+        assert stream(["As A LANGUAGE", " Model, I"])[0].leaked
+        assert contains_leak("Ask ANTHROPIC")
+
+
+class TestContainsLeak:
+    """The automaton agrees with the old per-regex check"""
+
+    def test_agrees_with_legacy_check(self):
+        rng = random.Random(0)
+        words = ["the", "system", "prompt", "prompts", "my", "design", "guide", "lines", "guideline",
+                 "Open", "AI", "meta", "ai", "as", "a", "language", "model", "rules", "I", "follow",
+                 "current_date", "user", "_prefs", "chat_style", "i", "am", "an", "instruction", "hello"]
+        corpus = [CLEAN, "", "rules I follow", "Rules i follow", "My Design", "systemprompt"]
+        corpus += [rng.choice(["", " "]).join(rng.choice(words) for _ in range(rng.randint(1, 8)))
+                   for _ in range(2000)]
+        for text in corpus:
+            assert contains_leak(text) == legacy_contains_leak(text), text
@@ -0,0 +1,88 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory import memory
+from AI.modules.personality import personality_profiler
+from AI.modules.personality.personality_profiler import (
+    PERSONALITY_PROMPT_VERSION, PersonalityProfiler, get_profiler
+)
+
+USER = "prompt-cache@example.com"
+
+PROFILE = {
+    "personality_traits": {"formality": 0.9, "verbosity": 0.2, "humor": 0.8},
+    "interests": ["astronomy"],
+}
+
+
+def forbid_rendering(monkeypatch):
+    def render(profile):
+        raise AssertionError("prompt was re-rendered")
+    monkeypatch.setattr(PersonalityProfiler, "render_personality_prompt", staticmethod(render))
+
+
+class TestPersonalityPrompt:
+    """The system prompt is rendered once per profile and rendering version"""
+
+    def test_stored_prompt_is_served_without_rendering(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        try:
+            profiler = get_profiler()
+            assert profiler.save_personality_profile(PROFILE, USER)
+            expected = PersonalityProfiler.render_personality_prompt(PROFILE)
+            forbid_rendering(monkeypatch)
+            assert profiler.generate_personality_prompt(USER) == expected
+        finally:
+            memory.user_cache.flush()
+
+    def test_older_version_is_rerendered_and_saved(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        try:
+            memory.update_user_data({
+                "personality_profile": PROFILE,
+                "personality_prompt": "rendered by older rules",
+                "personality_prompt_version": PERSONALITY_PROMPT_VERSION - 1
+            }, USER, write_behind=False)
+            expected = PersonalityProfiler.render_personality_prompt(PROFILE)
+            assert get_profiler().generate_personality_prompt(USER) == expected
+
+            data = memory.get_backend().read(USER, "data")
+            assert data["personality_prompt"] == expected
+            assert data["personality_prompt_version"] == PERSONALITY_PROMPT_VERSION
+            forbid_rendering(monkeypatch)
+            assert get_profiler().generate_personality_prompt(USER) == expected
+        finally:
+            memory.user_cache.flush()
+
+    def test_profile_without_prompt_is_rendered_and_saved(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        try:
+            memory.update_user_data({"personality_profile": PROFILE}, USER, write_behind=False)
+            expected = PersonalityProfiler.render_personality_prompt(PROFILE)
+            assert get_profiler().generate_personality_prompt(USER) == expected
+
+            data = memory.get_backend().read(USER, "data")
+            assert data["personality_prompt"] == expected
+            assert data["personality_prompt_version"] == PERSONALITY_PROMPT_VERSION
+        finally:
+            memory.user_cache.flush()
+
+    def test_user_without_profile_gets_the_default(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        try:
+            assert get_profiler().generate_personality_prompt(USER) == \
+                personality_profiler.DEFAULT_PERSONALITY_PROMPT
+            assert "personality_prompt" not in memory.get_backend().read(USER, "data")
+        finally:
+            memory.user_cache.flush()
+
+    def test_get_profiler_returns_one_instance(self):
+        profiler = get_profiler()
+        assert isinstance(profiler, PersonalityProfiler)
+        assert get_profiler() is profiler
+        assert personality_profiler._profiler is profiler
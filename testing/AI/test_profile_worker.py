@@ -0,0 +1,75 @@
+import os
+import sys
+import threading
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.personality.profile_worker import ProfileRefreshQueue
+
+
+class BlockingRefresh:
+    """refresh_func that records users and blocks until released"""
+
+    def __init__(self, fail_for=()):
+        self.fail_for = set(fail_for)
+        self.calls = []
+        self.started = threading.Event()
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+
+    def __call__(self, user_email):
+        with self.lock:
+            self.calls.append(user_email)
+        self.started.set()
+        self.release.wait(5)
+        if user_email in self.fail_for:
+            raise RuntimeError("Groq unavailable")
+
+
+class TestProfileRefreshQueue:
+    """Users are refreshed once per queued request, off the caller's thread"""
+
+    def test_queued_or_running_user_is_not_queued_again(self):
+        refresh = BlockingRefresh()
+        refresh_queue = ProfileRefreshQueue(workers=1, refresh_func=refresh)
+        try:
+            assert refresh_queue.enqueue("a@example.com")
+            assert refresh.started.wait(5)
+            # Running
+            assert not refresh_queue.enqueue("a@example.com")
+            assert refresh_queue.enqueue("b@example.com")
+            # Queued
+            assert not refresh_queue.enqueue("b@example.com")
+            assert refresh_queue.pending_count() == 2
+        finally:
+            refresh.release.set()
+            refresh_queue.stop()
+        assert refresh.calls == ["a@example.com", "b@example.com"]
+        assert refresh_queue.pending_count() == 0
+
+    def test_stop_drains_the_queue(self):
+        refresh = BlockingRefresh()
+        refresh.release.set()
+        refresh_queue = ProfileRefreshQueue(workers=2, refresh_func=refresh)
+        users = [f"user{i}@example.com" for i in range(10)]
+        for user_email in users:
+            refresh_queue.enqueue(user_email)
+        refresh_queue.stop()
+        assert sorted(refresh.calls) == sorted(users)
+        assert refresh_queue._threads == []
+
+    def test_failed_refresh_does_not_kill_the_worker(self):
+        refresh = BlockingRefresh(fail_for={"a@example.com"})
+        refresh.release.set()
+        refresh_queue = ProfileRefreshQueue(workers=1, refresh_func=refresh)
+        refresh_queue.enqueue("a@example.com")
+        refresh_queue.enqueue("b@example.com")
+        refresh_queue.stop()
+        assert refresh.calls == ["a@example.com", "b@example.com"]
+        # The failed user can be queued again
+        assert refresh_queue.enqueue("a@example.com")
+        refresh_queue.stop()
+        assert refresh.calls[-1] == "a@example.com"
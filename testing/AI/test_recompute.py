@@ -0,0 +1,52 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory import memory
+from AI.modules.personality import recompute
+
+USERS = ("recompute-a@example.com", "recompute-b@example.com")
+
+
+def stored_profile(user_email):
+    return memory.get_backend().read(user_email, "data").get("personality_profile")
+
+
+class TestRecompute:
+    """Offline recompute over a temporary memory directory"""
+
+    def setup_users(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("MEMORY_BACKEND", "file")
+        memory.append_to_memory("Could you please explain how tides work?", "Sure.", USERS[0])
+        memory.append_to_memory("lol that's hilarious!! tell me another one", "Okay!", USERS[1])
+        # Pool workers read storage, not this process's cache
+        memory.user_cache.flush()
+
+    def test_profiles_are_written_for_every_user(self, tmp_path, monkeypatch):
+        self.setup_users(tmp_path, monkeypatch)
+        try:
+            assert recompute.recompute(processes=1, rescan=True) == (2, 0)
+            memory.user_cache.flush()
+            for user_email in USERS:
+                profile = stored_profile(user_email)
+                assert profile["message_count"] == 1
+                assert set(profile["personality_traits"]) >= {"formality", "humor", "curiosity"}
+        finally:
+            memory.user_cache.flush()
+
+    def test_dry_run_writes_nothing(self, tmp_path, monkeypatch):
+        self.setup_users(tmp_path, monkeypatch)
+        try:
+            before = {user_email: memory.get_backend().read(user_email, "data") for user_email in USERS}
+            assert recompute.recompute(processes=1, rescan=True, dry_run=True) == (2, 0)
+            memory.user_cache.flush()
+            for user_email in USERS:
+                assert memory.get_backend().read(user_email, "data") == before[user_email]
+                assert stored_profile(user_email) is None
+        finally:
+            memory.user_cache.flush()
@@ -0,0 +1,129 @@
+import os
+import sys
+import json
+import asyncio
+import threading
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import groq_client
+from AI.modules.core import response
+
+USER = "stream@example.com"
+
+
+def sse_lines(contents):
+    lines = [f"data: {json.dumps({'choices': [{'delta': {'content': content}}]})}" for content in contents]
+    return lines + ["data: [DONE]"]
+
+
+def fake_groq(contents):
+    async def astream_chat_completion_lines(messages, model, temperature=0.7, timeout=None):
+        for line in sse_lines(contents):
+            await asyncio.sleep(0)
+            yield line
+    return astream_chat_completion_lines
+
+
+async def collect(prompt="hello"):
+    return [chunk async for chunk in response.get_groq_response_stream_async(prompt, USER)]
+
+
+class TestStreamAsync:
+    """get_groq_response_stream_async over a stubbed router, search and Groq stream"""
+
+    def setup_method(self):
+        self.saved = []
+        self.patches = [
+            patch.object(response, "append_to_memory",
+                         lambda prompt, ai_response, user_email: self.saved.append(ai_response)),
+        ]
+        for stub in self.patches:
+            stub.start()
+
+    def teardown_method(self):
+        for stub in self.patches:
+            stub.stop()
+
+    def route(self, chunks=None, messages=None):
+        return patch.object(response, "_route_prompt", lambda prompt, user_email: (chunks, messages))
+
+    def test_model_chunks_arrive_in_order_and_are_saved(self):
+        contents = ["The ", "tide ", "is ", "high."]
+        with self.route(messages=[{"role": "user", "content": "hello"}]), \
+                patch.object(groq_client, "astream_chat_completion_lines", fake_groq(contents)):
+            chunks = asyncio.run(collect())
+        assert "".join(chunks) == "The tide is high."
+        assert self.saved == ["The tide is high."]
+
+    def test_leak_split_across_chunks_is_replaced(self):
+        contents = ["Sure! My sys", "tem pro", "mpt says", " hello"]
+        with self.route(messages=[]), \
+                patch.object(groq_client, "astream_chat_completion_lines", fake_groq(contents)):
+            chunks = asyncio.run(collect())
+        assert chunks[-1] == response.LEAK_REPLACEMENT_RESPONSE
+        assert "system prompt" not in "".join(chunks).lower()
+        assert self.saved == ["".join(chunks)]
+
+    def test_search_chunks_stream_one_at_a_time(self):
+        produced = []
+
+        def search():
+            for chunk in ["Searching...", " found ", "three results"]:
+                produced.append(chunk)
+                yield chunk
+
+        async def scenario():
+            seen = []
+            async for chunk in response.get_groq_response_stream_async("news", USER):
+                # Each chunk is sent before the next one is produced
+                assert produced[-1] == chunk
+                seen.append(chunk)
+            return seen
+
+        with self.route(chunks=search()):
+            assert asyncio.run(scenario()) == ["Searching...", " found ", "three results"]
+
+    def test_list_of_chunks_ends_at_the_sentinel(self):
+        with self.route(chunks=["All your memory has been wiped as you requested."]):
+            assert asyncio.run(collect()) == ["All your memory has been wiped as you requested."]
+
+    def test_closing_mid_step_does_not_raise(self):
+        step_started = threading.Event()
+        release = threading.Event()
+        finished = []
+
+        def search():
+            yield "first"
+            step_started.set()
+            release.wait(5)
+            yield "second"
+            finished.append(True)
+
+        async def scenario():
+            stream = response.get_groq_response_stream_async("news", USER)
+            assert await stream.__anext__() == "first"
+            pending = asyncio.ensure_future(stream.__anext__())
+            while not step_started.is_set():
+                await asyncio.sleep(0.001)
+            # The client disconnects while next() runs on the worker thread:
+            # close() hits ValueError ("generator already executing")
+            pending.cancel()
+            try:
+                await pending
+            except asyncio.CancelledError:
+                pass
+            await stream.aclose()
+            release.set()
+
+        with self.route(chunks=search()):
+            try:
+                asyncio.run(scenario())
+            finally:
+                release.set()
+        # The step that was running completed on its thread; nothing asked for more
+        assert finished == []
@@ -0,0 +1,145 @@
+import os
+import sys
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.search import search_cache
+from AI.modules.search.search_cache import SharedSearchCache
+
+CALLERS = 8
+
+
+class CountingEvent(threading.Event):
+    """Event that counts the callers waiting on it"""
+
+    waiting = 0
+    waiting_lock = threading.Lock()
+
+    def wait(self, timeout=None):
+        with CountingEvent.waiting_lock:
+            CountingEvent.waiting += 1
+        return super().wait(timeout)
+
+
+class CountingInFlight(search_cache._InFlight):
+    __slots__ = ()
+
+    def __init__(self):
+        super().__init__()
+        self.done = CountingEvent()
+
+
+class TestSharedSearchCache:
+    """Identical concurrent searches share one fetch"""
+
+    def setup_method(self):
+        CountingEvent.waiting = 0
+        self.cache = SharedSearchCache(ttl=60, max_entries=16)
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+        self.release = threading.Event()
+
+    def fetch(self, result):
+        def run():
+            with self.calls_lock:
+                self.calls += 1
+            # Hold the fetch open until every caller has asked for it
+            self.release.wait(5)
+            return result
+        return run
+
+    def release_when_waiting(self, waiters):
+        """Let the fetch finish once ``waiters`` callers wait for it"""
+        deadline = time.monotonic() + 5
+        while CountingEvent.waiting < waiters and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+
+    def concurrent_lookups(self, queries, result, cacheable=None):
+        with ThreadPoolExecutor(max_workers=len(queries)) as executor:
+            futures = [executor.submit(self.cache.get_or_fetch, query, self.fetch(result), cacheable)
+                       for query in queries]
+            self.release_when_waiting(len(queries) - 1)
+            return [future.result() for future in futures]
+
+    def test_concurrent_callers_fetch_once(self, monkeypatch):
+        monkeypatch.setattr(search_cache, "_InFlight", CountingInFlight)
+        queries = ["Weather in Paris?", "weather  in paris"] * (CALLERS // 2)
+        result = {"status": "ok", "summary": "sunny"}
+        assert self.concurrent_lookups(queries, result) == [result] * CALLERS
+        assert self.calls == 1
+        # Later callers are served from the cache
+        assert self.cache.get_or_fetch("WEATHER in Paris", self.fetch(None)) == result
+        assert self.calls == 1
+
+    def test_uncacheable_result_is_shared_but_not_kept(self, monkeypatch):
+        monkeypatch.setattr(search_cache, "_InFlight", CountingInFlight)
+        result = {"status": "no_results"}
+        results = self.concurrent_lookups(["news"] * CALLERS, result, lambda r: r["status"] == "ok")
+        assert results == [result] * CALLERS
+        assert self.calls == 1
+        assert self.cache.get("news") is None
+
+    def test_fetch_error_reaches_every_waiter(self, monkeypatch):
+        monkeypatch.setattr(search_cache, "_InFlight", CountingInFlight)
+
+        def failing():
+            with self.calls_lock:
+                self.calls += 1
+            self.release.wait(5)
+            raise RuntimeError("search failed")
+
+        errors = []
+
+        def lookup():
+            try:
+                self.cache.get_or_fetch("news", failing)
+            except RuntimeError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=lookup) for _ in range(CALLERS)]
+        for thread in threads:
+            thread.start()
+        self.release_when_waiting(CALLERS - 1)
+        for thread in threads:
+            thread.join()
+        assert self.calls == 1
+        assert len(errors) == CALLERS
+        assert len({id(e) for e in errors}) == 1
+
+
+class TestNormalizeQuery:
+    """Cache keys keep every query that could have different results apart"""
+
+    def test_non_ascii_queries_keep_their_words(self):
+        assert search_cache.normalize_query("東京の天気") == "東京の天気"
+        assert search_cache.normalize_query("Погода в  Москве?") == "погода в москве"
+        assert search_cache.normalize_query("café") != search_cache.normalize_query("caf")
+
+    def test_punctuation_inside_words_is_kept(self):
+        keys = {search_cache.normalize_query(q) for q in ("C++ news", "C# news", "C news")}
+        assert len(keys) == 3
+
+    def test_distinct_queries_do_not_share_results(self):
+        cache = SharedSearchCache(ttl=60, max_entries=16)
+        cache.put("東京の天気", "tokyo")
+        cache.put("погода в Москве", "moscow")
+        cache.put("C++ news", "cpp")
+        assert cache.get("東京の天気") == "tokyo"
+        assert cache.get("погода в Москве") == "moscow"
+        assert cache.get("C# news") is None
+        assert cache.get_or_fetch("C# news", lambda: "csharp") == "csharp"
+        assert cache.get("C++ news") == "cpp"
+
+    def test_query_without_words_is_never_cached(self):
+        cache = SharedSearchCache(ttl=60, max_entries=16)
+        cache.put("???", "first")
+        assert cache.get("???") is None
+        assert cache.get_or_fetch("?!", lambda: "fresh") == "fresh"
+        assert cache.get_or_fetch("...", lambda: "again") == "again"
@@ -0,0 +1,53 @@
+import os
+import sys
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from AI.modules.core.matching import KeywordMatcher, PatternSet
+from AI.modules.search.intelligent_search_detector import (
+    EXPLICIT_PATTERNS, IntelligentSearchDetector, SearchDecision
+)
+
+PROMPTS = [
+    "hello there!", "search for zebra migration", "zebra facts please",
+    "what is the latest news about the election", "what's your favorite movie?",
+    "how does photosynthesis work in desert plants", "tell me about zebras",
+    "bitcoin price today", "thanks!", "Explain quantum tunneling in detail",
+]
+
+
+def custom_detector():
+    """A detector whose rules differ from the defaults"""
+    detector = IntelligentSearchDetector()
+    detector.explicit_patterns = PatternSet((r"zebra\s+(.+)",) + EXPLICIT_PATTERNS)
+    detector.current_topics = detector.current_topics | {"zebras"}
+    detector.time_indicators = detector.time_indicators | {"tell"}
+    detector.keywords = KeywordMatcher(detector.keywords.keywords + ("zebras", "tell"))
+    return detector
+
+
+class TestClassifyMany:
+    """Batch classification matches one-at-a-time classification"""
+
+    def setup_method(self):
+        rng = random.Random(0)
+        self.prompts = [rng.choice(PROMPTS) for _ in range(300)]
+        self.detector = custom_detector()
+
+    def test_configuration_changes_decisions(self):
+        default = IntelligentSearchDetector().classify_many(PROMPTS)
+        assert self.detector.classify_many(PROMPTS) != default
+
+    def test_batch_matches_single_prompts(self):
+        context = {"recent_messages": [{"message": "please search"}], "preferences": {"interaction_style": "information_seeker"}}
+        expected = [SearchDecision.from_result(self.detector.should_search(prompt, context)) for prompt in self.prompts]
+        assert self.detector.classify_many(self.prompts, context) == expected
+
+    def test_pool_matches_serial_for_custom_rules(self):
+        serial = self.detector.classify_many(self.prompts)
+        pooled = self.detector.classify_many(self.prompts, processes=2, chunk_size=50)
+        assert pooled == serial
@@ -0,0 +1,63 @@
+import os
+import sys
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+pytest.importorskip("numpy")
+
+import numpy as np
+
+from AI.modules.personality.personality_profiler import PersonalityProfiler
+from AI.modules.personality.trait_scoring import feature_columns
+
+# Texts where a per-unit count could drift from scanning the whole message
+TRICKY = [
+    "Thank you, Mr.Smith!! Could you help?", "thank  you mr. smith", "Would youth may I?",
+    "lol😂 haha!!!", "I ❤️ this... really?? ?!", "dr.who is AWESOME lmao", "e.g. 3.5 kinda ok",
+    "Kindly explain\nwhy", "nul\x00byte please", "Погода hi Москве!", "", "sup_dude hi5 hey",
+]
+
+
+def stats_traits(profiler, messages):
+    return profiler.traits_from_stats(profiler.update_trait_stats(None, messages))
+
+
+class TestAnalyzeMany:
+    """Batched scoring matches the per-message running statistics"""
+
+    def setup_method(self):
+        self.profiler = PersonalityProfiler()
+
+    def test_batch_matches_per_message_counts(self):
+        users = [[{"message": text, "role": "user"} for text in TRICKY[i::3]] for i in range(3)]
+        users.append([{"message": "only the assistant", "role": "assistant"}])
+        batched = self.profiler.analyze_many(users)
+        for messages, traits in zip(users, batched):
+            expected = stats_traits(self.profiler, messages)
+            assert traits == pytest.approx(expected)
+
+    def test_each_message_alone(self):
+        for text in TRICKY:
+            messages = [{"message": text, "role": "user"}]
+            assert self.profiler.analyze_many([messages])[0] == pytest.approx(stats_traits(self.profiler, messages))
+
+    def test_features_match_per_message_scan(self):
+        texts = [text for text in TRICKY if text]
+        columns = feature_columns(np, texts, self.profiler.unit_pattern, self.profiler._unit_counts)
+        for i, text in enumerate(texts):
+            assert tuple(int(column[i]) for column in columns) == self.profiler._message_features(text), text
+
+    def test_batched_stats_equal_running_stats(self):
+        users = [[{"message": text, "role": "user"} for text in TRICKY[i::2]] for i in range(2)] + [[]]
+        batched = self.profiler.trait_stats_many(users)
+        assert batched == [self.profiler.update_trait_stats(None, messages) for messages in users]
+
+    def test_creativity_agrees_past_the_sketch_size(self):
+        # More distinct words than the vocabulary sketch keeps exactly
+        messages = [{"message": " ".join(f"word{i}_{j}" for j in range(20)), "role": "user"} for i in range(40)]
+        assert self.profiler.analyze_many([messages])[0] == pytest.approx(stats_traits(self.profiler, messages))
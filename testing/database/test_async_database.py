@@ -0,0 +1,134 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+from unittest.mock import patch
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import database
+import async_database
+
+QUERY_SECONDS = 0.2
+CONCURRENT_QUERIES = 8
+TICK_SECONDS = 0.005
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class BlockingQuery:
+    """Chained Supabase query whose execute() blocks like a network round-trip"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def __getattr__(self, name):
+        # select/eq/order/limit/... all keep building the same query
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        client = self.client
+        with client.lock:
+            client.in_flight += 1
+            client.max_in_flight = max(client.max_in_flight, client.in_flight)
+        try:
+            time.sleep(QUERY_SECONDS)
+        finally:
+            with client.lock:
+                client.in_flight -= 1
+        return FakeResult([])
+
+
+class BlockingSupabase:
+    """Synchronous stand-in for the Supabase client database.py uses"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def table(self, name):
+        return BlockingQuery(self)
+
+
+async def stream_gaps(duration):
+    """Simulated token stream: returns the longest gap between ticks"""
+    longest = 0.0
+    last = time.perf_counter()
+    deadline = last + duration
+    while last < deadline:
+        await asyncio.sleep(TICK_SECONDS)
+        now = time.perf_counter()
+        longest = max(longest, now - last)
+        last = now
+    return longest
+
+
+class TestAsyncDatabase:
+    """The async_database wrappers keep blocking Supabase calls off the event loop"""
+
+    def setup_method(self):
+        self.supabase = BlockingSupabase()
+        self.client = patch.object(database, "_supabase", self.supabase)
+        self.client.start()
+        database._session_owners.clear()
+        async_database.shutdown()
+
+    def teardown_method(self):
+        async_database.shutdown()
+        database._session_owners.clear()
+        self.client.stop()
+
+    def test_blocking_query_does_not_stall_the_stream(self):
+        async def scenario():
+            stream = asyncio.create_task(stream_gaps(QUERY_SECONDS * 2))
+            await asyncio.sleep(TICK_SECONDS)
+            sessions = await async_database.get_user_chat_sessions("user@example.com")
+            owned = await async_database.user_owns_chat_session("session", "user@example.com")
+            return sessions, owned, await stream
+
+        sessions, owned, longest_gap = asyncio.run(scenario())
+        assert (sessions, owned) == ([], False)
+        assert self.supabase.max_in_flight == 1
+        # Two round-trips ran while the stream kept ticking
+        assert longest_gap < QUERY_SECONDS / 2
+
+    def test_offloaded_calls_keep_the_stream_flowing(self):
+        async def scenario():
+            stream = asyncio.create_task(stream_gaps(QUERY_SECONDS * 2))
+            started = time.perf_counter()
+            results = await asyncio.gather(*[
+                async_database.get_user_chat_sessions("user@example.com")
+                for _ in range(CONCURRENT_QUERIES)
+            ])
+            elapsed = time.perf_counter() - started
+            return results, elapsed, await stream
+
+        results, elapsed, longest_gap = asyncio.run(scenario())
+        assert results == [[]] * CONCURRENT_QUERIES
+        # Queries overlap on the pool instead of running one after another
+        assert elapsed < QUERY_SECONDS * CONCURRENT_QUERIES / 2
+        # The stream never waited for a query
+        assert longest_gap < QUERY_SECONDS / 2
+
+    def test_pool_caps_concurrent_queries(self):
+        with patch.object(async_database, "DB_EXECUTOR_WORKERS", 2):
+            async_database.shutdown()
+
+            async def scenario():
+                started = time.perf_counter()
+                await asyncio.gather(*[
+                    async_database.get_chat_messages("session") for _ in range(4)
+                ])
+                return time.perf_counter() - started
+
+            # Four queries on two threads take two rounds, never more than two at once
+            assert asyncio.run(scenario()) >= QUERY_SECONDS * 2
+            assert self.supabase.max_in_flight == 2
@@ -0,0 +1,298 @@
+import os
+import re
+import sys
+import uuid
+import base64
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+import database
+
+SESSION_ID = "0b7d3c1e-2f4a-4c5b-9d6e-7f8a9b0c1d2e"
+# The filter _keyset_page sends for rows after a cursor
+AFTER_CURSOR_RE = re.compile(r'^(\w+)\.lt\."([^"]+)",and\((\w+)\.eq\."([^"]+)",(\w+)\.lt\.([\w-]+)\)$')
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """Records one chained Supabase query against an in-memory table"""
+
+    def __init__(self, table):
+        self.table = table
+        self.values = None
+        self.deleting = False
+        self.filters = []
+        self.orders = []
+        self.row_limit = None
+
+    def select(self, columns):
+        return self
+
+    def insert(self, values):
+        self.values = values if isinstance(values, list) else [values]
+        self.table.inserts.append(self.values)
+        return self
+
+    def delete(self):
+        self.deleting = True
+        return self
+
+    def update(self, values):
+        self.table.updates.append(values)
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def or_(self, expression):
+        time_column, timestamp, same_column, same_timestamp, id_column, row_id = \
+            AFTER_CURSOR_RE.match(expression).groups()
+        assert (time_column, timestamp) == (same_column, same_timestamp)
+        self.table.cursor_filters.append(expression)
+        self.filters.append(lambda row: row[time_column] < timestamp or (
+            row[time_column] == timestamp and row[id_column] < row_id))
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.row_limit = count
+        return self
+
+    def execute(self):
+        if self.values is not None:
+            rows = [{"session_id": SESSION_ID, **row} for row in self.values]
+            self.table.rows.extend(rows)
+            return FakeResult(rows)
+        rows = [row for row in self.table.rows if all(match(row) for match in self.filters)]
+        if self.deleting:
+            self.table.rows = [row for row in self.table.rows if row not in rows]
+            return FakeResult(rows)
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        return FakeResult(rows[:self.row_limit])
+
+
+class FakeTable:
+    def __init__(self):
+        self.rows = []
+        self.inserts = []
+        self.updates = []
+        self.cursor_filters = []
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+
+    def table(self, name):
+        return FakeQuery(self.tables.setdefault(name, FakeTable()))
+
+
+def parse(timestamp):
+    parsed = datetime.fromisoformat(timestamp)
+    # Postgres would read a naive value in the server's zone; never send one
+    assert parsed.tzinfo is not None, f"naive timestamp {timestamp!r}"
+    return parsed.astimezone(timezone.utc)
+
+
+class TestChatTimestamps:
+    """Message and session timestamps all come from one aware-UTC clock"""
+
+    def setup_method(self):
+        self.supabase = FakeSupabase()
+        self.previous = database._supabase
+        database._supabase = self.supabase
+
+    def teardown_method(self):
+        database._supabase = self.previous
+
+    def test_turn_and_session_share_one_clock(self):
+        before = datetime.now(timezone.utc)
+        saved = database.save_chat_turn(SESSION_ID, "a@example.com", "hi", "hello")
+        after = datetime.now(timezone.utc)
+
+        assert [row["message_type"] for row in saved] == ["user", "assistant"]
+        prompt, reply = (parse(row["created_at"]) for row in saved)
+        assert before <= prompt < reply <= after
+
+        [update] = self.supabase.tables["chat_sessions"].updates
+        # The session sorts by its latest message
+        assert parse(update["updated_at"]) == reply
+
+    def test_single_message_bumps_session_to_its_timestamp(self):
+        saved = database.save_chat_message(SESSION_ID, "a@example.com", "user", "hi")
+        [update] = self.supabase.tables["chat_sessions"].updates
+        assert parse(update["updated_at"]) == parse(saved["created_at"])
+
+    def test_new_session_timestamps_are_aware(self):
+        session = database.create_chat_session("a@example.com")
+        assert parse(session["created_at"]) == parse(session["updated_at"])
+        database._session_owners.clear()
+
+
+class TestSessionOwnership:
+    """Only confirmed ownership is cached"""
+
+    def setup_method(self):
+        self.supabase = FakeSupabase()
+        self.previous = database._supabase
+        database._supabase = self.supabase
+        database._session_owners.clear()
+
+    def teardown_method(self):
+        database._supabase = self.previous
+        database._session_owners.clear()
+
+    def test_missing_session_is_not_cached(self):
+        assert not database.user_owns_chat_session(SESSION_ID, "a@example.com")
+        assert database.cached_session_ownership(SESSION_ID, "a@example.com") is None
+
+        # Created by another worker (or the insert became visible late)
+        self.supabase.table("chat_sessions").insert({"user_email": "a@example.com"}).execute()
+        assert database.user_owns_chat_session(SESSION_ID, "a@example.com")
+        assert database.cached_session_ownership(SESSION_ID, "a@example.com") is True
+
+    def test_other_users_session_is_not_owned(self):
+        self.supabase.table("chat_sessions").insert({"user_email": "a@example.com"}).execute()
+        assert not database.user_owns_chat_session(SESSION_ID, "b@example.com")
+        assert database.cached_session_ownership(SESSION_ID, "b@example.com") is None
+
+    def test_deleted_session_is_forgotten(self):
+        database.create_chat_session("a@example.com")
+        assert database.cached_session_ownership(SESSION_ID, "a@example.com") is True
+        database.delete_chat_session(SESSION_ID, "a@example.com")
+        assert database.cached_session_ownership(SESSION_ID, "a@example.com") is None
+
+
+def message_rows(count, same_time_every=1):
+    """Messages of SESSION_ID, ``same_time_every`` of them sharing each created_at"""
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    return [{
+        "message_id": str(uuid.uuid4()),
+        "session_id": SESSION_ID,
+        "message_type": "user",
+        "content": f"message {i}",
+        "created_at": (start + timedelta(seconds=i // same_time_every)).isoformat()
+    } for i in range(count)]
+
+
+def encode_raw(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+class TestCursors:
+    """Page cursors round-trip and reject anything that is not one of ours"""
+
+    def test_round_trip(self):
+        row_id = str(uuid.uuid4())
+        for timestamp in ("2025-01-01T12:30:00.123456+00:00", "2025-01-01T12:30:00Z", "2025-01-01 12:30:00"):
+            assert database.decode_cursor(database.encode_cursor(timestamp, row_id)) == (timestamp, row_id)
+
+    def test_row_id_is_normalized(self):
+        row_id = uuid.uuid4()
+        cursor = database.encode_cursor("2025-01-01T00:00:00+00:00", str(row_id).upper())
+        assert database.decode_cursor(cursor)[1] == str(row_id)
+
+    @pytest.mark.parametrize("cursor", [
+        "",
+        "not base64!",
+        base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+        encode_raw({"timestamp": "2025-01-01T00:00:00+00:00"}),
+        encode_raw(["2025-01-01T00:00:00+00:00"]),
+        encode_raw([None, str(uuid.UUID(int=1))]),
+        encode_raw(["2025-01-01T00:00:00+00:00", "not-a-uuid"]),
+        # Tampered values that would otherwise reach the PostgREST filter
+        encode_raw(['2025-01-01T00:00:00+00:00",id.gt."0', str(uuid.UUID(int=1))]),
+        encode_raw(["2025-01-01T00:00:00+00:00", "00000000-0000-0000-0000-000000000001),or(id.gt.0"]),
+    ])
+    def test_malformed_cursors_raise_value_error(self, cursor):
+        with pytest.raises(ValueError):
+            database.decode_cursor(cursor)
+
+    def test_tampered_cursor_never_reaches_the_query(self):
+        supabase = FakeSupabase()
+        query = supabase.table("chat_messages").select(database.MESSAGE_COLUMNS)
+        with pytest.raises(ValueError):
+            database._keyset_page(query, "created_at", "message_id", 10,
+                                  encode_raw(['x",id.gt."0', str(uuid.UUID(int=1))]))
+        assert supabase.tables["chat_messages"].cursor_filters == []
+
+
+class TestKeysetPagination:
+    """Walking every page returns each row once, newest first"""
+
+    def setup_method(self):
+        self.supabase = FakeSupabase()
+        self.previous = database._supabase
+        database._supabase = self.supabase
+
+    def teardown_method(self):
+        database._supabase = self.previous
+
+    def seed(self, rows):
+        self.supabase.tables["chat_messages"] = FakeTable()
+        self.supabase.tables["chat_messages"].rows = rows
+
+    def walk(self, limit):
+        table = self.supabase.tables["chat_messages"]
+        pages, cursor = [], None
+        while True:
+            query = self.supabase.table("chat_messages").select(database.MESSAGE_COLUMNS)
+            rows, cursor = database._keyset_page(query, "created_at", "message_id", limit, cursor)
+            pages.append(rows)
+            if cursor is None:
+                return pages
+            assert len(pages) <= len(table.rows), "pagination does not terminate"
+
+    def newest_first(self, rows):
+        return sorted(rows, key=lambda row: (row["created_at"], row["message_id"]), reverse=True)
+
+    def test_pages_cover_every_row_once(self):
+        rows = message_rows(7)
+        self.seed(list(rows))
+        pages = self.walk(limit=3)
+        assert [len(page) for page in pages] == [3, 3, 1]
+        assert [row for page in pages for row in page] == self.newest_first(rows)
+
+    def test_ties_on_created_at_break_on_the_id(self):
+        # Every page boundary falls inside a group of equal timestamps
+        rows = message_rows(12, same_time_every=4)
+        self.seed(list(rows))
+        pages = self.walk(limit=3)
+        walked = [row for page in pages for row in page]
+        assert len({row["message_id"] for row in walked}) == len(rows)
+        assert walked == self.newest_first(rows)
+
+    def test_exact_multiple_of_the_page_size_ends_without_an_empty_page(self):
+        rows = message_rows(6)
+        self.seed(list(rows))
+        assert [len(page) for page in self.walk(limit=3)] == [3, 3]
+
+    def test_limit_is_clamped(self):
+        self.seed(message_rows(database.MAX_PAGE_SIZE + 5))
+        query = self.supabase.table("chat_messages").select(database.MESSAGE_COLUMNS)
+        rows, cursor = database._keyset_page(query, "created_at", "message_id", 10_000, None)
+        assert len(rows) == database.MAX_PAGE_SIZE and cursor is not None
+
+    def test_message_pages_are_oldest_first_within_a_page(self):
+        rows = message_rows(5, same_time_every=2)
+        self.seed(list(rows))
+        messages, cursor = database.get_chat_messages_page(SESSION_ID, limit=3)
+        assert messages == list(reversed(self.newest_first(rows)[:3]))
+        older, cursor = database.get_chat_messages_page(SESSION_ID, limit=3, cursor=cursor)
+        assert older == list(reversed(self.newest_first(rows)[3:])) and cursor is None
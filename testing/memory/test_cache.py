@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory.cache import UserStateCache
+from memory.storage import FileBackend
+
+RECORD = {"message": "hello", "role": "user"}
+INCREMENTS = 150
+
+
+def increment_in_process(user_email):
+    """Worker process with its own cache, like a separate uvicorn worker"""
+    cache = UserStateCache(FileBackend(), flush_interval=3600)
+    for _ in range(INCREMENTS):
+        cache.modify(user_email, "data", lambda data: {"count": data.get("count", 0) + 1})
+        # Served from this process's cache between increments
+        cache.get(user_email, "data")
+
+
+def add(total, delta):
+    return (total or 0) + delta
+
+
+def accumulate_in_process(user_email):
+    """Worker process adding to a running total through its write-behind cache"""
+    cache = UserStateCache(FileBackend(), flush_interval=3600)
+    for i in range(INCREMENTS):
+        cache.accumulate(user_email, "data", "count", 1, add)
+        if i % 10 == 0:
+            cache.flush()
+    cache.flush()
+
+
+class TestUserStateCache:
+    """LRU eviction, write-behind flushing and read-modify-write of the memory cache"""
+
+    def setup_method(self):
+        self.backend = FileBackend()
+        # The background flusher never fires during a test; flushes are explicit
+        self.cache = UserStateCache(self.backend, max_users=2, flush_interval=3600)
+
+    def test_pending_writes_are_read_back_before_flush(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.append("a@example.com", "memory", [RECORD])
+        self.cache.update("a@example.com", "data", {"theme": "dark"})
+
+        assert self.cache.get("a@example.com", "memory") == [RECORD]
+        assert self.cache.get("a@example.com", "data") == {"theme": "dark"}
+        assert self.backend.read("a@example.com", "memory") == []
+
+        self.cache.flush()
+        assert self.backend.read("a@example.com", "memory") == [RECORD]
+        assert self.backend.read("a@example.com", "data") == {"theme": "dark"}
+
+    def test_least_recently_used_user_is_evicted(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        for user_email in ("a@example.com", "b@example.com", "a@example.com", "c@example.com"):
+            self.cache.get(user_email, "memory")
+        assert list(self.cache._users) == ["a@example.com", "c@example.com"]
+
+    def test_unflushed_user_is_kept_until_flushed(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.append("a@example.com", "memory", [RECORD])
+        self.cache.get("b@example.com", "memory")
+        self.cache.get("c@example.com", "memory")
+        # Over capacity, but evicting "a" would drop its unflushed append
+        assert "a@example.com" in self.cache._users
+
+        self.cache.flush()
+        self.cache.get("d@example.com", "memory")
+        assert "a@example.com" not in self.cache._users
+        assert self.backend.read("a@example.com", "memory") == [RECORD]
+        assert self.cache.get("a@example.com", "memory") == [RECORD]
+
+    def test_concurrent_modify_loses_no_increment(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+
+        def increment(_):
+            self.cache.modify("a@example.com", "data", lambda data: {"count": data.get("count", 0) + 1})
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(increment, range(400)))
+        self.cache.flush()
+        assert self.cache.get("a@example.com", "data")["count"] == 400
+        assert self.backend.read("a@example.com", "data")["count"] == 400
+
+    def test_modify_is_atomic_across_processes(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=increment_in_process, args=("a@example.com",)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+        assert self.backend.read("a@example.com", "data")["count"] == INCREMENTS * 2
+
+    def test_modify_keeps_pending_updates(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.update("a@example.com", "data", {"theme": "dark"})
+        self.cache.modify("a@example.com", "data", lambda data: {"count": 1})
+        assert self.backend.read("a@example.com", "data") == {"theme": "dark", "count": 1}
+        assert self.cache.get("a@example.com", "data") == {"theme": "dark", "count": 1}
+
+    def test_accumulate_is_write_behind(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.update("a@example.com", "data", {"theme": "dark"})
+        for _ in range(3):
+            self.cache.accumulate("a@example.com", "data", "count", 1, add)
+        assert self.cache.get("a@example.com", "data") == {"theme": "dark", "count": 3}
+        assert self.backend.read("a@example.com", "data") == {}
+
+        # Another worker's total is added to, not overwritten
+        self.backend.write("a@example.com", "data", {"count": 10})
+        self.cache.flush()
+        assert self.backend.read("a@example.com", "data") == {"theme": "dark", "count": 13}
+
+    def test_update_supersedes_earlier_deltas(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.accumulate("a@example.com", "data", "count", 5, add)
+        self.cache.update("a@example.com", "data", {"count": 100})
+        self.cache.accumulate("a@example.com", "data", "count", 1, add)
+        assert self.cache.get("a@example.com", "data") == {"count": 101}
+        self.cache.flush()
+        assert self.backend.read("a@example.com", "data") == {"count": 101}
+
+    def test_accumulate_adds_up_across_processes(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=accumulate_in_process, args=("a@example.com",)) for _ in range(2)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(60)
+            assert worker.exitcode == 0
+        assert self.backend.read("a@example.com", "data")["count"] == INCREMENTS * 2
+
+    def test_lock_flushes_and_excludes_other_threads(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        self.cache.append("a@example.com", "memory", [RECORD])
+        entered = threading.Event()
+        order = []
+
+        def other():
+            entered.wait()
+            with self.cache.lock("a@example.com"):
+                order.append("other")
+
+        thread = threading.Thread(target=other)
+        thread.start()
+        with self.cache.lock("a@example.com"):
+            # Reads inside the lock see storage, so pending writes went first
+            assert self.backend.read("a@example.com", "memory") == [RECORD]
+            entered.set()
+            thread.join(0.2)
+            order.append("owner")
+        thread.join()
+        assert order == ["owner", "other"]
@@ -0,0 +1,35 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory.compaction import CompactionWorker
+
+
+class TestCompactionLeadership:
+    """Only one compaction worker at a time may process the pending markers"""
+
+    def setup_method(self):
+        self.workers = [CompactionWorker(), CompactionWorker()]
+
+    def teardown_method(self):
+        for worker in self.workers:
+            worker.release_leadership()
+
+    def test_one_worker_holds_the_lock(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        first, second = self.workers
+        assert first.acquire_leadership()
+        assert first.acquire_leadership()  # Already held
+        assert not second.acquire_leadership()
+
+    def test_lock_passes_on_when_released(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        first, second = self.workers
+        assert first.acquire_leadership()
+        first.release_leadership()
+        assert second.acquire_leadership()
+        assert not first.acquire_leadership()
@@ -0,0 +1,73 @@
+import os
+import sys
+import json
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory.migrate import migrate
+from memory.sqlite_storage import SQLiteBackend
+from memory.storage import FileBackend, get_real_time_files, get_user_files
+
+USER = "user@example.com"
+MEMORY = [{"message": "hi", "role": "user"}, {"message": "hello", "role": "assistant"}]
+SUMMARIES = [{"message": "they said hi"}]
+REAL_TIME = [{"query": "weather", "summary": "sunny"}]
+
+
+def build_tree():
+    """A user with legacy memory.json, a JSONL summary log and a pending marker"""
+    user_dir, memory_file, summary_file, pref_file = get_user_files(USER)
+    os.makedirs(user_dir)
+    with open(memory_file[:-1], 'w') as f:
+        json.dump(MEMORY, f)
+    with open(summary_file, 'w') as f:
+        f.writelines(json.dumps(record) + "\n" for record in SUMMARIES)
+    with open(get_real_time_files(USER)[1][:-1], 'w') as f:
+        json.dump(REAL_TIME, f)
+    with open(pref_file, 'w') as f:
+        json.dump({"email": USER, "theme": "dark"}, f)
+    FileBackend().mark_pending_compaction(USER)
+
+
+def snapshot(root):
+    files = {}
+    for directory, _, names in os.walk(root):
+        for name in names:
+            path = os.path.join(directory, name)
+            with open(path, 'rb') as f:
+                files[path] = f.read()
+    return files
+
+
+class TestMigrate:
+    """Copying the file tree into SQLite"""
+
+    def test_dry_run_leaves_the_tree_untouched(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        build_tree()
+        before = snapshot("memory")
+
+        assert migrate(str(tmp_path / "memory.db"), dry_run=True) == 1
+        assert snapshot("memory") == before
+        assert not (tmp_path / "memory.db").exists()
+
+    def test_migrates_legacy_and_jsonl_logs(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        build_tree()
+        before = snapshot("memory")
+
+        db_path = str(tmp_path / "memory.db")
+        assert migrate(db_path) == 1
+        target = SQLiteBackend(db_path)
+        try:
+            assert target.read(USER, "memory") == MEMORY
+            assert target.read(USER, "summaries") == SUMMARIES
+            assert target.read(USER, "real_time") == REAL_TIME
+            assert target.read(USER, "data")["theme"] == "dark"
+            assert target.list_pending_compactions() == [USER]
+        finally:
+            target.close()
+        assert snapshot("memory") == before
@@ -0,0 +1,105 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory import memory
+from memory.realtime import RealTimeIndex
+
+
+def entry(query, hours_ago, key_points=()):
+    timestamp = (datetime.now() - timedelta(hours=hours_ago)).isoformat()
+    return {"query": query, "summary": f"about {query}", "key_points": list(key_points), "timestamp": timestamp}
+
+
+class TestRealTimeIndex:
+    """Freshness lookups over the per-user real-time entries"""
+
+    def test_returns_the_newest_fresh_match(self):
+        index = RealTimeIndex()
+        index.add([entry("weather in Paris", 3), entry("Paris weather today", 1), entry("football scores", 0)])
+        since = datetime.now() - timedelta(hours=24)
+        assert index.lookup("Paris weather", since)["query"] == "Paris weather today"
+        assert index.lookup("weather in Rome", since) is None
+
+    def test_stale_entries_are_not_served(self):
+        index = RealTimeIndex()
+        index.add([entry("Paris weather", 30)])
+        assert index.lookup("Paris weather", datetime.now() - timedelta(hours=24)) is None
+        assert index.lookup("Paris weather", datetime.now() - timedelta(hours=48)) is not None
+
+    def test_non_latin_queries_match(self):
+        index = RealTimeIndex()
+        index.add([entry("東京 天気", 2), entry("Погода в Москве", 1)])
+        since = datetime.now() - timedelta(hours=24)
+        assert index.lookup("погода в москве", since)["query"] == "Погода в Москве"
+        assert index.lookup("東京 天気", since)["query"] == "東京 天気"
+        assert index.lookup("Погода в Киеве", since) is None
+
+    def test_key_point_made_of_search_terms_matches(self):
+        index = RealTimeIndex()
+        index.add([entry("latest news", 1, key_points=["election results"])])
+        since = datetime.now() - timedelta(hours=24)
+        assert index.lookup("election results", since)["query"] == "latest news"
+        assert index.lookup("results", since) is None
+
+
+class TestRealTimeEviction:
+    """save_real_time_memory keeps the log within its age and size limits"""
+
+    def test_expired_and_excess_entries_are_dropped(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setattr(memory, "REAL_TIME_TTL_HOURS", 24)
+        monkeypatch.setattr(memory, "REAL_TIME_MAX_ENTRIES", 4)
+        user_email = "realtime-eviction@example.com"
+        try:
+            memory.save_real_time_memory(entry("old news", 48), user_email)
+            assert memory.load_real_time_memory(user_email) == []
+
+            # Trimmed back to the limit once the log is a quarter over it
+            for i in range(6):
+                memory.save_real_time_memory(entry(f"topic {i}", 1), user_email)
+                assert len(memory.load_real_time_memory(user_email)) <= 5
+            queries = [e["query"] for e in memory.load_real_time_memory(user_email)]
+            assert queries == ["topic 2", "topic 3", "topic 4", "topic 5"]
+
+            # The index was rebuilt from the trimmed log
+            assert memory.find_real_time_memory("topic 1", user_email) is None
+            assert memory.find_real_time_memory("topic 5", user_email)["query"] == "topic 5"
+        finally:
+            memory.user_cache.flush()
+
+
+class TestRealTimeRetrieval:
+    """search_real_time_memory ranks entries by relevance to the prompt"""
+
+    def test_only_matching_entries_best_first(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        user_email = "realtime-search@example.com"
+        try:
+            memory.save_real_time_memory(entry("Paris weather", 5), user_email)
+            memory.save_real_time_memory(entry("football scores", 4), user_email)
+            memory.save_real_time_memory(entry("weather in Paris this weekend Paris", 3), user_email)
+            found = memory.search_real_time_memory("is it sunny in Paris", user_email, k=5)
+            assert [e["query"] for e in found] == ["weather in Paris this weekend Paris", "Paris weather"]
+            assert memory.search_real_time_memory("stock market", user_email) == []
+        finally:
+            memory.user_cache.flush()
+
+    def test_non_latin_entries_are_found(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        user_email = "realtime-unicode@example.com"
+        try:
+            memory.save_real_time_memory(entry("Погода в Москве", 2), user_email)
+            memory.save_real_time_memory(entry("Straße gesperrt", 1), user_email)
+            found = memory.search_real_time_memory("какая погода в Москве", user_email)
+            assert [e["query"] for e in found] == ["Погода в Москве"]
+            # Casefolding matches "STRASSE" to "Straße"
+            found = memory.search_real_time_memory("STRASSE", user_email)
+            assert [e["query"] for e in found] == ["Straße gesperrt"]
+        finally:
+            memory.user_cache.flush()
@@ -0,0 +1,37 @@
+import os
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory import sqlite_storage
+from memory.sqlite_storage import SQLiteBackend
+
+
+class TestSQLiteLocks:
+    """Per-user write locks map onto a bounded set of lock files"""
+
+    def test_lock_files_do_not_grow_with_users(self, tmp_path):
+        backend = SQLiteBackend(str(tmp_path / "memory.db"))
+        try:
+            for i in range(500):
+                with backend.lock(f"user{i}@example.com"):
+                    pass
+            lock_files = os.listdir(tmp_path / "memory.db.locks")
+            assert len(lock_files) <= sqlite_storage.MEMORY_SQLITE_LOCK_STRIPES
+        finally:
+            backend.close()
+
+    def test_users_sharing_a_stripe_can_nest(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(sqlite_storage, "MEMORY_SQLITE_LOCK_STRIPES", 1)
+        backend = SQLiteBackend(str(tmp_path / "memory.db"))
+        try:
+            assert backend.lock_path("a@example.com") == backend.lock_path("b@example.com")
+            with backend.lock("a@example.com"):
+                with backend.lock("b@example.com"):
+                    backend.append("b@example.com", "memory", [{"message": "hi"}])
+            assert backend.read("b@example.com", "memory") == [{"message": "hi"}]
+        finally:
+            backend.close()
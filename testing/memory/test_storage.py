@@ -0,0 +1,76 @@
+import os
+import sys
+import json
+import stat
+from concurrent.futures import ThreadPoolExecutor
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.join(current_dir, '..', '..')
+if root_dir not in sys.path:
+    sys.path.insert(0, root_dir)
+
+from memory.storage import FileBackend, get_user_files
+
+RECORDS = [{"message": f"message {i}", "role": "user"} for i in range(5)]
+
+
+def write_legacy_memory(user_email):
+    user_dir, memory_file, _, _ = get_user_files(user_email)
+    os.makedirs(user_dir, exist_ok=True)
+    with open(memory_file[:-1], 'w') as f:
+        json.dump(RECORDS, f)
+    return memory_file
+
+
+class TestLegacyMigration:
+    """Pre-JSONL memory.json files are converted once, whoever reads them first"""
+
+    def test_concurrent_readers_all_see_the_records(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        backend = FileBackend()
+        for i in range(20):
+            user_email = f"user{i}@example.com"
+            memory_file = write_legacy_memory(user_email)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                results = list(executor.map(lambda _: backend.read(user_email, "memory"), range(8)))
+            assert results == [RECORDS] * 8
+            assert os.path.exists(memory_file)
+            assert not os.path.exists(memory_file[:-1])
+
+    def test_vanished_legacy_file_counts_as_migrated(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        backend = FileBackend()
+        memory_file = write_legacy_memory("user@example.com")
+        # Another worker converts and removes it after this one saw it
+        real_exists = os.path.exists
+        monkeypatch.setattr(os.path, "exists", lambda path: True if path == memory_file[:-1] else real_exists(path))
+        os.remove(memory_file[:-1])
+        assert backend.read("user@example.com", "memory") == []
+        backend.append("user@example.com", "memory", RECORDS[:1])
+        assert backend.read("user@example.com", "memory") == RECORDS[:1]
+
+
+class TestAtomicRewrite:
+    """Rewrites go through a temp file but keep the file's permissions"""
+
+    def test_rewrite_keeps_the_existing_mode(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        backend = FileBackend()
+        backend.write("user@example.com", "data", {"theme": "dark"})
+        pref_file = get_user_files("user@example.com")[3]
+        os.chmod(pref_file, 0o644)
+
+        backend.write("user@example.com", "data", {"theme": "light"})
+        backend.write("user@example.com", "memory", [])
+        assert stat.S_IMODE(os.stat(pref_file).st_mode) == 0o644
+        assert backend.read("user@example.com", "data") == {"theme": "light"}
+
+    def test_new_file_follows_the_umask(self, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        umask = os.umask(0o027)
+        try:
+            FileBackend().write("user@example.com", "memory", [])
+        finally:
+            os.umask(umask)
+        memory_file = get_user_files("user@example.com")[1]
+        assert stat.S_IMODE(os.stat(memory_file).st_mode) == 0o640